@@ -3,18 +3,74 @@
 Main script with enhanced extractor selection including ontology-guided extraction
 """
 
+import argparse
 import os
 from pathlib import Path
-import json
 import sys
 
 # Set up path for imports
 project_root = Path(__file__).parent
 sys.path.append(str(project_root))
 
-from src.extractor import OntologyExtractor, RobustOntologyExtractor, OntologyGuidedExtractor
+from src.extractor import OntologyGuidedExtractor, create_extractor
+from src.results_store import ResultsStore, load_results
+from src.preprocessing import preprocess_with_stats
+from src.planner import EXTRACTOR_TYPES, plan_run, preflight
+from src.benchmark import benchmark_extractors
+from src.models import parse_routes
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Ontology Extraction Pipeline")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "test", "diagnose", "export", "preprocess", "plan", "benchmark"],
+                        help="run the pipeline (default), a quick test, diagnostics, export results to one JSON file, "
+                             "report what preprocessing saves per transcript, project a run's tokens, cost and time, "
+                             "or benchmark the fused extractor against the ontology-guided one")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of transcripts to process concurrently (default: EXTRACTION_MAX_WORKERS or 4)")
+    parser.add_argument("--async", dest="async_mode", action="store_true",
+                        help="use the asyncio extractors (one event loop, many requests in flight)")
+    parser.add_argument("--stream", dest="streaming", action="store_true", default=None,
+                        help="stream replies, parse JSON as it arrives and start dependent passes early")
+    parser.add_argument("--batch", dest="batch_mode", action="store_true",
+                        help="submit passes through the Message Batches API (half price, for bulk backfills)")
+    parser.add_argument("--chunk-tokens", type=int, default=None,
+                        help="split transcripts longer than this many tokens into chunks run in parallel "
+                             "(default: EXTRACTION_CHUNK_TOKENS or 16000, 0 disables)")
+    parser.add_argument("--no-preprocess", dest="preprocess", action="store_false", default=None,
+                        help="send transcripts as exported, without stripping boilerplate, timestamps and fillers")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="bypass the on-disk response cache and call the API for every pass")
+    parser.add_argument("--model", default=None,
+                        help="model for passes without a route (default: EXTRACTION_MODEL or Claude Sonnet 4)")
+    parser.add_argument("--light-model", default=None,
+                        help="model behind the 'light' tier (default: EXTRACTION_LIGHT_MODEL or Claude Haiku 4.5)")
+    parser.add_argument("--route", dest="routes", action="append", default=[], metavar="PASS=MODEL",
+                        help="send a pass to a model, or to the 'default' / 'light' tier; repeatable "
+                             "(default: every pass uses --model)")
+    parser.add_argument("--extractor", dest="extractor_types", action="append", choices=EXTRACTOR_TYPES,
+                        help="extractor type(s) to plan for (plan command; default: all)")
+    parser.add_argument("--sample", type=int, default=3,
+                        help="number of transcripts (smallest first) to benchmark (benchmark command; default: 3)")
+    parser.add_argument("--include-processed", action="store_true",
+                        help="plan as if no transcript had been processed yet (plan command)")
+    parser.add_argument("--export-legacy", dest="export_legacy", action="store_true", default=None,
+                        help="also write data/outputs/extraction_results.json after the run")
+    args = parser.parse_args(argv)
+    try:
+        args.model_routes = parse_routes(",".join(args.routes))
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def model_options(args) -> dict:
+    """Extractor options for the model and per-pass routes chosen on the command line"""
+    return {"model": args.model, "light_model": args.light_model, "model_routes": args.model_routes}
+
+def main(args=None):
+    if args is None:
+        args = parse_args([])
+    
     print("🚀 Ontology Extraction Pipeline")
     print("=" * 50)
     
@@ -42,20 +98,33 @@ def main():
     print("2. Robust (7-pass) - Enhanced comprehensive extraction")
     print("3. Ontology-Guided (8-pass) - Targeted extraction with ontology definitions")
     print("4. Auto-select based on file count")
+    print("5. Fused (1-2 calls) - Structured single-pass extraction for smaller transcripts")
     
     try:
-        choice = input("\nChoose extractor (1/2/3/4) [default: 3]: ").strip()
+        choice = input("\nChoose extractor (1/2/3/4/5) [default: 3]: ").strip()
         if not choice:
             choice = "3"
     except:
         choice = "3"  # Default for non-interactive environments
     
     # Initialize extractor based on choice
+    extractor_options = {
+        "max_workers": args.workers,
+        "async_mode": args.async_mode,
+        "batch_mode": args.batch_mode,
+        "streaming": args.streaming,
+        "chunk_tokens": args.chunk_tokens,
+        "preprocess": args.preprocess,
+        "use_response_cache": None if args.use_cache else False,
+        **model_options(args)
+    }
     try:
         if choice == "1":
-            extractor = OntologyExtractor(api_key=api_key)
+            extractor = create_extractor("standard", api_key=api_key, **extractor_options)
         elif choice == "2":
-            extractor = RobustOntologyExtractor(api_key=api_key)
+            extractor = create_extractor("robust", api_key=api_key, **extractor_options)
+        elif choice == "5":
+            extractor = create_extractor("fused", api_key=api_key, **extractor_options)
         elif choice == "4":
             # Auto-select based on file count
             transcript_folder = "data/transcripts"
@@ -63,17 +132,17 @@ def main():
                 file_count = len(list(Path(transcript_folder).glob("*.txt")))
                 if file_count <= 2:
                     print("📊 Auto-selecting Ontology-Guided extractor (≤2 files)")
-                    extractor = OntologyGuidedExtractor(api_key=api_key)
+                    extractor = create_extractor("guided", api_key=api_key, **extractor_options)
                 elif file_count <= 5:
                     print("📊 Auto-selecting Robust extractor (3-5 files)")
-                    extractor = RobustOntologyExtractor(api_key=api_key)
+                    extractor = create_extractor("robust", api_key=api_key, **extractor_options)
                 else:
                     print("📊 Auto-selecting Standard extractor (>5 files)")
-                    extractor = OntologyExtractor(api_key=api_key)
+                    extractor = create_extractor("standard", api_key=api_key, **extractor_options)
             else:
-                extractor = OntologyGuidedExtractor(api_key=api_key)
+                extractor = create_extractor("guided", api_key=api_key, **extractor_options)
         else:  # Default to ontology-guided
-            extractor = OntologyGuidedExtractor(api_key=api_key)
+            extractor = create_extractor("guided", api_key=api_key, **extractor_options)
             
     except Exception as e:
         print(f"❌ Failed to initialize extractor: {e}")
@@ -89,6 +158,12 @@ def main():
         Path(transcript_folder).mkdir(parents=True, exist_ok=True)
         return
     
+    # Pre-flight projection for the files this run will process (counted offline, no API calls)
+    try:
+        preflight(extractor, transcript_folder, **model_options(args))
+    except Exception as e:
+        print(f"⚠️ Pre-flight estimate unavailable: {e}")
+    
     # Process transcripts
     try:
         results = extractor.process_transcript_folder(transcript_folder)
@@ -98,7 +173,7 @@ def main():
             return
         
         # Save results
-        output_path = extractor.save_results(results)
+        output_path = extractor.save_results(results, export_legacy=args.export_legacy)
         
         # Print summary
         print("\n" + "=" * 50)
@@ -110,7 +185,15 @@ def main():
         # Show API usage if available
         if 'total_api_calls' in results['summary']:
             print(f"🔄 Total API calls: {results['summary']['total_api_calls']}")
-            print(f"💰 Estimated cost: ~${results['summary']['total_api_calls'] * 0.50:.2f}")
+        if 'usage' in results['summary']:
+            print(f"💰 Cost of this run: ${results['summary']['usage']['cost_usd']:.2f}")
+        
+        # Prompt caching savings for this run
+        if 'prompt_cache' in results['summary']:
+            cache = results['summary']['prompt_cache']
+            print(f"🗄️  Prompt cache: {cache['cache_read_input_tokens']:,} tokens read from cache, "
+                  f"{cache['cache_creation_input_tokens']:,} written, {cache['uncached_input_tokens']:,} uncached "
+                  f"(input cost saving {cache['input_cost_saving_pct']}%)")
         
         print(f"📁 Results saved to: {output_path}")
         
@@ -201,14 +284,11 @@ def diagnose_extraction_issues():
     print("=" * 30)
     
     # Check for recent extraction results
-    output_file = Path("data/outputs/extraction_results.json")
-    if not output_file.exists():
+    results = load_results()
+    if results is None:
         print("❌ No extraction results found. Run the pipeline first.")
         return
     
-    with open(output_file, 'r') as f:
-        results = json.load(f)
-    
     print("📊 DIAGNOSTIC SUMMARY:")
     for file_result in results.get('processed_files', []):
         if 'error' not in file_result:
@@ -246,6 +326,71 @@ def diagnose_extraction_issues():
                     coverage = validation['ontology_coverage_check']
                     print(f"  Coverage check: Technologies={coverage.get('technologies_identified', 0)}, Metrics={coverage.get('metrics_identified', 0)}")
 
+def export_results():
+    """Write the results store out as a single extraction_results.json"""
+    store = ResultsStore()
+    if not store.exists():
+        print("❌ No extraction results found. Run the pipeline first.")
+        return
+    
+    output_path = store.export_legacy()
+    print(f"📤 Exported {store.summary()['total_files']} results to {output_path}")
+
+def preprocessing_report(transcript_folder: str = "data/transcripts"):
+    """Show the transcript tokens preprocessing removes from every pass, without calling the API"""
+    print("🧹 PREPROCESSING REPORT")
+    print("=" * 30)
+    
+    files = sorted(Path(transcript_folder).glob("*.txt"))
+    if not files:
+        print(f"❌ No .txt files found in {transcript_folder}")
+        return
+    
+    total_before = total_after = 0
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            _, stats = preprocess_with_stats(f.read())
+        total_before += stats['tokens_before']
+        total_after += stats['tokens_after']
+        print(f"  📄 {file_path.name[:60]:60} ~{stats['tokens_before']:>7,} → ~{stats['tokens_after']:>7,} tokens "
+              f"(-{stats['reduction_pct']}%)")
+    
+    reduction = round(100 * (1 - total_after / total_before), 1) if total_before else 0.0
+    print(f"\n📊 Total: ~{total_before:,} → ~{total_after:,} tokens per pass (-{reduction}%)")
+
+def plan_extraction(args):
+    """Dry run: project tokens, cost and wall-clock time per file for each extractor type"""
+    print("📐 RUN PLAN (no API calls)")
+    print("=" * 30)
+    
+    transcript_folder = "data/transcripts"
+    if not Path(transcript_folder).exists():
+        print(f"❌ Transcript folder not found: {transcript_folder}")
+        return
+    
+    plans = plan_run(transcript_folder, extractor_types=args.extractor_types, include_processed=args.include_processed,
+                     max_workers=args.workers, chunk_tokens=args.chunk_tokens, preprocess=args.preprocess,
+                     use_response_cache=None if args.use_cache else False, **model_options(args))
+    
+    if len(plans) > 1:
+        print("\n📊 COMPARISON:")
+        for plan in plans.values():
+            total = plan['total']
+            print(f"  {plan['extraction_type']:28} {total['requests']:>5} requests  ~${total['cost']:>7.2f}  "
+                  f"~{total['wall_clock_s'] / 60:>5.1f} min")
+
+def run_benchmark(args):
+    """Compare the fused extractor's recall, wall time and cost with the ontology-guided extractor's"""
+    print("⏱️  FUSED vs ONTOLOGY-GUIDED BENCHMARK")
+    print("=" * 30)
+    
+    try:
+        benchmark_extractors("data/transcripts", baseline="guided", candidate="fused", sample=args.sample,
+                             max_workers=args.workers, streaming=args.streaming, chunk_tokens=args.chunk_tokens,
+                             preprocess=args.preprocess, **model_options(args))
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}")
+
 def quick_test():
     """Quick test function for development"""
     print("🧪 QUICK TEST MODE")
@@ -281,12 +426,18 @@ def quick_test():
 
 if __name__ == "__main__":
     # Check command line arguments
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "test":
-            quick_test()
-        elif sys.argv[1] == "diagnose":
-            diagnose_extraction_issues()
-        else:
-            main()
+    args = parse_args()
+    if args.command == "test":
+        quick_test()
+    elif args.command == "diagnose":
+        diagnose_extraction_issues()
+    elif args.command == "export":
+        export_results()
+    elif args.command == "preprocess":
+        preprocessing_report()
+    elif args.command == "plan":
+        plan_extraction(args)
+    elif args.command == "benchmark":
+        run_benchmark(args)
     else:
-        main()
\ No newline at end of file
+        main(args)
\ No newline at end of file
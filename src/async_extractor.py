@@ -0,0 +1,216 @@
+# src/async_extractor.py
+"""
+Asyncio variants of the extractors built on the AsyncAnthropic client
+All requests share one event loop, so hundreds of calls can be in flight without a thread each
+"""
+
+import anthropic
+import asyncio
+import inspect
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.extractor import (
+    Prompt,
+    OntologyExtractor,
+    FusedOntologyExtractor,
+    RobustOntologyExtractor,
+    OntologyGuidedExtractor,
+    _current_file,
+    _progress_prefix,
+    reply_text,
+)
+from src.chunking import merge_chunk_outputs
+from src.pass_graph import ExtractionPass, arun_pass_graph
+from src.streaming import StreamMonitor, delta_text
+
+# Default cap on API requests in flight at once across all transcripts
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+class AsyncExtractorMixin:
+    """Makes an extractor's passes awaitable and runs whole folders on one event loop
+
+    Pass methods are inherited unchanged: they all go through run_prompt, which is async here,
+    so each one returns a coroutine. The synchronous entry points wrap the async ones with
+    asyncio.run, so callers such as main.py don't need to change.
+    """
+
+    def __init__(self, api_key=None, max_concurrency: Optional[int] = None, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.max_concurrency = max_concurrency or int(os.getenv('EXTRACTION_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY))
+        self._loop = None
+        self._async_client = None
+        self._request_slots = None
+
+    def _loop_resources(self):
+        """Return (client, semaphore) for the running loop, creating them on first use
+
+        Both are tied to the event loop they were created in, and every asyncio.run call starts a new one.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._async_client = anthropic.AsyncAnthropic(api_key=self.api_key, max_retries=0)
+            self._request_slots = asyncio.Semaphore(self.max_concurrency)
+        return self._async_client, self._request_slots
+
+    async def _astream_request(self, client, prompt: Prompt, max_tokens: int, tool: Optional[Dict] = None,
+                               prefill: Optional[str] = None):
+        """Async streamed request, feeding text to a StreamMonitor as it arrives"""
+        monitor = StreamMonitor(max_tokens, self.log, prefill or "")
+        async with client.messages.stream(**self.request_params(prompt, max_tokens, tool, prefill)) as stream:
+            self.rate_limiter.update_from_headers(stream.response.headers)
+            async for event in stream:
+                text = delta_text(event)
+                if text:
+                    monitor.on_text(text)
+            message = await stream.get_final_message()
+        self.finish_stream(monitor, message)
+        return message
+
+    async def amake_api_call(self, prompt: Prompt, max_tokens: int = 4000, tool: Optional[Dict] = None) -> str:
+        """Async API call to Claude, continuing the reply if it is cut off at max_tokens"""
+        cached = self.cached_response(prompt, max_tokens, tool)
+        if cached is not None:
+            self.record_call(source="response_cache")
+            return cached
+
+        response = await self.asend_request(prompt, max_tokens, tool)
+        text = reply_text(response)
+        for continuation in range(1, self.max_continuations + 1):
+            if response.stop_reason != "max_tokens":
+                break
+            prefill = self.continuation_start(response, text, continuation, max_tokens)
+            response = await self.asend_request(prompt, max_tokens, prefill=prefill)
+            text = prefill + reply_text(response)
+        else:
+            text = self.continuation_end(response, text, max_tokens)
+        self.store_response(prompt, max_tokens, text, tool)
+        return text
+
+    async def asend_request(self, prompt: Prompt, max_tokens: int, tool: Optional[Dict] = None,
+                            prefill: Optional[str] = None):
+        """Send one request, paced by the shared rate limiter and retried with jittered backoff"""
+        client, request_slots = self._loop_resources()
+        estimated_tokens = self.estimate_input_tokens(prompt)
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            delay = self.rate_limiter.reserve(estimated_tokens, max_tokens, retry=attempt > 0)
+            await asyncio.sleep(delay)
+            waited += delay
+            try:
+                async with request_slots:
+                    started = time.time()
+                    if self.streaming:
+                        response = await self._astream_request(client, prompt, max_tokens, tool, prefill)
+                        break
+
+                    raw = await client.messages.with_raw_response.create(
+                        **self.request_params(prompt, max_tokens, tool, prefill))
+                self.rate_limiter.update_from_headers(raw.headers)
+                response = raw.parse()
+                self.record_usage(response.usage, time.time() - started)
+                break
+            except Exception as e:
+                self.rate_limiter.release_output(max_tokens)  # A failed attempt produces no reply
+                delay = self.retry_wait(e, attempt, waited)
+                await asyncio.sleep(delay)
+                waited += delay
+
+        self.rate_limiter.release_output(max_tokens - response.usage.output_tokens)
+        self.record_call(response, time.time() - started, waited, attempt)
+        self.check_tool(response, tool)
+        return response
+
+    async def run_prompt(self, prompt: Prompt, max_tokens: int = 4000, tool: Optional[Dict] = None) -> Dict:
+        """Run one extraction pass asynchronously"""
+        max_tokens = self.output_budget(prompt, max_tokens)
+        text = await self.amake_api_call(prompt, max_tokens=max_tokens, tool=tool)
+        result, problems = self.parse_output(text, tool)
+        if problems:
+            repair = self.repair_prompt(text, problems)
+            result = self.accept_repair(result, await self.amake_api_call(repair, max_tokens=max_tokens, tool=tool), tool)
+        return self.check_cached_parse(prompt, max_tokens, result, tool)
+
+    async def run_chunk_passes(self, chunk_passes: List[ExtractionPass], inputs: Dict) -> Dict:
+        """Run one pass over every chunk concurrently on the event loop and merge the outputs"""
+        async def run_chunk(p: ExtractionPass):
+            output = p.run(inputs)
+            return await output if inspect.isawaitable(output) else output
+
+        return merge_chunk_outputs(await asyncio.gather(*(run_chunk(p) for p in chunk_passes)))
+
+    async def aprocess_single_transcript(self, file_path: Path) -> Dict:
+        """Process a single transcript, running its pass graph as concurrent tasks"""
+        _current_file.set(file_path.name)
+        self.log(f"📄 Processing: {file_path.name}")
+        raw = self.read_transcript(file_path)
+        checkpoint = self.open_checkpoint(raw)
+        transcript, preprocessing = self.prepare_transcript(raw)
+
+        outputs = await arun_pass_graph(self.plan_pass_graph(transcript), log=self.log,
+                                        completed=checkpoint.passes, on_complete=checkpoint.save)
+        return self.finish_transcript(file_path, raw, outputs, checkpoint, preprocessing)
+
+    async def _aprocess_file_job(self, index: int, total: int, file_path: Path, file_slots: asyncio.Semaphore) -> Dict:
+        """Async worker for one file in a folder run; errors are recorded so other files keep going"""
+        async with file_slots:
+            # Each gathered coroutine runs in its own task context, so the prefix stays per-file
+            _progress_prefix.set(f"[{index}/{total}] ")
+            try:
+                self.log(f"Processing new file: {file_path.name}")
+                file_result = await self.aprocess_single_transcript(file_path)
+            except Exception as e:
+                file_result = self._file_error(file_path, e)
+            self.save_file_result(file_result)
+            return file_result
+
+    async def aprocess_transcript_folder(self, folder_path: str, max_workers: Optional[int] = None) -> Dict:
+        """Process all new transcripts in a folder concurrently on one event loop
+
+        max_workers caps the transcripts in progress (default: all of them);
+        max_concurrency caps the API requests in flight.
+        """
+        new_files, already_processed = self._select_new_files(folder_path)
+        if not new_files:
+            return self.folder_results([]) or {"error": "No transcript files found"}
+
+        workers = max(1, min(max_workers or len(new_files), len(new_files)))
+        print(f"⚡ Processing {workers} transcript(s) at a time, up to {self.max_concurrency} requests in flight\n")
+
+        file_slots = asyncio.Semaphore(workers)
+        file_results = await asyncio.gather(*(
+            self._aprocess_file_job(i, len(new_files), file_path, file_slots)
+            for i, file_path in enumerate(new_files, 1)
+        ))
+
+        return self._finish_folder_run(list(file_results), already_processed)
+
+    # Synchronous API kept as thin wrappers
+
+    def process_single_transcript(self, file_path: Path) -> Dict:
+        """Process a single transcript (blocking wrapper around aprocess_single_transcript)"""
+        return asyncio.run(self.aprocess_single_transcript(file_path))
+
+    def process_transcript_folder(self, folder_path: str, max_workers: Optional[int] = None) -> Dict:
+        """Process a folder of transcripts (blocking wrapper around aprocess_transcript_folder)"""
+        return asyncio.run(self.aprocess_transcript_folder(folder_path, max_workers=max_workers))
+
+
+class AsyncOntologyExtractor(AsyncExtractorMixin, OntologyExtractor):
+    """Async 4-pass standard extraction"""
+
+
+class AsyncRobustOntologyExtractor(AsyncExtractorMixin, RobustOntologyExtractor):
+    """Async 7-pass robust extraction"""
+
+
+class AsyncOntologyGuidedExtractor(AsyncExtractorMixin, OntologyGuidedExtractor):
+    """Async 8-pass ontology-guided extraction"""
+
+
+class AsyncFusedOntologyExtractor(AsyncExtractorMixin, FusedOntologyExtractor):
+    """Async fused (one- or two-call) extraction"""
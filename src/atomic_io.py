@@ -0,0 +1,77 @@
+# src/atomic_io.py
+"""
+Crash-safe file writes
+Whole-file writes go to a temp file that is fsynced and renamed over the target; appends are fsynced line by line
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator
+
+
+def fsync_dir(path: Path):
+    """Flush a directory entry (e.g. after a rename) so the rename itself survives a power cut"""
+    if os.name == "nt":  # Directories can't be opened for fsync on Windows
+        return
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_text_atomic(path, text: str):
+    """Replace `path` with `text`: readers see either the old file or the new one, never a partial write"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    fsync_dir(path.parent)
+
+
+def write_json_atomic(path, data, **dump_options):
+    """write_text_atomic for a JSON document (dump_options are passed to json.dumps)"""
+    write_text_atomic(path, json.dumps(data, **dump_options))
+
+
+def append_line_durable(path, line: str):
+    """Append one line and fsync it, so a completed append is on disk before the caller moves on
+
+    A line torn by an earlier crash is terminated first, so it can't swallow the new one.
+    """
+    path = Path(path)
+    with open(path, 'a+b') as f:
+        prefix = b""
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                prefix = b"\n"
+        f.write(prefix + line.rstrip("\n").encode('utf-8') + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_json_lines(path) -> Iterator[dict]:
+    """Parse a JSON-lines file, skipping any line torn by a crash mid-append"""
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping incomplete line in {path.name}")
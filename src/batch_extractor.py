@@ -0,0 +1,323 @@
+# src/batch_extractor.py
+"""
+Message Batches variants of the extractors for bulk, non-interactive runs
+Each wave of the pass graph is submitted for every file as one batch, at half the per-token price
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.extractor import (
+    MODEL,
+    TEMPERATURE,
+    TOOL_CHOICE,
+    Prompt,
+    OntologyExtractor,
+    FusedOntologyExtractor,
+    RobustOntologyExtractor,
+    OntologyGuidedExtractor,
+    _current_file,
+    _progress_prefix,
+    reply_text,
+    tool_prompt,
+)
+from src.pass_graph import current_pass, pass_levels
+
+DEFAULT_POLL_INTERVAL_S = 60
+
+# API limits are 100,000 requests and 256 MB per batch; stay well inside both
+MAX_BATCH_REQUESTS = 10000
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+
+
+class BatchRequest:
+    """A pass's API request, collected for the next batch instead of being sent immediately"""
+
+    def __init__(self, prompt: Prompt, max_tokens: int, tool: Optional[Dict] = None, model: str = MODEL,
+                 tools: Optional[List[Dict]] = None, prefill: Optional[str] = None):
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.tool = tool
+        self.model = model
+        self.tools = tools or ([tool] if tool else [])  # Every pass's tools, so batched requests share a cache prefix
+        self.prefill = prefill  # Start of the assistant's reply, when continuing a truncated one
+        # Where the request came from, for usage accounting once its result arrives
+        self.file_name = _current_file.get()
+        self.pass_name = current_pass.get()
+
+    def params(self) -> Dict:
+        params = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [{"role": "user", "content": tool_prompt(self.prompt, self.tool) if self.tool else self.prompt}],
+            "temperature": TEMPERATURE
+        }
+        if self.prefill:
+            params["messages"].append({"role": "assistant", "content": self.prefill})
+        if self.tool:
+            params["tools"] = self.tools
+            params["tool_choice"] = TOOL_CHOICE
+        return params
+
+
+class BatchExtractorMixin:
+    """Runs whole folders through the Message Batches API, one batch per wave of the pass graph
+
+    Pass methods are inherited unchanged: run_prompt returns a BatchRequest rather than calling
+    the API, and the wave runner sends those requests together and feeds the parsed replies to
+    the dependent passes in the next wave. Continuations of truncated replies and schema repairs
+    go out as further rounds of batches within the same wave. Batches bypass the client-side rate
+    limiter, and transcripts are sent whole (chunking is for latency, which batches don't optimise for).
+    """
+
+    def __init__(self, api_key=None, poll_interval: Optional[float] = None, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.poll_interval = poll_interval or float(os.getenv('EXTRACTION_BATCH_POLL_S', DEFAULT_POLL_INTERVAL_S))
+        self.batch_stats = {
+            "batches": 0,
+            "requests": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "wait_s": 0.0
+        }
+
+    def run_prompt(self, prompt: Prompt, max_tokens: int = 4000, tool: Optional[Dict] = None) -> BatchRequest:
+        """Defer the pass's request to the current batch"""
+        return BatchRequest(prompt, self.output_budget(prompt, max_tokens), tool, self.model_for(), self.output_tools())
+
+    def _split_batches(self, requests: Dict[str, BatchRequest]) -> List[List[Dict]]:
+        """Group batch entries so each submission stays inside the API's size limits"""
+        chunks, chunk, chunk_bytes = [], [], 0
+        for custom_id, request in requests.items():
+            entry = {"custom_id": custom_id, "params": request.params()}
+            entry_bytes = len(json.dumps(entry))
+            if chunk and (len(chunk) >= MAX_BATCH_REQUESTS or chunk_bytes + entry_bytes > MAX_BATCH_BYTES):
+                chunks.append(chunk)
+                chunk, chunk_bytes = [], 0
+            chunk.append(entry)
+            chunk_bytes += entry_bytes
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _run_batches(self, requests: Dict[str, BatchRequest]) -> Dict[str, object]:
+        """Submit requests, wait for every batch to end, and return {custom_id: message or error}"""
+        batch_ids = []
+        for chunk in self._split_batches(requests):
+            batch = self.client.messages.batches.create(requests=chunk)
+            batch_ids.append(batch.id)
+            print(f"   📤 Submitted batch {batch.id} ({len(chunk)} requests)")
+        self.batch_stats["batches"] += len(batch_ids)
+        self.batch_stats["requests"] += len(requests)
+
+        started = time.time()
+        waiting = list(batch_ids)
+        while waiting:
+            for batch_id in list(waiting):
+                batch = self.client.messages.batches.retrieve(batch_id)
+                if batch.processing_status == "ended":
+                    waiting.remove(batch_id)
+                    continue
+                counts = batch.request_counts
+                print(f"   ⏳ Batch {batch_id}: {counts.processing} processing, {counts.succeeded} succeeded, "
+                      f"{counts.errored} errored ({time.time() - started:.0f}s elapsed)")
+            if waiting:
+                time.sleep(self.poll_interval)
+        self.batch_stats["wait_s"] += time.time() - started
+
+        replies = {}
+        for batch_id in batch_ids:
+            for entry in self.client.messages.batches.results(batch_id):
+                request = requests[entry.custom_id]
+                if entry.result.type == "succeeded":
+                    message = entry.result.message
+                    self.record_usage(message.usage)
+                    self.record_call(message, source="batch", file_name=request.file_name, pass_name=request.pass_name)
+                    replies[entry.custom_id] = message
+                    self.batch_stats["succeeded"] += 1
+                else:
+                    error = getattr(entry.result, "error", None)
+                    replies[entry.custom_id] = RuntimeError(f"Batch request {entry.result.type}: {error or 'no result'}")
+                    self.record_call(source="batch", error=replies[entry.custom_id],
+                                     file_name=request.file_name, pass_name=request.pass_name)
+                    self.batch_stats["failed"] += 1
+        return replies
+
+    def _advance(self, job: Dict, name: str, state: Dict, reply) -> Optional[BatchRequest]:
+        """Take one batch reply for a pass; returns the follow-up request for the wave's next round, if any
+
+        A reply cut off at max_tokens is continued from the text so far, and output that breaks its
+        schema gets a repair request, as make_api_call and run_prompt do with direct requests.
+        state holds the pass's request, the one in flight and any continuation or repair in progress.
+        """
+        current = state["current"]
+        self.check_tool(reply, current.tool)
+        text = state["prefill"] + reply_text(reply)
+        if reply.stop_reason == "max_tokens" and state["continuation"] < self.max_continuations:
+            state["continuation"] += 1
+            state["prefill"] = self.continuation_start(reply, text, state["continuation"], current.max_tokens)
+            return BatchRequest(current.prompt, current.max_tokens, model=current.model, prefill=state["prefill"])
+        text = self.continuation_end(reply, text, current.max_tokens)
+        state["prefill"], state["continuation"] = "", 0
+        self.store_response(current.prompt, current.max_tokens, text, current.tool)
+
+        if state["repairing"] is not None:
+            self._resolve(job, name, state, self.accept_repair(state["repairing"], text, current.tool))
+            return None
+        return self._check_reply(job, name, state, text)
+
+    def _check_reply(self, job: Dict, name: str, state: Dict, text: str) -> Optional[BatchRequest]:
+        """Parse a pass's complete reply: resolve the pass, or return the repair request it needs"""
+        request = state["request"]
+        result, problems = self.parse_output(text, request.tool)
+        if not problems:
+            self._resolve(job, name, state, result)
+            return None
+        state["repairing"] = result
+        state["current"] = BatchRequest(self.repair_prompt(text, problems), request.max_tokens, request.tool,
+                                        request.model, request.tools)
+        return state["current"]
+
+    def _resolve(self, job: Dict, name: str, state: Dict, result: Dict):
+        """Record a pass's final output and checkpoint it"""
+        request = state["request"]
+        result = self.check_cached_parse(request.prompt, request.max_tokens, result, request.tool)
+        job["outputs"][name] = result
+        job["checkpoint"].save(name, result)
+
+    def _run_files(self, file_paths: List[Path]) -> List[Dict]:
+        """Run every file's pass graph wave by wave, one set of batches per wave"""
+        jobs = []
+        for i, file_path in enumerate(file_paths, 1):
+            _progress_prefix.set(f"[{i}/{len(file_paths)}] ")
+            self.log(f"📄 Preparing: {file_path.name}")
+            raw = self.read_transcript(file_path)
+            checkpoint = self.open_checkpoint(raw)
+            transcript, preprocessing = self.prepare_transcript(raw)
+            passes = self.build_pass_graph(transcript)
+            jobs.append({
+                "file_path": file_path,
+                "transcript": raw,
+                "preprocessing": preprocessing,
+                "passes": {p.name: p for p in passes},
+                "levels": pass_levels(passes),
+                "checkpoint": checkpoint,
+                "outputs": dict(checkpoint.passes),
+                "error": None
+            })
+        _progress_prefix.set("")
+
+        total_waves = max((len(job["levels"]) for job in jobs), default=0)
+        for wave in range(total_waves):
+            requests, waiting = {}, {}
+            for i, job in enumerate(jobs, 1):
+                if job["error"] or wave >= len(job["levels"]):
+                    continue
+                for name in job["levels"][wave]:
+                    if name in job["outputs"]:
+                        continue
+                    p = job["passes"][name]
+                    _current_file.set(job["file_path"].name)
+                    current_pass.set(name)
+                    try:
+                        output = p.run({d: job["outputs"][d] for d in p.depends_on})
+                    except Exception as e:
+                        job["error"] = e
+                        break
+                    if not isinstance(output, BatchRequest):
+                        job["outputs"][name] = output
+                        continue
+
+                    custom_id = f"f{i}-{name}"
+                    state = {"request": output, "current": output, "prefill": "", "continuation": 0, "repairing": None}
+
+                    # Responses already in the response cache don't need to go in the batch
+                    cached = self.cached_response(output.prompt, output.max_tokens, output.tool)
+                    if cached is not None:
+                        self.record_call(source="response_cache")
+                        output = self._check_reply(job, name, state, cached)
+                        if output is None:
+                            continue
+
+                    requests[custom_id] = output
+                    waiting[custom_id] = (job, name, state)
+
+            print(f"\n📦 Wave {wave + 1}/{total_waves}: {len(requests)} request(s)")
+            # Continuations and repairs go out as further rounds until every pass in the wave is resolved
+            round_number = 0
+            while requests:
+                if round_number:
+                    print(f"📦 Wave {wave + 1}/{total_waves}, follow-up round {round_number}: {len(requests)} request(s)")
+                follow_ups = {}
+                for custom_id, reply in self._run_batches(requests).items():
+                    job, name, state = waiting[custom_id]
+                    if isinstance(reply, Exception):
+                        job["error"] = job["error"] or reply
+                        continue
+                    _current_file.set(job["file_path"].name)
+                    current_pass.set(name)
+                    follow_up = self._advance(job, name, state, reply)
+                    if follow_up is not None:
+                        follow_ups[custom_id] = follow_up
+                requests = follow_ups
+                round_number += 1
+
+        _current_file.set("")
+        current_pass.set("")
+        file_results = []
+        for i, job in enumerate(jobs, 1):
+            _progress_prefix.set(f"[{i}/{len(jobs)}] ")
+            if job["error"]:
+                file_results.append(self._file_error(job["file_path"], job["error"]))
+            else:
+                file_results.append(self.finish_transcript(job["file_path"], job["transcript"], job["outputs"],
+                                                           job["checkpoint"], job["preprocessing"]))
+        _progress_prefix.set("")
+        return file_results
+
+    def process_single_transcript(self, file_path: Path) -> Dict:
+        """Process one transcript through batches (mostly useful for testing the batch path)"""
+        result = self._run_files([file_path])[0]
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result
+
+    def process_transcript_folder(self, folder_path: str, max_workers: Optional[int] = None) -> Dict:
+        """Process all new transcripts in a folder as Message Batches (max_workers is not used)"""
+        new_files, already_processed = self._select_new_files(folder_path)
+        if not new_files:
+            return self.folder_results([]) or {"error": "No transcript files found"}
+
+        print(f"📦 Submitting {len(new_files)} transcript(s) as Message Batches, polling every {self.poll_interval:.0f}s")
+        file_results = self._run_files(new_files)
+        for file_result in file_results:
+            self.save_file_result(file_result)
+        return self._finish_folder_run(file_results, already_processed)
+
+    def _finish_folder_run(self, file_results: List[Dict], already_processed: List[Path]) -> Dict:
+        final_results = super()._finish_folder_run(file_results, already_processed)
+        final_results['summary']['batch'] = dict(self.batch_stats, wait_s=round(self.batch_stats["wait_s"], 1))
+
+        stats = final_results['summary']['batch']
+        print(f"   Batches: {stats['batches']} submitted, {stats['succeeded']}/{stats['requests']} requests succeeded, "
+              f"{stats['wait_s']}s waiting for results")
+        return final_results
+
+
+class BatchOntologyExtractor(BatchExtractorMixin, OntologyExtractor):
+    """Batch 4-pass standard extraction"""
+
+
+class BatchRobustOntologyExtractor(BatchExtractorMixin, RobustOntologyExtractor):
+    """Batch 7-pass robust extraction"""
+
+
+class BatchOntologyGuidedExtractor(BatchExtractorMixin, OntologyGuidedExtractor):
+    """Batch 8-pass ontology-guided extraction"""
+
+
+class BatchFusedOntologyExtractor(BatchExtractorMixin, FusedOntologyExtractor):
+    """Batch fused (one- or two-call) extraction"""
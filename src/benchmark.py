@@ -0,0 +1,153 @@
+# src/benchmark.py
+"""
+Head-to-head benchmark of two extractors on the same transcripts
+Reports each candidate's entity recall against a baseline extractor, plus wall time, tokens and cost per file
+"""
+
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from src.atomic_io import write_json_atomic
+from src.canonicalisation import ENTITY_FIELDS, normalise_name
+from src.extractor import create_extractor
+
+DEFAULT_BENCHMARK_DIR = "data/outputs/benchmarks"
+
+
+def result_entities(result: Dict) -> Dict[str, Set[str]]:
+    """Normalised entity names per type, plus construct-to-construct relationships as 'a -> b'"""
+    entities = {}
+    for label, path, name_field in ENTITY_FIELDS:
+        items = result
+        for key in path:
+            items = items.get(key, {}) if isinstance(items, dict) else {}
+        entities[label] = {normalise_name(item.get(name_field, "")) for item in items or []
+                           if isinstance(item, dict) and item.get(name_field)}
+
+    relationships = (result.get("relationships") or {}).get("construct_relationships", [])
+    entities["relationships"] = {
+        f"{normalise_name(r.get('source_construct', ''))} -> {normalise_name(r.get('target_construct', ''))}"
+        for r in relationships if isinstance(r, dict)
+    }
+    return entities
+
+
+def recall(baseline: Dict[str, Set[str]], candidate: Dict[str, Set[str]]) -> Dict[str, Optional[float]]:
+    """Share of the baseline's entities the candidate also found, per type and over all types"""
+    scores = {}
+    found = total = 0
+    for label, expected in baseline.items():
+        hits = len(expected & candidate.get(label, set()))
+        scores[label] = round(hits / len(expected), 3) if expected else None
+        found += hits
+        total += len(expected)
+    scores["overall"] = round(found / total, 3) if total else None
+    return scores
+
+
+def _run_file(extractor, file_path: Path) -> Dict:
+    """Process one file from scratch, returning its result with wall time and this file's API usage
+
+    Pass checkpoints go to a fresh temporary directory: a leftover checkpoint would skip passes and
+    skew the timing, and a real run's checkpoint for the same transcript must survive the benchmark.
+    """
+    with tempfile.TemporaryDirectory(prefix="benchmark-checkpoints-") as checkpoint_dir:
+        extractor.checkpoint_dir = checkpoint_dir
+        started = time.time()
+        try:
+            result = extractor.process_single_transcript(file_path)
+        except Exception as e:
+            result = {"file_name": file_path.name, "error": str(e)}
+        wall_time_s = round(time.time() - started, 1)
+    return {"result": result, "wall_time_s": wall_time_s,
+            "usage": extractor.usage.totals(file_path.name)}
+
+
+def benchmark_extractors(folder_path: str = "data/transcripts", baseline: str = "guided", candidate: str = "fused",
+                         sample: int = 3, files: Optional[List[str]] = None,
+                         output_dir: str = DEFAULT_BENCHMARK_DIR, **extractor_options) -> Dict:
+    """Run both extractors on the same transcripts (the smallest `sample` ones unless files are named)
+
+    The response cache is bypassed so wall times are real. Results are not written to the results
+    store; the full comparison is saved to output_dir as JSON.
+    """
+    transcripts = sorted(Path(folder_path).glob("*.txt"), key=lambda f: f.stat().st_size)
+    if files:
+        transcripts = [f for f in transcripts if f.name in files]
+    else:
+        transcripts = transcripts[:sample]
+    if not transcripts:
+        raise ValueError(f"No transcripts to benchmark in {folder_path}")
+
+    options = dict(extractor_options, use_response_cache=False)
+    extractors = {name: create_extractor(name, **options) for name in (baseline, candidate)}
+
+    rows = []
+    for file_path in transcripts:
+        print(f"\n⏱️  {file_path.name} ({file_path.stat().st_size / 1024:.0f} KB)")
+        runs = {name: _run_file(extractor, file_path) for name, extractor in extractors.items()}
+        baseline_entities = result_entities(runs[baseline]["result"])
+        candidate_entities = result_entities(runs[candidate]["result"])
+        rows.append({
+            "file_name": file_path.name,
+            "size_kb": round(file_path.stat().st_size / 1024, 1),
+            "recall": recall(baseline_entities, candidate_entities),
+            "entity_counts": {name: {label: len(found) for label, found in result_entities(run["result"]).items()}
+                              for name, run in runs.items()},
+            "runs": {name: {"wall_time_s": run["wall_time_s"], "usage": run["usage"],
+                            "error": run["result"].get("error")} for name, run in runs.items()}
+        })
+
+    report = {
+        "baseline": extractors[baseline].extraction_type,
+        "candidate": extractors[candidate].extraction_type,
+        "files": rows,
+        "mean_recall": _mean_recall(rows),
+        "totals": {
+            name: {
+                "wall_time_s": round(sum(row["runs"][name]["wall_time_s"] for row in rows), 1),
+                "requests": sum(row["runs"][name]["usage"]["requests"] for row in rows),
+                "input_tokens": sum(row["runs"][name]["usage"]["input_tokens"]
+                                    + row["runs"][name]["usage"]["cache_read_input_tokens"]
+                                    + row["runs"][name]["usage"]["cache_creation_input_tokens"] for row in rows),
+                "output_tokens": sum(row["runs"][name]["usage"]["output_tokens"] for row in rows),
+                "cost_usd": round(sum(row["runs"][name]["usage"]["cost_usd"] for row in rows), 4)
+            }
+            for name in (baseline, candidate)
+        }
+    }
+
+    output_path = Path(output_dir) / f"{candidate}-vs-{baseline}-{time.strftime('%Y%m%dT%H%M%S')}.json"
+    write_json_atomic(output_path, report, indent=2, ensure_ascii=False)
+    print_benchmark(report, baseline, candidate)
+    print(f"\n💾 Benchmark saved to {output_path}")
+    return report
+
+
+def _mean_recall(rows: List[Dict]) -> Dict[str, Optional[float]]:
+    labels = rows[0]["recall"].keys() if rows else []
+    means = {}
+    for label in labels:
+        scores = [row["recall"][label] for row in rows if row["recall"][label] is not None]
+        means[label] = round(sum(scores) / len(scores), 3) if scores else None
+    return means
+
+
+def print_benchmark(report: Dict, baseline: str, candidate: str):
+    """Per-file recall and timing, then totals"""
+    print(f"\n📊 BENCHMARK: {report['candidate']} vs {report['baseline']}")
+    for row in report["files"]:
+        base, cand = row["runs"][baseline], row["runs"][candidate]
+        overall = row["recall"]["overall"]
+        print(f"  📄 {row['file_name'][:50]:50} recall {overall if overall is not None else '-':>5}  "
+              f"{cand['wall_time_s']:>6}s vs {base['wall_time_s']:>6}s  "
+              f"${cand['usage']['cost_usd']:.3f} vs ${base['usage']['cost_usd']:.3f}")
+
+    print("\n  Mean recall by type: " + ", ".join(
+        f"{label} {score:.0%}" for label, score in report["mean_recall"].items() if score is not None))
+    for name in (candidate, baseline):
+        totals = report["totals"][name]
+        print(f"  {name:>8}: {totals['wall_time_s']}s, {totals['requests']} requests, "
+              f"{totals['input_tokens']:,} input / {totals['output_tokens']:,} output tokens, ${totals['cost_usd']:.2f}")
@@ -0,0 +1,313 @@
+# src/canonicalisation.py
+"""
+Cross-transcript entity resolution
+Maps every surface form of an entity name ("VO2 Max Test", "VO2max test", "VO2 max testing") to one canonical ID
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.atomic_io import write_json_atomic
+
+CANONICAL_FILE = "canonical_entities.json"
+
+# Bump when the mapping layout, the key normalisation or the matching rules change so stale mappings are rebuilt
+CANONICAL_VERSION = 4
+
+# (entity type, path to the entity list in a per-file result, name field)
+ENTITY_FIELDS = [
+    ("domains", ("domains_constructs", "practitioner_domains"), "domain_name"),
+    ("constructs", ("domains_constructs", "constructs_mentioned"), "construct_name"),
+    ("assessments", ("assessments", "assessments"), "assessment_name"),
+    ("interventions", ("interventions", "interventions"), "intervention_name"),
+    ("technologies", ("ontology_guided_data", "technologies_metrics", "technologies"), "technology_name"),
+    ("metrics", ("ontology_guided_data", "technologies_metrics", "metrics"), "metric_name"),
+]
+
+# Names that differ only in their normalised key always merge; distinct keys merge when they differ in
+# one token whose spellings reach the fuzzy threshold (or, with a local embedding model, when their
+# cosine similarity reaches the embedding threshold)
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+DEFAULT_EMBEDDING_THRESHOLD = 0.9
+
+# Token blocks larger than this ("test", "training", ...) say little about identity and are skipped,
+# which bounds the comparisons to MAX_BLOCK_SIZE per distinct key
+MAX_BLOCK_SIZE = 200
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_PARENTHETICAL = re.compile(r"\s*[(\[]([^)\]]*)[)\]]")
+_DIGITS = re.compile(r"\d+")
+_STOPWORDS = {"a", "an", "and", "the"}
+
+
+def normalise_name(name: str) -> str:
+    """Case- and punctuation-insensitive form of an entity name, for matching across extractors"""
+    return _NON_ALNUM.sub(" ", str(name).lower()).strip()
+
+
+def _stem(token: str) -> str:
+    """Crude suffix stripping, enough for "tests"/"testing"/"test" to agree"""
+    if len(token) > 5 and token.endswith("ing"):
+        return token[:-3]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _drop_acronyms(name: str) -> str:
+    """The name without a parenthesised acronym of itself ("Heart Rate Variability (HRV)");
+    other parentheses ("GLP-1 Medications (Micro-dosing)") are qualifiers and stay"""
+    def replace(match):
+        initials = "".join(word[0] for word in normalise_name(_PARENTHETICAL.sub("", name)).split())
+        return "" if normalise_name(match.group(1)).replace(" ", "") == initials else match.group(0)
+    return _PARENTHETICAL.sub(replace, str(name))
+
+
+def name_tokens(name: str) -> List[str]:
+    """Normalised, stemmed tokens of a name, without a parenthesised acronym or stopwords"""
+    tokens = normalise_name(_drop_acronyms(name)).split()
+    return [_stem(token) for token in tokens if token not in _STOPWORDS]
+
+
+def canonical_key(name: str) -> str:
+    """Spacing-insensitive key: names with the same key are the same entity ("VO2 max" / "VO2max")"""
+    return "".join(name_tokens(name)) or normalise_name(name).replace(" ", "")
+
+
+def collect_mentions(data: Dict) -> Dict[str, Counter]:
+    """How often each surface name occurs per entity type across all results
+
+    Names referenced by relationships or listed on entities (constructs measured, targeted or related,
+    assessments a technology or metric belongs to) count as mentions of that type, so the mapping
+    covers every name the graph can show.
+    """
+    mentions = {entity_type: Counter() for entity_type, _, _ in ENTITY_FIELDS}
+    for file_data in data.get('processed_files', []):
+        if 'error' in file_data:
+            continue
+        for entity_type, path, name_field in ENTITY_FIELDS:
+            items = file_data
+            for key in path:
+                items = items.get(key, {}) if isinstance(items, dict) else {}
+            for item in items or []:
+                if isinstance(item, dict) and item.get(name_field):
+                    mentions[entity_type][item[name_field]] += 1
+
+        relationships = file_data.get('relationships', {})
+        for rel in relationships.get('construct_relationships', []):
+            mentions['constructs'].update(filter(None, [rel.get('source_construct'), rel.get('target_construct')]))
+        for rel in relationships.get('assessment_construct_links', []):
+            mentions['constructs'].update(filter(None, rel.get('constructs_measured', [])))
+            mentions['assessments'].update(filter(None, [rel.get('assessment_name')]))
+        for rel in relationships.get('intervention_construct_links', []):
+            mentions['constructs'].update(filter(None, rel.get('constructs_targeted', [])))
+            mentions['interventions'].update(filter(None, [rel.get('intervention_name')]))
+        for rel in relationships.get('assessment_intervention_connections', []):
+            mentions['assessments'].update(filter(None, [rel.get('assessment_name')]))
+            mentions['interventions'].update(filter(None, [rel.get('intervention_name')]))
+
+        for assessment in file_data.get('assessments', {}).get('assessments', []):
+            mentions['constructs'].update(filter(None, assessment.get('constructs_measured', [])))
+        for intervention in file_data.get('interventions', {}).get('interventions', []):
+            mentions['constructs'].update(filter(None, intervention.get('constructs_targeted', [])))
+
+        tech_metrics = file_data.get('ontology_guided_data', {}).get('technologies_metrics', {})
+        for tech in tech_metrics.get('technologies', []):
+            mentions['assessments'].update(filter(None, tech.get('used_for_assessments', [])))
+        for metric in tech_metrics.get('metrics', []):
+            mentions['assessments'].update(filter(None, [metric.get('assessment_source')]))
+    return mentions
+
+
+class _UnionFind:
+    def __init__(self, items: Iterable[str]):
+        self.parent = {item: item for item in items}
+
+    def find(self, item: str) -> str:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: str, b: str):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def identity_signature(tokens: List[str]) -> str:
+    """What two names must share to be the same entity at all: their numbers and word initials
+
+    Keeps near-identical strings such as "HDL Cholesterol" / "LDL Cholesterol" or "5-Year Risk" /
+    "10-Year Risk" apart, however similar they look character by character.
+    """
+    return "".join(token[0] for token in tokens) + "#" + ",".join(_DIGITS.findall(" ".join(tokens)))
+
+
+def near_identical(a: List[str], b: List[str], threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> bool:
+    """Whether two names' tokens match except for one token spelled almost the same way
+
+    Comparing whole keys let one changed word through ("sleepquantityassessment" /
+    "sleepqualityassessment"); token by token, "Sleep Quantity Assessment" and "Sleep Quality
+    Assessment" stay apart while "Sleep Quality Assesment" still joins them.
+    """
+    if len(a) != len(b):
+        return False
+    differing = [(x, y) for x, y in zip(a, b) if x != y]
+    if len(differing) != 1:
+        return not differing
+    matcher = SequenceMatcher(None, *differing[0])
+    return (matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold
+            and matcher.ratio() >= threshold)
+
+
+def blocks(keys: Dict[str, List[str]]) -> List[List[str]]:
+    """Candidate groups of distinct keys: keys with the same identity signature that also share
+    a token, or the first four characters of the key"""
+    index: Dict[Tuple[str, str], List[str]] = {}
+    for key, tokens in keys.items():
+        signature = identity_signature(tokens)
+        for block_key in set(token for token in tokens if len(token) > 2) | {"^" + key[:4]}:
+            index.setdefault((signature, block_key), []).append(key)
+    return [block for block in index.values() if 1 < len(block) <= MAX_BLOCK_SIZE]
+
+
+def load_embedder(model_name: Optional[str]):
+    """A sentence-transformers model run locally, or None if none is configured or the package is missing"""
+    if not model_name:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print("Note: sentence-transformers not available, canonicalising with fuzzy matching only.")
+        return None
+    return SentenceTransformer(model_name)
+
+
+def resolve_type(names: Counter, threshold: float = DEFAULT_SIMILARITY_THRESHOLD, embedder=None,
+                 embedding_threshold: float = DEFAULT_EMBEDDING_THRESHOLD) -> Tuple[Dict[str, Dict], Dict[str, str], int]:
+    """Cluster one entity type's surface names into canonical entities
+
+    Names first collapse on their canonical key; distinct keys are then only compared within
+    blocks (same identity signature and a shared token or key prefix), so the work grows with block
+    sizes rather than with the square of the names. Compared keys merge when near_identical.
+    Returns the entities by canonical ID, the surface name -> ID mapping and the comparisons made.
+    """
+    by_key: Dict[str, List[str]] = {}
+    for name in names:
+        by_key.setdefault(canonical_key(name), []).append(name)
+    keys = {key: name_tokens(surfaces[0]) for key, surfaces in by_key.items()}
+
+    vectors = {}
+    if embedder is not None and keys:
+        key_list = list(keys)
+        embedded = embedder.encode([" ".join(keys[key]) for key in key_list], normalize_embeddings=True)
+        vectors = dict(zip(key_list, embedded))
+
+    groups = _UnionFind(keys)
+    comparisons = 0
+    for block in blocks(keys):
+        for i, a in enumerate(block):
+            for b in block[i + 1:]:
+                if groups.find(a) == groups.find(b):
+                    continue
+                comparisons += 1
+                similar = near_identical(keys[a], keys[b], threshold)
+                if not similar and vectors:
+                    similar = float(vectors[a] @ vectors[b]) >= embedding_threshold
+                if similar:
+                    groups.union(a, b)
+
+    clusters: Dict[str, List[str]] = {}
+    for key in keys:
+        clusters.setdefault(groups.find(key), []).extend(by_key[key])
+
+    entities, mapping = {}, {}
+    for surfaces in clusters.values():
+        # The most frequent surface form names the entity (ties go to the shorter, then alphabetical, name)
+        surfaces.sort(key=lambda name: (-names[name], len(name), name))
+        canonical_id = "-".join(name_tokens(surfaces[0])) or canonical_key(surfaces[0])
+        entities[canonical_id] = {
+            "name": surfaces[0],
+            "aliases": surfaces[1:],
+            "mentions": sum(names[name] for name in surfaces)
+        }
+        mapping.update({name: canonical_id for name in surfaces})
+    return entities, mapping, comparisons
+
+
+def build_canonical_map(data: Dict, threshold: Optional[float] = None, embedding_model: Optional[str] = None) -> Dict:
+    """Canonical entities and the surface name -> canonical ID mapping per entity type, with per-type counts
+
+    The thresholds and the local embedding model default to EXTRACTION_CANONICAL_THRESHOLD and
+    EXTRACTION_CANONICAL_EMBEDDINGS (a sentence-transformers model name; unset uses fuzzy matching only).
+    """
+    settings = canonical_settings(threshold, embedding_model)
+    embedder = load_embedder(settings["embedding_model"])
+    canonical = {"settings": settings, "entities": {}, "mapping": {}, "stats": {}}
+    for entity_type, names in collect_mentions(data).items():
+        entities, mapping, comparisons = resolve_type(names, settings["threshold"], embedder)
+        canonical["entities"][entity_type] = entities
+        canonical["mapping"][entity_type] = mapping
+        canonical["stats"][entity_type] = {
+            "mentions": sum(names.values()),
+            "names": len(names),
+            "canonical": len(entities),
+            "comparisons": comparisons
+        }
+    return canonical
+
+
+def canonical_settings(threshold: Optional[float] = None, embedding_model: Optional[str] = None) -> Dict:
+    """The settings a mapping is built with (a saved mapping built with other settings is rebuilt)"""
+    if threshold is None:
+        threshold = float(os.getenv('EXTRACTION_CANONICAL_THRESHOLD', str(DEFAULT_SIMILARITY_THRESHOLD)))
+    if embedding_model is None:
+        embedding_model = os.getenv('EXTRACTION_CANONICAL_EMBEDDINGS') or None
+    return {"threshold": threshold, "embedding_model": embedding_model}
+
+
+def canonical_names(canonical: Optional[Dict], entity_type: str) -> Dict[str, str]:
+    """Surface name -> canonical name for one entity type (empty without a mapping)"""
+    if not canonical:
+        return {}
+    entities = canonical["entities"].get(entity_type, {})
+    return {name: entities[cid]["name"] for name, cid in canonical["mapping"].get(entity_type, {}).items()}
+
+
+def canonical_path(source: Path) -> Path:
+    """Where the mapping for a results source lives (next to it)"""
+    return source.parent / CANONICAL_FILE
+
+
+def read_canonical_map(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            canonical = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return canonical if canonical.get("version") == CANONICAL_VERSION else None
+
+
+def refresh_canonical_map(source: Path, signature: Dict, load_data, threshold: Optional[float] = None,
+                          embedding_model: Optional[str] = None) -> Dict:
+    """The mapping for a results source, rebuilt and saved only when the results or the settings changed
+
+    `signature` is the source's content signature and `load_data` loads the results if a rebuild is needed.
+    """
+    path = canonical_path(source)
+    canonical = read_canonical_map(path)
+    settings = canonical_settings(threshold, embedding_model)
+    if (canonical and canonical["settings"] == settings
+            and canonical["source"].get("sha256") == signature.get("sha256")):
+        return canonical
+
+    canonical = dict(build_canonical_map(load_data(), settings["threshold"], settings["embedding_model"]),
+                     version=CANONICAL_VERSION, source=signature)
+    write_json_atomic(path, canonical, ensure_ascii=False)
+    return canonical
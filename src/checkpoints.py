@@ -0,0 +1,50 @@
+# src/checkpoints.py
+"""
+Per-transcript pass checkpoints
+Each completed pass is saved as it finishes, so a failed transcript resumes from the first missing pass
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict
+
+from src.atomic_io import write_json_atomic
+
+DEFAULT_CHECKPOINT_DIR = "data/outputs/checkpoints"
+
+
+class PassCheckpoint:
+    """Completed pass outputs for one transcript, stored as <content hash>.json"""
+
+    def __init__(self, fingerprint: Dict, checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR):
+        self.fingerprint = fingerprint
+        self.path = Path(checkpoint_dir) / f"{fingerprint['content_hash']}.json"
+        self.passes = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    saved = json.load(f)
+                # Outputs from another extractor or prompt version can't be reused
+                if saved.get("fingerprint") == fingerprint:
+                    self.passes = saved.get("passes", {})
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable checkpoint {self.path.name}: {e}")
+
+    def save(self, name: str, output: Dict):
+        """Record a finished pass; outputs that failed to parse are left out so they run again"""
+        if not isinstance(output, dict) or "error" in output:
+            return
+
+        with self._lock:
+            self.passes[name] = output
+            write_json_atomic(self.path, {"fingerprint": self.fingerprint, "passes": self.passes})
+
+    def clear(self):
+        """Remove the checkpoint once the transcript's result has been stored"""
+        with self._lock:
+            self.passes = {}
+            if self.path.exists():
+                self.path.unlink()
@@ -0,0 +1,180 @@
+# src/chunking.py
+"""
+Token-aware transcript chunking for oversized interviews
+Splits on speaker turns and timestamp/section boundaries with overlap, and merges per-chunk pass outputs
+"""
+
+import json
+import re
+from typing import Dict, List, Optional
+
+from src.token_counter import count_tokens
+
+# Transcripts above this many (estimated) tokens are split; 0 disables chunking
+DEFAULT_CHUNK_TOKENS = 16000
+# Tokens of trailing context repeated at the start of the next chunk
+DEFAULT_OVERLAP_TOKENS = 500
+
+# A line that starts a new segment: a Gemini timestamp line ("00:01:47"), an inline timestamp
+# ("[00:01:00] ..."), or a speaker turn ("Dr. Naomi Myhill: ...", "INTERVIEWER: ...")
+_BOUNDARY = re.compile(
+    r"^\s*(?:\d{1,2}:\d{2}:\d{2}\s*$"
+    r"|\[\d{1,2}:\d{2}:\d{2}\]"
+    r"|[A-Z][\w.'\-]*(?: [A-Z][\w.'\-]*){0,3}:\s)"
+)
+_INLINE_TIMESTAMP = re.compile(r"(?=\[\d{1,2}:\d{2}:\d{2}\])")
+_SENTENCE = re.compile(r".+?(?:[.!?]\s+|\Z)", re.DOTALL)  # Each sentence keeps its trailing whitespace
+
+
+def split_segments(transcript: str) -> List[str]:
+    """Break a transcript into speaker turns / timestamped sections, keeping every character"""
+    segments, current = [], []
+    for line in transcript.splitlines(keepends=True):
+        if current and _BOUNDARY.match(line):
+            segments.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        segments.append("".join(current))
+    return segments
+
+
+def _split_long_segment(segment: str, max_tokens: int) -> List[str]:
+    """Break up an overlong turn at inline timestamps, then sentence boundaries, then hard cuts
+
+    The pieces concatenate back to exactly `segment`, as chunks are joined without separators.
+    """
+    pieces, current = [], ""
+    for sentence in (s for part in _INLINE_TIMESTAMP.split(segment) for s in _SENTENCE.findall(part)):
+        if current and count_tokens(sentence) > max_tokens:
+            pieces.append(current)
+            current = ""
+        while count_tokens(sentence) > max_tokens:
+            cut = max_tokens * 4
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        if current and count_tokens(current + sentence) > max_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current += sentence
+    if current:
+        pieces.append(current)
+    assert "".join(pieces) == segment
+    return pieces
+
+
+def chunk_transcript(transcript: str, max_tokens: int = DEFAULT_CHUNK_TOKENS,
+                     overlap_tokens: int = DEFAULT_OVERLAP_TOKENS) -> List[str]:
+    """Split a transcript into chunks of at most ~max_tokens, each starting with ~overlap_tokens of the previous one
+
+    Chunks are balanced in size, since a chunked pass takes as long as its longest chunk.
+    Returns [transcript] unchanged when it fits in one chunk (or max_tokens is 0).
+    """
+    total_tokens = count_tokens(transcript)
+    if not max_tokens or total_tokens <= max_tokens:
+        return [transcript]
+
+    overlap_tokens = min(overlap_tokens, max_tokens // 4)
+    body_tokens = max_tokens - overlap_tokens
+    target_tokens = -(-total_tokens // -(-total_tokens // body_tokens))  # Even split over the fewest chunks
+
+    # Keep segments small relative to a chunk so chunks can be packed evenly
+    piece_tokens = max(1, body_tokens // 8)
+    segments = []
+    for segment in split_segments(transcript):
+        if count_tokens(segment) > piece_tokens:
+            segments.extend(_split_long_segment(segment, piece_tokens))
+        else:
+            segments.append(segment)
+
+    # Each chunk is (carried overlap segments, new segments)
+    chunks, carried, current, current_tokens = [], [], [], 0
+    for segment in segments:
+        tokens = count_tokens(segment)
+        if current and (current_tokens + tokens > body_tokens or current_tokens + tokens / 2 > target_tokens):
+            chunks.append((carried, current))
+            # Carry whole trailing segments forward as overlap
+            carried, carried_tokens = [], 0
+            for previous in reversed(current):
+                if carried_tokens + count_tokens(previous) > overlap_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += count_tokens(previous)
+            current, current_tokens = [], carried_tokens
+        current.append(segment)
+        current_tokens += tokens
+    if current:
+        # A short remainder joins the previous chunk rather than costing a call of its own
+        if chunks and sum(count_tokens(s) for s in chunks[-1][0] + chunks[-1][1] + current) <= max_tokens:
+            previous_carried, previous_current = chunks.pop()
+            chunks.append((previous_carried, previous_current + current))
+        else:
+            chunks.append((carried, current))
+
+    return ["".join(overlap + body) for overlap, body in chunks]
+
+
+def _normalise(value) -> str:
+    return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+
+def _identity(item) -> str:
+    """Dedup key for a list item: its name fields (e.g. construct_name, source/target), else its full content"""
+    if isinstance(item, dict):
+        keys = sorted(k for k in item if k.endswith("_name") or k.startswith(("source_", "target_")))
+        names = [_normalise(item[k]) for k in keys if isinstance(item[k], str) and item[k].strip()]
+        if names:
+            return "|".join(names)
+        return json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return _normalise(item) if isinstance(item, str) else json.dumps(item, sort_keys=True)
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _merge_values(first, second):
+    if isinstance(first, list) and isinstance(second, list):
+        return _merge_lists(first, second)
+    if isinstance(first, dict) and isinstance(second, dict):
+        merged = dict(first)
+        for key, value in second.items():
+            merged[key] = value if _is_empty(merged.get(key)) else _merge_values(merged[key], value)
+        return merged
+    return second if _is_empty(first) else first
+
+
+def _merge_lists(first: List, second: List) -> List:
+    """Concatenate two entity lists, merging items with the same name (later chunks only fill gaps)"""
+    merged = list(first)
+    positions = {_identity(item): i for i, item in enumerate(merged)}
+    for item in second:
+        key = _identity(item)
+        if key in positions:
+            merged[positions[key]] = _merge_values(merged[positions[key]], item)
+        else:
+            positions[key] = len(merged)
+            merged.append(item)
+    return merged
+
+
+def merge_chunk_outputs(outputs: List[Optional[Dict]]) -> Dict:
+    """Merge one pass's per-chunk JSON outputs into a single output with name-based deduplication
+
+    If any chunk failed to parse, the merged output keeps an "error" so the pass is not checkpointed
+    and runs again (chunks that did parse are then answered from the response cache).
+    """
+    merged, errors = {}, []
+    for i, output in enumerate(outputs, 1):
+        if not isinstance(output, dict):
+            continue
+        output = dict(output)
+        if "error" in output:
+            errors.append(f"chunk {i}: {output.pop('error')}")
+            output.pop("raw_response", None)
+        merged = _merge_values(merged, output)
+
+    if errors:
+        merged["error"] = "; ".join(errors)
+    return merged
@@ -0,0 +1,202 @@
+# src/entity_catalog.py
+"""
+Precomputed entity catalog for the explorer app
+Every domain, construct, assessment, intervention, technology and metric across all results, with the files each came from
+Entities are merged under their canonical names, so spelling variants across transcripts become one entry
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.atomic_io import write_json_atomic
+from src.canonicalisation import canonical_names, canonical_settings, refresh_canonical_map
+from src.results_store import DEFAULT_STORE_DIR, LEGACY_RESULTS_FILE, ResultsStore, load_results
+
+CATALOG_FILE = "entity_catalog.json"
+
+# Bump when the catalog layout changes so stale catalogs are rebuilt
+CATALOG_VERSION = 2
+
+ENTITY_TYPES = ["domains", "constructs", "assessments", "interventions", "technologies", "metrics"]
+
+
+def results_source(store_dir: str = DEFAULT_STORE_DIR, legacy_path: str = LEGACY_RESULTS_FILE) -> Optional[Path]:
+    """The file whose changes invalidate the catalog: the store's manifest, else extraction_results.json"""
+    store = ResultsStore(store_dir)
+    if store.exists():
+        return store.manifest_path
+    if Path(legacy_path).exists():
+        return Path(legacy_path)
+    return None
+
+
+def catalog_path(source: Path) -> Path:
+    """Where the catalog for a results source lives (next to it)"""
+    return source.parent / CATALOG_FILE
+
+
+def source_signature(source: Path, with_hash: bool = True) -> Dict:
+    """mtime and size of a results source, plus its content hash unless only the cheap check is wanted"""
+    stat = os.stat(source)
+    signature = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    if with_hash:
+        with open(source, 'rb') as f:
+            signature["sha256"] = hashlib.sha256(f.read()).hexdigest()
+    return signature
+
+
+def _add(entities: Dict, name: str, file_name: str, fields: Dict, names: Dict[str, str]) -> Dict:
+    """The entry for a name's canonical form (created with fields on first sight), with this file and
+    any other spelling of the name added to its back-references"""
+    canonical = names.get(name, name)
+    entry = entities.setdefault(canonical, dict(fields, files=[], aliases=[]))
+    entry["files"].append(file_name)
+    if name != canonical and name not in entry["aliases"]:
+        entry["aliases"].append(name)
+    return entry
+
+
+def build_catalog(data: Dict, canonical: Optional[Dict] = None) -> Dict:
+    """Entities by type and (canonical) name, each with the files it was found in, plus lookup indexes"""
+    entities = {entity_type: {} for entity_type in ENTITY_TYPES}
+    names = {entity_type: canonical_names(canonical, entity_type) for entity_type in ENTITY_TYPES}
+
+    def rename(entity_type: str, values: List[str]) -> List[str]:
+        return list(dict.fromkeys(names[entity_type].get(value, value) for value in values))
+
+    for file_data in data.get('processed_files', []):
+        if 'error' in file_data:
+            continue
+        file_name = file_data.get('file_name', 'Unknown')
+
+        domains_constructs = file_data.get('domains_constructs', {})
+        for domain in domains_constructs.get('practitioner_domains', []):
+            if domain.get('domain_name'):
+                entry = _add(entities['domains'], domain['domain_name'], file_name, {
+                    'description': domain.get('domain_description', ''),
+                    'specialization_notes': []
+                }, names['domains'])
+                entry['specialization_notes'].append(domain.get('specialization_notes', ''))
+
+        for construct in domains_constructs.get('constructs_mentioned', []):
+            if construct.get('construct_name'):
+                entry = _add(entities['constructs'], construct['construct_name'], file_name, {
+                    'description': construct.get('construct_description', ''),
+                    'domain_association': names['domains'].get(construct.get('domain_association', ''),
+                                                               construct.get('domain_association', '')),
+                    'assessment_contexts': []
+                }, names['constructs'])
+                entry['assessment_contexts'].append(construct.get('assessment_context', ''))
+
+        for assessment in file_data.get('assessments', {}).get('assessments', []):
+            if assessment.get('assessment_name'):
+                _add(entities['assessments'], assessment['assessment_name'], file_name, {
+                    'description': assessment.get('assessment_description', ''),
+                    'modality': assessment.get('modality', ''),
+                    'constructs_measured': rename('constructs', assessment.get('constructs_measured', [])),
+                    'technologies': [],
+                    'metrics': []
+                }, names['assessments'])
+
+        for intervention in file_data.get('interventions', {}).get('interventions', []):
+            if intervention.get('intervention_name'):
+                _add(entities['interventions'], intervention['intervention_name'], file_name, {
+                    'description': intervention.get('intervention_description', ''),
+                    'purpose': intervention.get('purpose', ''),
+                    'constructs_targeted': rename('constructs', intervention.get('constructs_targeted', [])),
+                    'intervention_types': intervention.get('intervention_types', [])
+                }, names['interventions'])
+
+        tech_metrics = file_data.get('ontology_guided_data', {}).get('technologies_metrics', {})
+        for tech in tech_metrics.get('technologies', []):
+            if tech.get('technology_name'):
+                _add(entities['technologies'], tech['technology_name'], file_name, {
+                    'type': tech.get('technology_type', ''),
+                    'equipment': tech.get('specific_model', ''),
+                    'used_in_assessments': rename('assessments', tech.get('used_for_assessments', []))
+                }, names['technologies'])
+
+        for metric in tech_metrics.get('metrics', []):
+            if metric.get('metric_name'):
+                _add(entities['metrics'], metric['metric_name'], file_name, {
+                    'unit': metric.get('measurement_unit', ''),
+                    'reference_ranges': metric.get('normal_ranges', ''),
+                    'validity_confidence': metric.get('interpretation_notes', ''),
+                    'used_in_assessments': rename('assessments', [metric.get('assessment_source', '')])
+                }, names['metrics'])
+
+    return dict(entities, index=build_index(entities))
+
+
+def build_index(entities: Dict) -> Dict:
+    """Lookups the explorer filters by: entities per file, constructs per domain, assessments per modality"""
+    by_file: Dict[str, Dict[str, List[str]]] = {}
+    for entity_type in ENTITY_TYPES:
+        for name, entry in entities[entity_type].items():
+            for file_name in dict.fromkeys(entry['files']):
+                by_file.setdefault(file_name, {}).setdefault(entity_type, []).append(name)
+
+    def group(entity_type: str, field: str) -> Dict[str, List[str]]:
+        groups = {}
+        for name, entry in entities[entity_type].items():
+            if entry[field]:
+                groups.setdefault(entry[field], []).append(name)
+        return groups
+
+    return {
+        "by_file": by_file,
+        "constructs_by_domain": group('constructs', 'domain_association'),
+        "assessments_by_modality": group('assessments', 'modality')
+    }
+
+
+def _read_catalog(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return catalog if catalog.get("version") == CATALOG_VERSION else None
+
+
+def refresh_catalog(store_dir: str = DEFAULT_STORE_DIR, legacy_path: str = LEGACY_RESULTS_FILE) -> Optional[Dict]:
+    """The catalog for the current results, rebuilt and saved only when the results have changed
+
+    A matching mtime and size is trusted as is; otherwise the content hash decides, so a results
+    file that was merely touched or rewritten unchanged doesn't cost a rebuild. The canonical-name
+    mapping saved next to the results is refreshed the same way. None if there are no results.
+    """
+    source = results_source(store_dir, legacy_path)
+    if source is None:
+        return None
+    path = catalog_path(source)
+    catalog = _read_catalog(path)
+    settings = canonical_settings()
+    if catalog and catalog.get("canonical") != settings:
+        catalog = None
+
+    signature = source_signature(source, with_hash=False)
+    if catalog and all(catalog["source"].get(key) == value for key, value in signature.items()):
+        return catalog
+
+    loaded = []
+
+    def load_data() -> Dict:
+        if not loaded:
+            loaded.append(load_results(store_dir, legacy_path) or {})
+        return loaded[0]
+
+    signature = source_signature(source)
+    canonical = refresh_canonical_map(source, signature, load_data)
+    if catalog and catalog["source"].get("sha256") == signature["sha256"]:
+        catalog["source"] = signature
+    else:
+        catalog = dict(build_catalog(load_data(), canonical),
+                       version=CATALOG_VERSION, source=signature, canonical=settings)
+    write_json_atomic(path, catalog, ensure_ascii=False)
+    return catalog
@@ -5,12 +5,17 @@ Integrates with improved centralized prompts system
 """
 
 import anthropic
+import hashlib
 import json
+import math
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import ContextVar, copy_context
 
 # Add project root to Python path for imports
 project_root = Path(__file__).parent.parent
@@ -22,13 +27,123 @@ try:
 except ImportError:
     print("Note: python-dotenv not available. Make sure to set ANTHROPIC_API_KEY manually.")
 
-from src.prompts import OntologyPrompts, ExtractionPrompts  # Import both for compatibility
+from src.prompts import OntologyPrompts, ExtractionPrompts, PROMPT_VERSION  # Import both for compatibility
+from src.pass_graph import ExtractionPass, current_pass, run_pass_graph
+from src.checkpoints import DEFAULT_CHECKPOINT_DIR, PassCheckpoint
+from src.models import DEFAULT_MODEL, DEFAULT_ROUTES, LIGHT_MODEL, model_info, parse_routes, resolve_model
+from src.entity_catalog import ENTITY_TYPES, refresh_catalog
+from src.graph_store import open_graph_store
+from src.chunking import chunk_transcript, merge_chunk_outputs, DEFAULT_CHUNK_TOKENS, DEFAULT_OVERLAP_TOKENS
+from src.output_schemas import (
+    ASSESSMENTS,
+    ASSESSMENTS_DETAILED,
+    ASSESSMENTS_STANDARD,
+    CONSTRUCTS_DETAILED,
+    CONTEXTUAL_FACTORS,
+    DOMAINS_CONSTRUCTS,
+    GOALS_CONSTRAINTS,
+    INTERVENTIONS,
+    INTERVENTIONS_DETAILED,
+    INTERVENTIONS_STANDARD,
+    KNOWLEDGE_MAP,
+    PROTOCOLS,
+    RELATIONSHIPS,
+    RELATIONSHIPS_ROBUST,
+    RELATIONSHIPS_STANDARD,
+    TECHNOLOGIES_METRICS,
+    VALIDATION,
+    VALIDATION_ROBUST,
+    merge_schemas,
+    schema_problems,
+    schema_tool,
+    split_output,
+)
+from src.preprocessing import PREPROCESSING_VERSION, preprocess_with_stats
+from src.rate_limiter import RateLimiter, DEFAULT_MAX_RETRIES
+from src.response_cache import ResponseCache, DEFAULT_CACHE_PATH, DEFAULT_MAX_MB
+from src.results_store import ResultsStore
+from src.streaming import IncrementalJSONParser, StreamMonitor, delta_text
+from src.token_counter import count_prompt_tokens, count_tokens
+from src.usage import CACHE_READ_COST, CACHE_WRITE_COST, UsageLedger
 from config.ontology_schema import ONTOLOGY_SCHEMA
 
+# Request settings shared by every pass (also part of the response cache key); the model can be
+# routed per pass (see BaseOntologyExtractor.model_for)
+MODEL = DEFAULT_MODEL
+TEMPERATURE = 0.1
+
+# A prompt is plain text or a list of content blocks (see OntologyPrompts.cached_prompt)
+Prompt = Union[str, List[Dict]]
+
+
+# Sent with every tool request: the prompt cache drops its cached messages (the transcript prefix)
+# whenever tool_choice changes, so the pass's tool is named in the uncached instructions instead
+TOOL_CHOICE = {"type": "any"}
+
+
+def tool_prompt(prompt: Prompt, tool: Dict) -> List[Dict]:
+    """The prompt with an instruction to reply through the pass's tool, after any cached blocks"""
+    blocks = [{"type": "text", "text": prompt}] if isinstance(prompt, str) else list(prompt)
+    return blocks + [{"type": "text", "text": f"Reply by calling the {tool['name']} tool."}]
+
+
+def called_tool(message) -> Optional[str]:
+    """Name of the tool the reply called, if any"""
+    for block in message.content:
+        if getattr(block, "type", None) == "tool_use":
+            return block.name
+    return None
+
+
+def reply_text(message) -> str:
+    """The reply as JSON text: a forced tool call's input, else the first text block"""
+    for block in message.content:
+        if getattr(block, "type", None) == "tool_use":
+            return json.dumps(block.input, ensure_ascii=False)
+    return message.content[0].text if message.content else ""
+
+
+def continuation_prefill(message, text: str) -> str:
+    """The truncated reply as an assistant prefill to continue from
+
+    A cut-off tool call's input arrives partially parsed, so it is re-serialised with its trailing
+    closing brackets dropped; the continuation then carries on as plain JSON text.
+    """
+    for block in message.content:
+        if getattr(block, "type", None) == "tool_use":
+            return json.dumps(block.input, ensure_ascii=False).rstrip("]} \n")
+    return text.rstrip()
+
+# Tool input schemas for the fused extractor's two calls
+FUSED_ENTITIES = merge_schemas(DOMAINS_CONSTRUCTS, ASSESSMENTS, TECHNOLOGIES_METRICS, INTERVENTIONS, GOALS_CONSTRAINTS)
+FUSED_LINKS = merge_schemas(RELATIONSHIPS, PROTOCOLS)
+
+# Default number of transcripts processed concurrently by process_transcript_folder
+DEFAULT_MAX_WORKERS = 4
+
+# Pass max_tokens are sized for prompts of about this many tokens and scale up for longer ones,
+# to at most DEFAULT_MAX_OUTPUT_TOKENS
+BUDGET_REFERENCE_TOKENS = 8000
+DEFAULT_MAX_OUTPUT_TOKENS = 16000
+
+# Follow-up requests allowed for a reply cut off at max_tokens
+DEFAULT_MAX_CONTINUATIONS = 2
+
+# Progress prefix (e.g. "[3/19] ") for the transcript handled by the current worker
+_progress_prefix: ContextVar[str] = ContextVar("progress_prefix", default="")
+
+# Name of the transcript the current worker is processing, so API usage can be attributed to it
+_current_file: ContextVar[str] = ContextVar("current_file", default="")
+
 class BaseOntologyExtractor:
     """Base class with shared functionality"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, max_workers: Optional[int] = None, use_response_cache: Optional[bool] = None,
+                 rate_limiter: Optional[RateLimiter] = None, streaming: Optional[bool] = None,
+                 chunk_tokens: Optional[int] = None, preprocess: Optional[bool] = None,
+                 structured_output: Optional[bool] = None, max_output_tokens: Optional[int] = None,
+                 max_continuations: Optional[int] = None, model: Optional[str] = None,
+                 light_model: Optional[str] = None, model_routes: Optional[Dict[str, str]] = None):
         # Get API key
         if api_key:
             self.api_key = api_key
@@ -38,31 +153,163 @@ class BaseOntologyExtractor:
         if not self.api_key:
             raise ValueError("API key required. Either pass it directly or set ANTHROPIC_API_KEY environment variable")
         
-        # Initialize Anthropic client
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Initialize Anthropic client (retries are handled here, paced by the shared rate limiter)
+        self.client = anthropic.Anthropic(api_key=self.api_key, max_retries=0)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = int(os.getenv('EXTRACTION_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+        
+        # Streamed replies are parsed as they arrive (enable with streaming=True or EXTRACTION_STREAMING=1)
+        self.streaming = streaming if streaming is not None else os.getenv('EXTRACTION_STREAMING', '0') == '1'
+        self.stream_stats = {
+            "streamed_requests": 0,
+            "output_tokens": 0,
+            "generation_s": 0.0,
+            "first_token_s": 0.0,
+            "truncated": 0
+        }
         self.ontology_schema = ONTOLOGY_SCHEMA
         self.prompts = OntologyPrompts()  # Use new improved prompts
         
-    def load_existing_results(self, output_dir: str = "data/outputs") -> Dict:
-        """Load existing extraction results if they exist"""
-        output_path = Path(output_dir)
-        results_file = output_path / "extraction_results.json"
+        # Concurrency for folder runs (overridable per call or via EXTRACTION_MAX_WORKERS)
+        self.max_workers = max_workers or int(os.getenv('EXTRACTION_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+        
+        # Transcripts longer than this many tokens run each pass over overlapping chunks (0 disables)
+        self.chunk_tokens = chunk_tokens if chunk_tokens is not None else int(os.getenv('EXTRACTION_CHUNK_TOKENS', DEFAULT_CHUNK_TOKENS))
+        self.chunk_overlap_tokens = int(os.getenv('EXTRACTION_CHUNK_OVERLAP_TOKENS', DEFAULT_OVERLAP_TOKENS))
+        
+        # Strip export boilerplate, timestamps and filler words before prompts are built
+        # (disable with preprocess=False or EXTRACTION_PREPROCESS=0)
+        self.preprocess = preprocess if preprocess is not None else os.getenv('EXTRACTION_PREPROCESS', '1') != '0'
+        
+        # Passes reply through a forced tool call with their output schema, and output that breaks the
+        # schema gets a repair request (disable with structured_output=False or EXTRACTION_STRUCTURED_OUTPUT=0)
+        if structured_output is None:
+            structured_output = os.getenv('EXTRACTION_STRUCTURED_OUTPUT', '1') != '0'
+        self.structured_output = structured_output
+        self.repair_stats = {"requested": 0, "repaired": 0}
+        # Pass name -> output schema, declared by each extractor (see output_tools)
+        self.output_schemas: Dict[str, Dict] = {}
+        
+        # Long prompts get proportionally larger output budgets up to max_output_tokens (0 keeps every
+        # pass at its base budget), and replies still cut off are continued rather than re-run
+        if max_output_tokens is None:
+            max_output_tokens = int(os.getenv('EXTRACTION_MAX_OUTPUT_TOKENS', DEFAULT_MAX_OUTPUT_TOKENS))
+        self.max_output_tokens = max_output_tokens
+        if max_continuations is None:
+            max_continuations = int(os.getenv('EXTRACTION_MAX_CONTINUATIONS', DEFAULT_MAX_CONTINUATIONS))
+        self.max_continuations = max_continuations
+        self.continuation_stats = {"truncated": 0, "continuations": 0, "unfinished": 0}
+        
+        # Which model each pass is sent to: DEFAULT_ROUTES, then EXTRACTION_MODEL_ROUTES
+        # ("pass=model,..."), then model_routes; a route may name a model or the "default"/"light" tier
+        self.model = model or os.getenv('EXTRACTION_MODEL', DEFAULT_MODEL)
+        self.light_model = light_model or os.getenv('EXTRACTION_LIGHT_MODEL', LIGHT_MODEL)
+        self.model_routes = dict(DEFAULT_ROUTES, **parse_routes(os.getenv('EXTRACTION_MODEL_ROUTES', '')),
+                                 **(model_routes or {}))
+        self._print_lock = threading.Lock()
+        
+        # (file, first file with the same content) for identical new files in a folder run: only the
+        # first is extracted, the others get a copy of its result (see _select_new_files)
+        self.duplicate_files: List[Tuple[Path, Path]] = []
+        
+        # Hit rate the pre-flight plan projected for this run, checked against the API's usage numbers
+        self.planned_cache_hit_rate: Optional[float] = None
+        
+        # Prompt-cache token counts for this run (see record_usage)
+        self.cache_stats = {
+            "requests": 0,
+            "cache_read_input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "uncached_input_tokens": 0,
+            "cache_hit_requests": 0,
+            "cache_hit_latency_s": 0.0,
+            "cache_miss_latency_s": 0.0
+        }
+        self._stats_lock = threading.Lock()
+        
+        # Every request this run makes, with its tokens, latency and stop reason (see src/usage.py)
+        self.usage = UsageLedger()
+        
+        # Per-transcript results (see src/results_store.py)
+        self.results_store = ResultsStore()
+        
+        # Where in-progress transcripts keep their finished passes (see src/checkpoints.py)
+        self.checkpoint_dir = DEFAULT_CHECKPOINT_DIR
+        
+        # On-disk cache of raw responses so unchanged passes are free on re-runs
+        # (bypass with use_response_cache=False or EXTRACTION_RESPONSE_CACHE=0)
+        if use_response_cache is None:
+            use_response_cache = os.getenv('EXTRACTION_RESPONSE_CACHE', '1') != '0'
+        self.response_cache = None
+        if use_response_cache:
+            self.response_cache = ResponseCache(
+                os.getenv('EXTRACTION_CACHE_PATH', DEFAULT_CACHE_PATH),
+                max_mb=float(os.getenv('EXTRACTION_CACHE_MAX_MB', DEFAULT_MAX_MB))
+            )
+        
+    def log(self, message: str):
+        """Print a progress line, prefixed with the current file so concurrent output stays readable"""
+        with self._print_lock:
+            print(f"{_progress_prefix.get()}{message}", flush=True)
+        
+    def migrate_legacy_results(self, output_dir: str = "data/outputs"):
+        """Import an old extraction_results.json into the results store the first time the store is used"""
+        if self.results_store.exists():
+            return
         
+        results_file = Path(output_dir) / "extraction_results.json"
         if results_file.exists():
             try:
-                with open(results_file, 'r') as f:
-                    existing_results = json.load(f)
-                print(f"📂 Loaded existing results with {len(existing_results.get('processed_files', []))} files")
-                return existing_results
+                imported = self.results_store.import_legacy(str(results_file))
+                print(f"📦 Moved {imported} existing results from {results_file} into {self.results_store.root}")
             except Exception as e:
-                print(f"⚠️ Failed to load existing results: {e}")
+                print(f"⚠️ Failed to import existing results: {e}")
+    
+    def load_existing_results(self, output_dir: str = "data/outputs") -> Optional[Dict]:
+        """Manifest entries and totals for the stored results, or None if there are none
+
+        Only the manifest is read; use results_store.get() or export_legacy() for the results themselves.
+        """
+        self.migrate_legacy_results(output_dir)
+        manifest = self.results_store.manifest()
+        if not manifest:
+            return None
+        print(f"📂 Loaded existing results with {len(manifest)} files")
+        return {"manifest": manifest, "summary": self.results_store.summary()}
+    
+    def folder_results(self, file_results: List[Dict]) -> Optional[Dict]:
+        """This run's results with totals for the whole store, counted from the manifest without reading records
+
+        None if nothing was processed and the store is empty.
+        """
+        if not file_results and not self.results_store.manifest():
+            return None
+        return {"processed_files": file_results, "summary": self.results_store.summary()}
+    
+    def save_file_result(self, file_result: Dict):
+        """Store one transcript's result as soon as it is done; an error never replaces a stored success
         
-        return None
+        The transcript's pass checkpoint is only dropped once the result is in the store's write-ahead
+        log, so a crash in between costs nothing.
+        """
+        api_calls = file_result.get('usage', {}).get('requests', 0)
+        if 'error' in file_result:
+            previous = self.results_store.entry(file_result['file_name'])
+            if previous is None or previous['status'] != 'ok':
+                self.results_store.put(file_result, api_calls=api_calls)
+            else:
+                self.results_store.add_api_calls(api_calls)
+            return
+        self.results_store.put(file_result, api_calls=api_calls, extraction_type=self.extraction_type)
+        if file_result.get('fingerprint'):
+            PassCheckpoint(file_result['fingerprint'], self.checkpoint_dir).clear()
     
 
     
     def get_processed_filenames(self, existing_results: Dict) -> set:
         """Get set of already processed filenames"""
+        if existing_results and 'manifest' in existing_results:
+            return {name for name, entry in existing_results['manifest'].items() if entry['status'] == 'ok'}
         if not existing_results or 'processed_files' not in existing_results:
             return set()
         
@@ -78,16 +325,14 @@ class BaseOntologyExtractor:
         if not existing_results:
             return new_results
         
-        # Create a map of existing results by filename
+        # Map results by filename; newer entries win, except that an error never replaces a success
+        # (errors are kept otherwise so failed files stay visible until they succeed)
         existing_map = {}
-        for file_result in existing_results.get('processed_files', []):
-            if 'error' not in file_result:
-                existing_map[file_result['file_name']] = file_result
-        
-        # Add new results, overwriting any duplicates
-        for file_result in new_results.get('processed_files', []):
-            if 'error' not in file_result:
-                existing_map[file_result['file_name']] = file_result
+        for file_result in existing_results.get('processed_files', []) + new_results.get('processed_files', []):
+            previous = existing_map.get(file_result['file_name'])
+            if 'error' in file_result and previous is not None and 'error' not in previous:
+                continue
+            existing_map[file_result['file_name']] = file_result
         
         # Rebuild the merged results
         merged_results = {
@@ -103,29 +348,339 @@ class BaseOntologyExtractor:
         
         return merged_results
         
-    def make_api_call(self, prompt: str, max_tokens: int = 4000) -> str:
-        """Make API call to Claude with error handling"""
-        try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=max_tokens,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.1
-            )
-            return response.content[0].text
-        except Exception as e:
-            print(f"❌ API call failed: {e}")
-            raise
+    def record_usage(self, usage, latency: float = 0.0):
+        """Accumulate prompt-cache hit/miss token counts and latency from a response's usage block"""
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        with self._stats_lock:
+            self.cache_stats["requests"] += 1
+            self.cache_stats["cache_read_input_tokens"] += cache_read
+            self.cache_stats["cache_creation_input_tokens"] += getattr(usage, "cache_creation_input_tokens", 0) or 0
+            self.cache_stats["uncached_input_tokens"] += getattr(usage, "input_tokens", 0) or 0
+            if cache_read:
+                self.cache_stats["cache_hit_requests"] += 1
+                self.cache_stats["cache_hit_latency_s"] += latency
+            else:
+                self.cache_stats["cache_miss_latency_s"] += latency
+    
+    def record_call(self, response=None, latency: float = 0.0, wait: float = 0.0, retries: int = 0,
+                    source: str = "api", error: Optional[Exception] = None, file_name: Optional[str] = None,
+                    pass_name: Optional[str] = None):
+        """Log one request in the usage ledger, attributed to the current transcript and pass unless given"""
+        self.usage.record(
+            file_name if file_name is not None else _current_file.get(),
+            pass_name if pass_name is not None else current_pass.get(),
+            getattr(response, "model", None) or self.model_for(pass_name),
+            usage=getattr(response, "usage", None),
+            latency=latency,
+            wait=wait,
+            stop_reason=getattr(response, "stop_reason", None),
+            retries=retries,
+            source=source,
+            error=error
+        )
+    
+    def prompt_cache_summary(self) -> Dict:
+        """Cache token counts plus hit rate and input-cost saving versus sending every prompt uncached"""
+        with self._stats_lock:
+            summary = dict(self.cache_stats)
+        
+        read = summary["cache_read_input_tokens"]
+        written = summary["cache_creation_input_tokens"]
+        total_input = read + written + summary["uncached_input_tokens"]
+        billed = summary["uncached_input_tokens"] + written * CACHE_WRITE_COST + read * CACHE_READ_COST
+        
+        summary["total_input_tokens"] = total_input
+        summary["cache_hit_rate"] = round(read / total_input, 3) if total_input else 0.0
+        summary["input_cost_saving_pct"] = round(100 * (1 - billed / total_input), 1) if total_input else 0.0
+        
+        # Mean request latency with and without a cache hit (a proxy for time to first token)
+        hits = summary["cache_hit_requests"]
+        misses = summary["requests"] - hits
+        hit_latency = summary.pop("cache_hit_latency_s")
+        miss_latency = summary.pop("cache_miss_latency_s")
+        summary["avg_latency_cache_hit_s"] = round(hit_latency / hits, 2) if hits else None
+        summary["avg_latency_cache_miss_s"] = round(miss_latency / misses, 2) if misses else None
+        return summary
+    
+    def response_cache_key(self, prompt: Prompt, max_tokens: int, tool: Optional[Dict] = None) -> str:
+        """Key identifying this request in the response cache"""
+        return ResponseCache.make_key(self.model_for(), prompt, max_tokens, TEMPERATURE, tool)
+    
+    def cached_response(self, prompt: Prompt, max_tokens: int, tool: Optional[Dict] = None) -> Optional[str]:
+        """Return a stored response for this exact request, if the response cache has one"""
+        if not self.response_cache:
+            return None
+        return self.response_cache.get(self.response_cache_key(prompt, max_tokens, tool))
+    
+    def store_response(self, prompt: Prompt, max_tokens: int, text: str, tool: Optional[Dict] = None):
+        """Save a fresh response to the response cache"""
+        if self.response_cache:
+            self.response_cache.put(self.response_cache_key(prompt, max_tokens, tool), text)
+    
+    def estimate_input_tokens(self, prompt: Prompt) -> int:
+        """Input size (counted offline) used to pace requests against the TPM limit
+        
+        Cached prefix blocks are left out: cache reads don't count towards the input-token limit,
+        and the remaining-tokens header corrects the bucket after the request that writes the cache.
+        """
+        return count_prompt_tokens(prompt)[1]
+    
+    def retry_wait(self, error: Exception, attempt: int, waited: float = 0.0) -> float:
+        """Backoff before the next attempt; re-raises (and logs the failed call) if it is not worth retrying"""
+        delay = self.rate_limiter.retry_delay(error, attempt, self.max_retries)
+        if delay is None:
+            self.log(f"❌ API call failed: {error}")
+            self.record_call(wait=waited, retries=attempt, error=error)
+            raise error
+        self.log(f"⏳ API call failed ({error.__class__.__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+    
+    def request_params(self, prompt: Prompt, max_tokens: int, tool: Optional[Dict] = None,
+                       prefill: Optional[str] = None) -> Dict:
+        """Messages API parameters for one pass; with a tool, the model must reply by calling it
+        
+        The model may call any tool (see TOOL_CHOICE) and is told which one in the prompt; check_tool
+        flags a reply through another. A prefill is sent as the start of the assistant's reply, for the
+        model to continue.
+        """
+        params = {
+            "model": self.model_for(),
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": tool_prompt(prompt, tool) if tool else prompt}],
+            "temperature": TEMPERATURE
+        }
+        if prefill:
+            params["messages"].append({"role": "assistant", "content": prefill})
+        if tool:
+            params["tools"] = self.output_tools()
+            params["tool_choice"] = TOOL_CHOICE
+        return params
+    
+    def check_tool(self, response, tool: Optional[Dict]):
+        """Log a reply made through another pass's tool (its output then fails the schema check and is repaired)"""
+        name = called_tool(response)
+        if tool and name and name != tool["name"]:
+            self.log(f"  ⚠️ Replied through {name} instead of {tool['name']}")
+    
+    def record_stream(self, stats: Dict):
+        """Accumulate throughput and truncation counts from a StreamMonitor"""
+        with self._stats_lock:
+            self.stream_stats["streamed_requests"] += 1
+            self.stream_stats["output_tokens"] += stats["output_tokens"]
+            self.stream_stats["generation_s"] += stats["generation_s"]
+            self.stream_stats["first_token_s"] += stats["first_token_s"]
+            self.stream_stats["truncated"] += stats["truncated"]
+    
+    def stream_summary(self) -> Dict:
+        """Streaming totals plus mean throughput and time to first token"""
+        with self._stats_lock:
+            summary = dict(self.stream_stats)
+        
+        requests = summary["streamed_requests"]
+        generation_s = summary.pop("generation_s")
+        first_token_s = summary.pop("first_token_s")
+        summary["tokens_per_second"] = round(summary["output_tokens"] / generation_s, 1) if generation_s else None
+        summary["avg_first_token_s"] = round(first_token_s / requests, 2) if requests else None
+        return summary
+    
+    def finish_stream(self, monitor: StreamMonitor, message):
+        """Record usage and stream statistics for a finished streamed reply"""
+        self.record_usage(message.usage, monitor.first_token_latency)
+        self.record_stream(monitor.finish(message))
+    
+    def _stream_request(self, prompt: Prompt, max_tokens: int, tool: Optional[Dict] = None,
+                        prefill: Optional[str] = None):
+        """Send one streamed request, feeding text to a StreamMonitor as it arrives"""
+        monitor = StreamMonitor(max_tokens, self.log, prefill or "")
+        with self.client.messages.stream(**self.request_params(prompt, max_tokens, tool, prefill)) as stream:
+            self.rate_limiter.update_from_headers(stream.response.headers)
+            for event in stream:
+                text = delta_text(event)
+                if text:
+                    monitor.on_text(text)
+            message = stream.get_final_message()
+        self.finish_stream(monitor, message)
+        return message
+    
+    def make_api_call(self, prompt: Prompt, max_tokens: int = 4000, tool: Optional[Dict] = None) -> str:
+        """Make API call to Claude, continuing the reply if it is cut off at max_tokens"""
+        cached = self.cached_response(prompt, max_tokens, tool)
+        if cached is not None:
+            self.record_call(source="response_cache")
+            return cached
+        
+        text = self.continue_truncated(prompt, max_tokens, self.send_request(prompt, max_tokens, tool))
+        self.store_response(prompt, max_tokens, text, tool)
+        return text
+    
+    def send_request(self, prompt: Prompt, max_tokens: int, tool: Optional[Dict] = None,
+                     prefill: Optional[str] = None):
+        """Send one request, paced by the rate limiter and retried with jittered backoff; returns the message"""
+        estimated_tokens = self.estimate_input_tokens(prompt)
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            delay = self.rate_limiter.reserve(estimated_tokens, max_tokens, retry=attempt > 0)
+            time.sleep(delay)
+            waited += delay
+            started = time.time()
+            try:
+                if self.streaming:
+                    response = self._stream_request(prompt, max_tokens, tool, prefill)
+                    break
+                
+                raw = self.client.messages.with_raw_response.create(
+                    **self.request_params(prompt, max_tokens, tool, prefill))
+                self.rate_limiter.update_from_headers(raw.headers)
+                response = raw.parse()
+                self.record_usage(response.usage, time.time() - started)
+                break
+            except Exception as e:
+                self.rate_limiter.release_output(max_tokens)  # A failed attempt produces no reply
+                delay = self.retry_wait(e, attempt, waited)
+                time.sleep(delay)
+                waited += delay
+        
+        self.rate_limiter.release_output(max_tokens - response.usage.output_tokens)
+        self.record_call(response, time.time() - started, waited, attempt)
+        self.check_tool(response, tool)
+        return response
+    
+    def continue_truncated(self, prompt: Prompt, max_tokens: int, response) -> str:
+        """The reply's JSON text, generation continued while it stops at max_tokens
+        
+        Each continuation resends the prompt with the reply so far as an assistant prefill and the
+        pieces are stitched together. Continuations are plain text, since a forced tool call can't
+        be prefilled.
+        """
+        text = reply_text(response)
+        for continuation in range(1, self.max_continuations + 1):
+            if response.stop_reason != "max_tokens":
+                return text
+            prefill = self.continuation_start(response, text, continuation, max_tokens)
+            response = self.send_request(prompt, max_tokens, prefill=prefill)
+            text = prefill + reply_text(response)
+        return self.continuation_end(response, text, max_tokens)
+    
+    def continuation_start(self, response, text: str, continuation: int, max_tokens: int) -> str:
+        """Log and count one continuation of a truncated reply, returning its prefill"""
+        with self._stats_lock:
+            self.continuation_stats["truncated"] += continuation == 1
+            self.continuation_stats["continuations"] += 1
+        self.log(f"  ✂️  Reply truncated at max_tokens ({max_tokens}), continuing "
+                 f"({continuation}/{self.max_continuations})")
+        return continuation_prefill(response, text)
+    
+    def continuation_end(self, response, text: str, max_tokens: int) -> str:
+        """Count a reply that is still truncated once its continuations are used up"""
+        if response.stop_reason == "max_tokens":
+            with self._stats_lock:
+                if not self.max_continuations:
+                    self.continuation_stats["truncated"] += 1
+                self.continuation_stats["unfinished"] += 1
+            self.log(f"  ✂️  Reply still truncated at max_tokens ({max_tokens}) after "
+                     f"{self.max_continuations} continuation(s)")
+        return text
+    
+    def output_budget(self, prompt: Prompt, max_tokens: int) -> int:
+        """A pass's max_tokens, scaled up in proportion to prompt length beyond BUDGET_REFERENCE_TOKENS
+        
+        Never more than the pass's model can produce.
+        """
+        scaled = max_tokens * sum(count_prompt_tokens(prompt)) / BUDGET_REFERENCE_TOKENS
+        budget = max(max_tokens, min(math.ceil(scaled / 500) * 500, self.max_output_tokens))
+        return min(budget, model_info(self.model_for())[2])
+    
+    def model_for(self, pass_name: Optional[str] = None) -> str:
+        """The model a pass is routed to (the current pass unless named)"""
+        if pass_name is None:
+            pass_name = current_pass.get()
+        return resolve_model(self.model_routes.get(pass_name), self.model, self.light_model)
+    
+    def run_prompt(self, prompt: Prompt, max_tokens: int = 4000, tool: Optional[Dict] = None) -> Dict:
+        """Run one extraction pass: send the prompt and parse the JSON reply
+        
+        Every pass method goes through here, so the async extractors only need to override
+        this method for all passes to become awaitable. Given a tool (see src/output_schemas.py),
+        the reply is the tool call's input rather than free text.
+        """
+        max_tokens = self.output_budget(prompt, max_tokens)
+        text = self.make_api_call(prompt, max_tokens=max_tokens, tool=tool)
+        result, problems = self.parse_output(text, tool)
+        if problems:
+            repair = self.repair_prompt(text, problems)
+            result = self.accept_repair(result, self.make_api_call(repair, max_tokens=max_tokens, tool=tool), tool)
+        return self.check_cached_parse(prompt, max_tokens, result, tool)
+    
+    def output_tools(self) -> List[Dict]:
+        """One tool per pass output schema, in a fixed order
+        
+        Every request sends this same list and the same tool_choice, with the pass's tool named in the
+        prompt: tools come first in the prompt, so a per-pass list would change the prefix and miss the
+        prompt cache on every pass.
+        """
+        return [schema_tool(f"record_{name}", f"Record the {name.replace('_', ' ')} extracted from the transcript", schema)
+                for name, schema in self.output_schemas.items()]
+    
+    def output_tool(self, name: str) -> Optional[Dict]:
+        """The forced tool a pass replies through (None when structured output is off)"""
+        if not self.structured_output:
+            return None
+        return next(tool for tool in self.output_tools() if tool["name"] == f"record_{name}")
+    
+    def parse_output(self, text: str, tool: Optional[Dict]) -> Tuple[Dict, List[str]]:
+        """Parse a reply and check it against the pass's schema: (result, problems worth a repair request)"""
+        result = self.safe_json_parse(text)
+        if not tool:
+            return result, []
+        if "error" in result:
+            return result, [result["error"]]
+        return result, schema_problems(result, tool["input_schema"])
+    
+    def repair_prompt(self, text: str, problems: List[str]) -> str:
+        """A repair request carrying only the broken output, not the transcript"""
+        with self._stats_lock:
+            self.repair_stats["requested"] += 1
+        self.log(f"  🩹 Output breaks its schema ({problems[0]}{', ...' if len(problems) > 1 else ''}), requesting a repair")
+        return self.prompts.repair_output(text, problems)
+    
+    def accept_repair(self, result: Dict, repair_text: str, tool: Dict) -> Dict:
+        """The repaired output if it now conforms, else the original result"""
+        repaired, problems = self.parse_output(repair_text, tool)
+        if problems:
+            self.log(f"  ⚠️ Repair still breaks the schema ({problems[0]}), keeping the original output")
+            return result
+        with self._stats_lock:
+            self.repair_stats["repaired"] += 1
+        return repaired
+    
+    def check_cached_parse(self, prompt: Prompt, max_tokens: int, result: Dict, tool: Optional[Dict] = None) -> Dict:
+        """Drop unparseable responses from the response cache so the next run asks again"""
+        if self.response_cache and result.get("error") == "JSON parsing failed":
+            self.response_cache.discard(self.response_cache_key(prompt, max_tokens, tool))
+        return result
+    
+    def entity_names(self, data: Dict, list_key: str, name_key: str) -> List[str]:
+        """Pull entity names (e.g. construct_name) out of a pass result, tolerating failed passes"""
+        if not data or list_key not in data:
+            return []
+        return [item.get(name_key, "") for item in data[list_key]]
     
     def safe_json_parse(self, text: str) -> Dict:
-        """Safely parse JSON response with fallback"""
+        """Safely parse JSON response with fallback
+        
+        When the reply is cut short (e.g. at max_tokens), the top-level fields that did complete are
+        kept alongside the error so dependent passes still get something to work with.
+        """
         try:
             cleaned_text = self.clean_response_text(text)
             return json.loads(cleaned_text)
         except json.JSONDecodeError as e:
-            print(f"⚠️ JSON parsing failed: {e}")
-            print(f"Response preview: {cleaned_text[:200]}...")
-            return {"error": "JSON parsing failed", "raw_response": text}
+            self.log(f"⚠️ JSON parsing failed: {e}")
+            self.log(f"Response preview: {cleaned_text[:200]}...")
+            salvaged = IncrementalJSONParser.salvage(text)
+            if salvaged:
+                self.log(f"🩹 Salvaged complete fields: {list(salvaged)}")
+            return dict(salvaged, error="JSON parsing failed", raw_response=text)
     
     def clean_response_text(self, text: str) -> str:
         """Enhanced JSON cleaning"""
@@ -154,126 +709,270 @@ class BaseOntologyExtractor:
         
         return text.strip()
     
-    def save_results(self, results: Dict, output_dir: str = "data/outputs"):
-        """Save results to files"""
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-        
-        # Save full results
-        with open(output_path / "extraction_results.json", "w") as f:
-            json.dump(results, f, indent=2)
+    def save_results(self, results: Dict, output_dir: str = "data/outputs", export_legacy: Optional[bool] = None):
+        """Finish saving a run's results
         
-        print(f"💾 Results saved to {output_path}")
-        return output_path
-
-class OntologyExtractor(BaseOntologyExtractor):
-    """Enhanced standard 4-pass extraction system with improved prompts"""
-    
-    def __init__(self, api_key=None):
-        super().__init__(api_key)
-        self.extraction_type = "Enhanced Standard (4-pass)"
-        print("✅ Enhanced Standard Extractor initialized successfully")
-        print("🔄 Using 4-pass extraction with improved prompts")
+        Each transcript's result is already in the results store by now, so this only empties the
+        write-ahead log, tidies the manifest, refreshes the canonical-name mapping, the explorer's entity
+        catalog and the ontology graph store and, if asked (or EXTRACTION_EXPORT_LEGACY=1), writes the old
+        extraction_results.json.
+        """
+        if export_legacy is None:
+            export_legacy = os.getenv('EXTRACTION_EXPORT_LEGACY', '0') == '1'
+        
+        self.results_store.checkpoint()
+        self.results_store.compact()
+        catalog = refresh_catalog(str(self.results_store.root))
+        if catalog:
+            counts = ", ".join(f"{len(catalog[t])} {t}" for t in ENTITY_TYPES)
+            merged = sum(len(entry['aliases']) for t in ENTITY_TYPES for entry in catalog[t].values())
+            print(f"🗂️  Entity catalog: {counts} ({merged} spelling variants merged)")
+        graph = open_graph_store(str(self.results_store.root))
+        if graph:
+            stats = graph.stats()
+            print(f"🕸️  Ontology graph: {stats['total_nodes']} nodes, {stats['total_edges']} edges ({graph.path})")
+            graph.close()
+        if export_legacy:
+            legacy_path = self.results_store.export_legacy(str(Path(output_dir) / "extraction_results.json"))
+            print(f"📤 Exported single-file results to {legacy_path}")
+        
+        print(f"💾 Results saved to {self.results_store.root}")
+        return self.results_store.root
     
-    def extract_domains_constructs(self, transcript: str) -> Dict:
-        """Extract domains and constructs using enhanced prompts"""
-        prompt = self.prompts.domains_constructs_standard(transcript)
-        response_text = self.make_api_call(prompt)
-        return self.safe_json_parse(response_text)
+    def read_transcript(self, file_path: Path) -> str:
+        """Read a transcript file"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
     
-    def extract_assessments(self, transcript: str, constructs: List[str]) -> Dict:
-        """Extract detailed assessment information using enhanced prompts"""
-        prompt = self.prompts.assessments_standard(transcript, constructs)
-        response_text = self.make_api_call(prompt)
-        return self.safe_json_parse(response_text)
+    def prepare_transcript(self, raw: str) -> Tuple[str, Optional[Dict]]:
+        """The transcript text the prompts are built from, plus before/after token counts if it was preprocessed"""
+        if not self.preprocess:
+            return raw, None
+        transcript, stats = preprocess_with_stats(raw)
+        self.log(f"  🧹 Preprocessed: ~{stats['tokens_before']:,} → ~{stats['tokens_after']:,} tokens "
+                 f"(-{stats['reduction_pct']}%)")
+        return transcript, stats
     
-    def extract_interventions(self, transcript: str, constructs: List[str]) -> Dict:
-        """Extract intervention information using enhanced prompts"""
-        prompt = self.prompts.interventions_standard(transcript, constructs)
-        response_text = self.make_api_call(prompt)
-        return self.safe_json_parse(response_text)
+    def build_pass_graph(self, transcript: str) -> List[ExtractionPass]:
+        """Declare this extractor's passes and their dependencies (implemented by each extractor)"""
+        raise NotImplementedError
     
-    def extract_relationships(self, transcript: str, all_entities: Dict) -> Dict:
-        """Extract construct relationships and dependencies"""
-        prompt = self.prompts.relationships_standard(transcript, all_entities)
-        response_text = self.make_api_call(prompt)
-        return self.safe_json_parse(response_text)
+    def build_result(self, file_path: Path, transcript: str, outputs: Dict[str, Dict]) -> Dict:
+        """Assemble the per-file result from pass outputs (implemented by each extractor)"""
+        raise NotImplementedError
     
-    def process_single_transcript(self, file_path: Path) -> Dict:
-        """Process a single transcript file using enhanced standard approach"""
-        print(f"📄 Processing: {file_path.name}")
+    def plan_pass_graph(self, transcript: str) -> List[ExtractionPass]:
+        """The pass graph for a transcript: as declared, or fanned out over chunks if the transcript is long
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            transcript = f.read()
-        
-        # 4-pass extraction with enhanced prompts
-        print("  📋 Extracting domains and constructs...")
-        domains_constructs = self.extract_domains_constructs(transcript)
-        
-        constructs_list = []
-        if "constructs_mentioned" in domains_constructs:
-            constructs_list = [c.get("construct_name", "") for c in domains_constructs["constructs_mentioned"]]
-        
-        print("  🧪 Extracting assessments...")
-        assessments = self.extract_assessments(transcript, constructs_list)
-        
-        print("  💊 Extracting interventions...")
-        interventions = self.extract_interventions(transcript, constructs_list)
-        
-        all_entities = {
-            "domains_constructs": domains_constructs,
-            "assessments": assessments,
-            "interventions": interventions
+        Each chunked pass runs its chunks side by side and merges their outputs (deduplicated by entity
+        name) before dependent passes see them, so a pass takes as long as its longest chunk.
+        """
+        chunks = chunk_transcript(transcript, self.chunk_tokens, self.chunk_overlap_tokens)
+        if len(chunks) == 1:
+            return self.build_pass_graph(transcript)
+        
+        self.log(f"  ✂️  ~{count_tokens(transcript):,} tokens: running passes over {len(chunks)} chunks "
+                 f"(~{max(count_tokens(c) for c in chunks):,} tokens max)")
+        chunk_graphs = [self.build_pass_graph(chunk) for chunk in chunks]
+        
+        def chunked(name: str):
+            chunk_passes = [p for graph in chunk_graphs for p in graph if p.name == name]
+            return lambda r: self.run_chunk_passes(chunk_passes, r)
+        
+        # Dependents need every chunk's output, so field-level early starts (needs) don't apply
+        return [
+            ExtractionPass(p.name, f"{p.label} [{len(chunks)} chunks]", chunked(p.name), depends_on=p.depends_on)
+            for p in chunk_graphs[0]
+        ]
+    
+    def run_chunk_passes(self, chunk_passes: List[ExtractionPass], inputs: Dict) -> Dict:
+        """Run one pass over every chunk concurrently and merge the outputs"""
+        with ThreadPoolExecutor(max_workers=len(chunk_passes)) as executor:
+            futures = [executor.submit(copy_context().run, p.run, inputs) for p in chunk_passes]
+            return merge_chunk_outputs([future.result() for future in futures])
+    
+    def fingerprint(self, transcript: str) -> Dict:
+        """Identify what a result was extracted from: transcript content, extractor, prompt version and
+        preprocessing rules (None when preprocessing is off)"""
+        return {
+            "content_hash": hashlib.sha256(transcript.encode('utf-8')).hexdigest(),
+            "extractor": self.extraction_type,
+            "prompt_version": PROMPT_VERSION,
+            "preprocessing": PREPROCESSING_VERSION if self.preprocess else None
         }
+    
+    def process_single_transcript(self, file_path: Path) -> Dict:
+        """Process a single transcript by running the extractor's pass graph"""
+        _current_file.set(file_path.name)
+        self.log(f"📄 Processing: {file_path.name}")
+        raw = self.read_transcript(file_path)
+        checkpoint = self.open_checkpoint(raw)
+        transcript, preprocessing = self.prepare_transcript(raw)
+        
+        # Independent passes overlap; each starts as soon as its inputs are ready
+        outputs = run_pass_graph(self.plan_pass_graph(transcript), log=self.log,
+                                 completed=checkpoint.passes, on_complete=checkpoint.save)
+        return self.finish_transcript(file_path, raw, outputs, checkpoint, preprocessing)
+    
+    def open_checkpoint(self, transcript: str) -> PassCheckpoint:
+        """Load this transcript's pass checkpoint, reporting any passes a previous attempt finished"""
+        checkpoint = PassCheckpoint(self.fingerprint(transcript), self.checkpoint_dir)
+        if checkpoint.passes:
+            self.log(f"  ↩️  Resuming from checkpoint: {', '.join(checkpoint.passes)} already done")
+        return checkpoint
+    
+    def finish_transcript(self, file_path: Path, transcript: str, outputs: Dict[str, Dict],
+                          checkpoint: PassCheckpoint, preprocessing: Optional[Dict] = None) -> Dict:
+        """Build the fingerprinted result (its checkpoint is cleared by save_file_result once it is stored)
         
-        print("  🔗 Extracting relationships...")
-        relationships = self.extract_relationships(transcript, all_entities)
-        
-        result = {
+        The fingerprint identifies the file as read, before preprocessing.
+        """
+        result = self.build_result(file_path, transcript, outputs)
+        result["fingerprint"] = checkpoint.fingerprint
+        if preprocessing:
+            result["preprocessing"] = preprocessing
+        result["usage"] = self.usage.totals(file_path.name)
+        return result
+    
+    def _process_file_job(self, index: int, total: int, file_path: Path) -> Dict:
+        """Worker for one file in a folder run; errors are recorded so other files keep going"""
+        _progress_prefix.set(f"[{index}/{total}] ")
+        try:
+            self.log(f"Processing new file: {file_path.name}")
+            file_result = self.process_single_transcript(file_path)
+        except Exception as e:
+            file_result = self._file_error(file_path, e)
+        self.save_file_result(file_result)
+        return file_result
+    
+    def _file_error(self, file_path: Path, error: Exception) -> Dict:
+        """Log a failed file and build its error entry"""
+        self.log(f"❌ Error processing {file_path.name}: {error}")
+        return {
             "file_name": file_path.name,
-            "transcript_length": len(transcript),
-            "constructs_identified": len(constructs_list),
-            "domains_constructs": domains_constructs,
-            "assessments": assessments,
-            "interventions": interventions,
-            "relationships": relationships
+            "error": str(error),
+            "usage": self.usage.totals(file_path.name)
         }
-        
-        print(f"  ✅ Found {len(constructs_list)} constructs")
-        return result
     
-    def process_transcript_folder(self, folder_path: str) -> Dict:
-        """Process all transcripts using enhanced standard approach with incremental processing"""
+    def _select_new_files(self, folder_path: str):
+        """Work out from the results manifest which transcripts in the folder still need processing
+        
+        Each file is matched to stored results by fingerprint (content hash, extractor, prompt version,
+        preprocessing rules):
+        - same name and fingerprint: skipped
+        - same fingerprint under another name (renamed or copied file): result re-keyed, no API calls
+        - anything else (new, edited, or extracted with another extractor/prompt version): re-run
+        - identical new files: only the first is extracted, the rest reuse its result afterwards
+        Results from before fingerprinting are adopted under their file's current content and the
+        extractor that made them, so another extractor's results are never taken as its own.
+        
+        Returns (new_files, already_processed).
+        """
         folder = Path(folder_path)
         if not folder.exists():
             raise ValueError(f"Folder does not exist: {folder_path}")
         
-        # Load existing results
-        existing_results = self.load_existing_results()
-        processed_filenames = self.get_processed_filenames(existing_results)
+        self.migrate_legacy_results()
         
-        transcript_files = list(folder.glob("*.txt"))
+        transcript_files = sorted(folder.glob("*.txt"))
         if not transcript_files:
             print(f"❌ No .txt files found in {folder_path}")
-            return existing_results or {"error": "No transcript files found"}
-        
-        # Filter for only new/unprocessed files
-        new_files = [f for f in transcript_files if f.name not in processed_filenames]
-        already_processed = [f for f in transcript_files if f.name in processed_filenames]
+            return [], []
+        
+        fingerprints = {f.name: self.fingerprint(self.read_transcript(f)) for f in transcript_files}
+        manifest = self.results_store.manifest()
+        by_name = {name: entry for name, entry in manifest.items() if entry['status'] == 'ok'}
+        print(f"📂 Found existing results for {len(by_name)} files")
+        
+        adopted = 0
+        store_type = self.results_store.summary().get('extraction_type')
+        for name, entry in by_name.items():
+            if not entry.get('fingerprint') and name in fingerprints:
+                extraction_type = entry.get('extraction_type') or store_type or "Unknown"
+                record = self.results_store.get(name)
+                record['fingerprint'] = dict(fingerprints[name], extractor=extraction_type)
+                self.results_store.put(record, extraction_type=extraction_type)
+                by_name[name] = self.results_store.entry(name)
+                adopted += 1
+        
+        by_fingerprint = {}
+        for entry in by_name.values():
+            if entry.get('fingerprint'):
+                by_fingerprint.setdefault(json.dumps(entry['fingerprint'], sort_keys=True), entry['file_name'])
+        
+        new_files, already_processed, rekeyed, changed = [], [], 0, 0
+        first_copies: Dict[str, Path] = {}
+        self.duplicate_files = []
+        for f in transcript_files:
+            fingerprint = fingerprints[f.name]
+            key = json.dumps(fingerprint, sort_keys=True)
+            previous = by_name.get(f.name)
+            if previous is not None and previous.get('fingerprint') == fingerprint:
+                already_processed.append(f)
+                continue
+            
+            source = by_fingerprint.get(key)
+            if source is not None:
+                extraction_type = self.results_store.entry(source).get('extraction_type')
+                self.results_store.put(dict(self.results_store.get(source), file_name=f.name),
+                                       extraction_type=extraction_type)
+                # A re-keyed result replaces its source when the source file is gone (a rename);
+                # later copies of the same content are then re-keyed from the new name
+                if source not in fingerprints:
+                    self.results_store.remove(source)
+                    by_fingerprint[key] = f.name
+                rekeyed += 1
+                already_processed.append(f)
+                continue
+            
+            if key in first_copies:
+                self.duplicate_files.append((f, first_copies[key]))
+                continue
+            first_copies[key] = f
+            
+            if previous is not None:
+                changed += 1
+            new_files.append(f)
         
         print(f"📁 Found {len(transcript_files)} total transcript files")
         print(f"✅ Already processed: {len(already_processed)} files")
+        if adopted:
+            print(f"🏷️  Fingerprinted {adopted} result(s) from before content hashing")
+        if rekeyed:
+            print(f"♻️  Re-keyed {rekeyed} renamed/duplicate file(s) without API calls")
+        if changed:
+            print(f"✏️  Changed since last extraction: {changed} files")
+        if self.duplicate_files:
+            print(f"👯 Identical to another new file: {len(self.duplicate_files)} files (extracted once)")
         print(f"🆕 New files to process: {len(new_files)} files")
         
         if not new_files:
             print("🎉 All transcripts already processed!")
-            return existing_results
         
-        # Process only new files
+        return new_files, already_processed
+    
+    def copy_duplicate_results(self, file_results: List[Dict]) -> List[Path]:
+        """Store each identical new file's result as a copy of its first copy's, if that succeeded
+        
+        Returns the files given a result this way; a failed original leaves its copies for the next run.
+        """
+        results = {r['file_name']: r for r in file_results}
+        copied = []
+        for duplicate, original in self.duplicate_files:
+            result = results.get(original.name)
+            if result is not None and 'error' not in result:
+                self.results_store.put(dict(result, file_name=duplicate.name), extraction_type=self.extraction_type)
+                copied.append(duplicate)
+        self.duplicate_files = []
+        return copied
+    
+    def _finish_folder_run(self, file_results: List[Dict], already_processed: List[Path]) -> Dict:
+        """Summarise the files processed in this run alongside the totals for everything in the results store"""
+        already_processed = already_processed + self.copy_duplicate_results(file_results)
         new_results = {
             "processed_files": [],
             "summary": {
-                "total_files": len(new_files),
+                "total_files": len(file_results),
                 "successful": 0,
                 "failed": 0,
                 "extraction_type": self.extraction_type,
@@ -281,51 +980,235 @@ class OntologyExtractor(BaseOntologyExtractor):
             }
         }
         
-        for i, file_path in enumerate(new_files, 1):
-            try:
-                print(f"\n[{i}/{len(new_files)}] Processing new file: {file_path.name}")
-                file_result = self.process_single_transcript(file_path)
-                new_results["processed_files"].append(file_result)
-                new_results["summary"]["successful"] += 1
-                new_results["summary"]["total_api_calls"] += 4  # 4 passes
-                
-                # Small delay for API rate limiting
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"❌ Error processing {file_path.name}: {e}")
-                new_results["processed_files"].append({
-                    "file_name": file_path.name,
-                    "error": str(e)
-                })
+        for file_result in file_results:
+            new_results["processed_files"].append(file_result)
+            if 'error' in file_result:
                 new_results["summary"]["failed"] += 1
-        
-        # Merge with existing results
-        final_results = self.merge_results(existing_results, new_results)
+            else:
+                new_results["summary"]["successful"] += 1
+        usage = self.usage.summary()
+        new_results["summary"]["total_api_calls"] = usage["requests"]
+        
+        # Each file was saved to the store as it finished; totals cover the store as a whole
+        final_results = self.folder_results(file_results)
+        final_results['summary']['usage'] = usage
+        final_results['summary']['prompt_cache'] = self.prompt_cache_summary()
+        if self.planned_cache_hit_rate is not None:
+            final_results['summary']['prompt_cache']['planned_cache_hit_rate'] = self.planned_cache_hit_rate
+        if self.response_cache:
+            final_results['summary']['response_cache'] = self.response_cache.stats()
+        final_results['summary']['rate_limiter'] = self.rate_limiter.summary()
+        if self.streaming:
+            final_results['summary']['streaming'] = self.stream_summary()
+        preprocessed = [f['preprocessing'] for f in file_results if f.get('preprocessing')]
+        if self.repair_stats["requested"]:
+            final_results['summary']['repairs'] = dict(self.repair_stats)
+        if self.continuation_stats["truncated"]:
+            final_results['summary']['continuations'] = dict(self.continuation_stats)
+        if preprocessed:
+            before = sum(p['tokens_before'] for p in preprocessed)
+            after = sum(p['tokens_after'] for p in preprocessed)
+            final_results['summary']['preprocessing'] = {
+                "files": len(preprocessed),
+                "tokens_before": before,
+                "tokens_after": after,
+                "reduction_pct": round(100 * (1 - after / before), 1) if before else 0.0
+            }
         
         print(f"\n📊 MERGE SUMMARY:")
         print(f"   Existing files preserved: {len(already_processed)}")
-        print(f"   New files processed: {len(new_files)}")
+        print(f"   New files processed: {len(file_results)}")
         print(f"   Total files in results: {final_results['summary']['total_files']}")
         print(f"   New API calls made: {new_results['summary']['total_api_calls']}")
         print(f"   Total API calls (all time): {final_results['summary']['total_api_calls']}")
         
+        print(f"   Usage: {usage['input_tokens']:,} input / {usage['output_tokens']:,} output tokens, ${usage['cost_usd']:.2f}, "
+              f"{usage['latency_s']}s in requests, {usage['failed_requests']} failed, "
+              f"stop reasons {usage['stop_reasons'] or '-'}")
+        for label, breakdown in (("passes", usage['by_pass']), ("files", usage['by_file'])):
+            top = [f"{name} ${totals['cost_usd']:.2f}/{totals['latency_s']}s" for name, totals in list(breakdown.items())[:3]]
+            if top:
+                print(f"   Costliest {label}: {', '.join(top)}")
+        for model, totals in usage['by_model'].items():
+            print(f"   {model}: {totals['requests']} requests, {totals['input_tokens']:,} input / "
+                  f"{totals['output_tokens']:,} output tokens, ${totals['cost_usd']:.2f}, "
+                  f"avg latency {totals['avg_latency_s'] if totals['avg_latency_s'] is not None else '-'}s")
+        
+        cache = final_results['summary']['prompt_cache']
+        print(f"   Prompt cache: {cache['cache_read_input_tokens']:,} read / {cache['cache_creation_input_tokens']:,} written / "
+              f"{cache['uncached_input_tokens']:,} uncached input tokens "
+              f"(hit rate {cache['cache_hit_rate']:.0%}, input cost saving {cache['input_cost_saving_pct']}%)")
+        planned = cache.get('planned_cache_hit_rate')
+        if planned and cache['requests'] and cache['cache_hit_rate'] < planned / 2:
+            print(f"   ⚠️  Prompt cache hit rate {cache['cache_hit_rate']:.0%} is well below the projected {planned:.0%}: "
+                  f"requests are not reusing their shared prefix")
+        if cache['avg_latency_cache_hit_s'] is not None and cache['avg_latency_cache_miss_s'] is not None:
+            print(f"   Avg request latency: {cache['avg_latency_cache_hit_s']}s with cache hit vs "
+                  f"{cache['avg_latency_cache_miss_s']}s without")
+        
+        if self.response_cache:
+            responses = final_results['summary']['response_cache']
+            print(f"   Response cache: {responses['hits']} hit(s), {responses['misses']} miss(es) "
+                  f"({responses['entries']} entries, {responses['size_mb']} / {responses['max_mb']} MB)")
+        
+        limiter = final_results['summary']['rate_limiter']
+        print(f"   Rate limiter: {limiter['throttled_requests']}/{limiter['requests']} requests throttled "
+              f"({limiter['throttle_wait_s']}s), {limiter['retries']} retries ({limiter['retry_wait_s']}s), "
+              f"{limiter['failed_requests']} failed")
+        
+        if self.repair_stats["requested"]:
+            print(f"   Schema repairs: {self.repair_stats['repaired']}/{self.repair_stats['requested']} outputs repaired")
+        if self.continuation_stats["truncated"]:
+            stats = self.continuation_stats
+            print(f"   Truncated replies: {stats['truncated']} ({stats['continuations']} continuations, "
+                  f"{stats['unfinished']} still truncated)")
+        
+        if preprocessed:
+            stats = final_results['summary']['preprocessing']
+            print(f"   Preprocessing: ~{stats['tokens_before']:,} → ~{stats['tokens_after']:,} transcript tokens per pass "
+                  f"(-{stats['reduction_pct']}%)")
+        
+        if self.streaming:
+            streamed = final_results['summary']['streaming']
+            print(f"   Streaming: {streamed['output_tokens']:,} output tokens at {streamed['tokens_per_second']} tok/s, "
+                  f"first token after {streamed['avg_first_token_s']}s on average, {streamed['truncated']} truncated")
+        
+        run_summary = {key: value for key, value in final_results['summary'].items()
+                       if key not in ("total_files", "successful", "failed", "total_api_calls")}
+        run_summary = dict(run_summary, files=len(file_results),
+                           successful=new_results['summary']['successful'],
+                           failed=new_results['summary']['failed'],
+                           api_calls=new_results['summary']['total_api_calls'])
+        self.results_store.record_run(run_summary)
+        report_path = self.results_store.save_run_report(dict(run_summary, usage=self.usage.report()))
+        print(f"   Run report: {report_path}")
         return final_results
+    
+    def process_transcript_folder(self, folder_path: str, max_workers: Optional[int] = None) -> Dict:
+        """Process all transcripts in a folder with bounded concurrency and incremental processing"""
+        new_files, already_processed = self._select_new_files(folder_path)
+        if not new_files:
+            return self.folder_results([]) or {"error": "No transcript files found"}
+        
+        workers = max(1, min(max_workers or self.max_workers, len(new_files)))
+        print(f"⚡ Processing with {workers} concurrent worker(s)\n")
+        
+        # Results are collected by position so the output order doesn't depend on completion order
+        file_results = [None] * len(new_files)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._process_file_job, i, len(new_files), file_path): i - 1
+                for i, file_path in enumerate(new_files, 1)
+            }
+            for future in as_completed(futures):
+                file_results[futures[future]] = future.result()
+        
+        return self._finish_folder_run(file_results, already_processed)
+
+class OntologyExtractor(BaseOntologyExtractor):
+    """Enhanced standard 4-pass extraction system with improved prompts"""
+    
+    def __init__(self, api_key=None, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.extraction_type = "Enhanced Standard (4-pass)"
+        self.output_schemas = {
+            "domains_constructs": DOMAINS_CONSTRUCTS,
+            "assessments": ASSESSMENTS_STANDARD,
+            "interventions": INTERVENTIONS_STANDARD,
+            "relationships": RELATIONSHIPS_STANDARD,
+        }
+        print("✅ Enhanced Standard Extractor initialized successfully")
+        print("🔄 Using 4-pass extraction with improved prompts")
+    
+    def extract_domains_constructs(self, transcript: str) -> Dict:
+        """Extract domains and constructs using enhanced prompts"""
+        prompt = self.prompts.domains_constructs_standard(transcript)
+        return self.run_prompt(prompt, tool=self.output_tool("domains_constructs"))
+    
+    def extract_assessments(self, transcript: str, constructs: List[str]) -> Dict:
+        """Extract detailed assessment information using enhanced prompts"""
+        prompt = self.prompts.assessments_standard(transcript, constructs)
+        return self.run_prompt(prompt, tool=self.output_tool("assessments"))
+    
+    def extract_interventions(self, transcript: str, constructs: List[str]) -> Dict:
+        """Extract intervention information using enhanced prompts"""
+        prompt = self.prompts.interventions_standard(transcript, constructs)
+        return self.run_prompt(prompt, tool=self.output_tool("interventions"))
+    
+    def extract_relationships(self, transcript: str, all_entities: Dict) -> Dict:
+        """Extract construct relationships and dependencies"""
+        prompt = self.prompts.relationships_standard(transcript, all_entities)
+        return self.run_prompt(prompt, tool=self.output_tool("relationships"))
+    
+    def build_pass_graph(self, transcript: str) -> List[ExtractionPass]:
+        """Declare the 4 standard passes: constructs first, then assessments/interventions, then relationships"""
+        def constructs(r):
+            return self.entity_names(r["domains_constructs"], "constructs_mentioned", "construct_name")
+        
+        # With streaming, passes that only use the construct list start once that list is complete
+        constructs_field = {"domains_constructs": ["constructs_mentioned"]}
+        
+        return [
+            ExtractionPass(
+                "domains_constructs", "  📋 Extracting domains and constructs...",
+                lambda r: self.extract_domains_constructs(transcript)),
+            ExtractionPass(
+                "assessments", "  🧪 Extracting assessments...",
+                lambda r: self.extract_assessments(transcript, constructs(r)),
+                depends_on=["domains_constructs"], needs=constructs_field),
+            ExtractionPass(
+                "interventions", "  💊 Extracting interventions...",
+                lambda r: self.extract_interventions(transcript, constructs(r)),
+                depends_on=["domains_constructs"], needs=constructs_field),
+            ExtractionPass(
+                "relationships", "  🔗 Extracting relationships...",
+                lambda r: self.extract_relationships(transcript, {
+                    "domains_constructs": r["domains_constructs"],
+                    "assessments": r["assessments"],
+                    "interventions": r["interventions"]
+                }),
+                depends_on=["domains_constructs", "assessments", "interventions"]),
+        ]
+    
+    def build_result(self, file_path: Path, transcript: str, outputs: Dict[str, Dict]) -> Dict:
+        """Assemble the standard per-file result"""
+        constructs_list = self.entity_names(outputs["domains_constructs"], "constructs_mentioned", "construct_name")
+        
+        result = {
+            "file_name": file_path.name,
+            "transcript_length": len(transcript),
+            "constructs_identified": len(constructs_list),
+            "domains_constructs": outputs["domains_constructs"],
+            "assessments": outputs["assessments"],
+            "interventions": outputs["interventions"],
+            "relationships": outputs["relationships"]
+        }
+        
+        self.log(f"  ✅ Found {len(constructs_list)} constructs")
+        return result
 
 class RobustOntologyExtractor(BaseOntologyExtractor):
     """Enhanced 7-pass extraction system for maximum information capture"""
     
-    def __init__(self, api_key=None):
-        super().__init__(api_key)
+    def __init__(self, api_key=None, **kwargs):
+        super().__init__(api_key, **kwargs)
         self.extraction_type = "Robust (7-pass)"
+        self.output_schemas = {
+            "knowledge_map": KNOWLEDGE_MAP,
+            "constructs": CONSTRUCTS_DETAILED,
+            "assessments": ASSESSMENTS_DETAILED,
+            "interventions": INTERVENTIONS_DETAILED,
+            "contextual_factors": CONTEXTUAL_FACTORS,
+            "relationships": RELATIONSHIPS_ROBUST,
+            "validation": VALIDATION_ROBUST,
+        }
         print("✅ Robust Extractor initialized successfully")
         print("🔄 Using 7-pass robust extraction strategy")
     
     def extract_knowledge_domains(self, transcript: str) -> Dict:
         """Pass 1: Open-ended knowledge domain mapping"""
         prompt = self.prompts.knowledge_mapping_guided(transcript)
-        response = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("knowledge_map"))
     
     def extract_comprehensive_entities(self, transcript: str, knowledge_map: Dict) -> Dict:
         """Pass 2: Comprehensive entity extraction"""
@@ -335,8 +1218,7 @@ class RobustOntologyExtractor(BaseOntologyExtractor):
             expertise_context = f"Primary expertise: {', '.join(expertise_areas)}"
         
         prompt = self.prompts.constructs_guided(transcript, expertise_context)
-        response = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("constructs"))
     
     def extract_detailed_assessments(self, transcript: str, entities: Dict) -> Dict:
         """Pass 3: Detailed assessment extraction"""
@@ -345,8 +1227,7 @@ class RobustOntologyExtractor(BaseOntologyExtractor):
             constructs_list = [c.get("construct_name", "") for c in entities["constructs_mentioned"]]
         
         prompt = self.prompts.assessments_guided(transcript, constructs_list)
-        response = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("assessments"))
     
     def extract_detailed_interventions(self, transcript: str, entities: Dict) -> Dict:
         """Pass 4: Detailed intervention extraction"""
@@ -355,534 +1236,232 @@ class RobustOntologyExtractor(BaseOntologyExtractor):
             constructs_list = [c.get("construct_name", "") for c in entities["constructs_mentioned"]]
         
         prompt = self.prompts.interventions_guided(transcript, constructs_list)
-        response = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("interventions"))
     
     def extract_contextual_factors(self, transcript: str, entities: Dict) -> Dict:
         """Pass 5: Goals, constraints, and contextual factors"""
-        prompt = f"""
-        Extract all contextual information that affects assessment and intervention decisions.
-
-        TRANSCRIPT:
-        {transcript}
-
-        Extract contextual factors:
-        {{
-            "client_goals": [
-                {{
-                    "goal_description": "string",
-                    "goal_type": "string",
-                    "target_metrics": ["specific measurable outcomes"],
-                    "timeline": "string"
-                }}
-            ],
-            "constraints_and_limitations": [
-                {{
-                    "constraint_type": "string",
-                    "description": "string",
-                    "impact_on_assessment": "string",
-                    "impact_on_intervention": "string",
-                    "workaround_strategies": ["accommodations"]
-                }}
-            ],
-            "moderating_factors": [
-                {{
-                    "factor_name": "string",
-                    "description": "string",
-                    "what_it_moderates": "string",
-                    "management_strategies": ["how to account for this factor"]
-                }}
-            ]
-        }}
-        """
-        
-        response = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response)
+        prompt = self.prompts.contextual_factors_robust(transcript)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("contextual_factors"))
     
     def extract_comprehensive_relationships(self, transcript: str, all_data: Dict) -> Dict:
         """Pass 6: Comprehensive relationship extraction"""
-        prompt = f"""
-        Analyze this interview for ALL types of relationships, dependencies, and connections discussed.
-
-        TRANSCRIPT:
-        {transcript}
-
-        Extract all relationship types:
-        {{
-            "causal_relationships": [
-                {{
-                    "cause": "string",
-                    "effect": "string",
-                    "relationship_strength": "string",
-                    "mechanism": "string",
-                    "evidence_mentioned": "string"
-                }}
-            ],
-            "assessment_construct_links": [
-                {{
-                    "assessment": "string",
-                    "constructs_measured": ["list"],
-                    "measurement_quality": "string"
-                }}
-            ],
-            "intervention_outcome_links": [
-                {{
-                    "intervention": "string",
-                    "target_outcomes": ["list"],
-                    "expected_timeline": "string",
-                    "moderating_factors": ["what affects effectiveness"]
-                }}
-            ]
-        }}
-        """
-        
-        response = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response)
+        prompt = self.prompts.relationships_robust(transcript)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("relationships"))
     
     def validate_and_enhance(self, transcript: str, all_extractions: Dict) -> Dict:
         """Pass 7: Validation and enhancement"""
-        prompt = f"""
-        Review this transcript and the extracted information to identify any significant gaps.
-
-        TRANSCRIPT EXCERPT:
-        {transcript[:2000]}...
-
-        Provide validation:
-        {{
-            "extraction_confidence": {{
-                "overall_confidence": "high/medium/low",
-                "most_reliable_sections": ["list"],
-                "areas_needing_review": ["list"]
-            }},
-            "missing_information": [
-                {{
-                    "category": "string",
-                    "missing_element": "string",
-                    "importance_level": "high/medium/low"
-                }}
-            ],
-            "quality_indicators": [
-                {{
-                    "aspect": "string",
-                    "quality_score": "high/medium/low",
-                    "reasoning": "string"
-                }}
-            ]
-        }}
-        """
-        
-        response = self.make_api_call(prompt, max_tokens=3000)
-        return self.safe_json_parse(response)
+        prompt = self.prompts.validation_robust(transcript)
+        return self.run_prompt(prompt, max_tokens=3000, tool=self.output_tool("validation"))
     
-    def process_single_transcript(self, file_path: Path) -> Dict:
-        """Process transcript with 7-pass robust extraction"""
-        print(f"📄 Processing: {file_path.name}")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            transcript = f.read()
-        
-        # 7-pass robust extraction
-        print("  🗺️  Pass 1: Knowledge domain mapping...")
-        knowledge_map = self.extract_knowledge_domains(transcript)
-        
-        print("  🔍 Pass 2: Comprehensive entity extraction...")
-        entities = self.extract_comprehensive_entities(transcript, knowledge_map)
-        
-        print("  🧪 Pass 3: Detailed assessment extraction...")
-        assessments = self.extract_detailed_assessments(transcript, entities)
-        
-        print("  💊 Pass 4: Detailed intervention extraction...")
-        interventions = self.extract_detailed_interventions(transcript, entities)
-        
-        print("  🎯 Pass 5: Contextual factors extraction...")
-        contextual_factors = self.extract_contextual_factors(transcript, entities)
-        
-        print("  🔗 Pass 6: Comprehensive relationship extraction...")
-        all_data = {
-            "knowledge_map": knowledge_map,
-            "entities": entities,
-            "assessments": assessments,
-            "interventions": interventions,
-            "contextual_factors": contextual_factors
-        }
-        relationships = self.extract_comprehensive_relationships(transcript, all_data)
-        
-        print("  ✅ Pass 7: Validation and enhancement...")
-        validation = self.validate_and_enhance(transcript, all_data)
+    def build_pass_graph(self, transcript: str) -> List[ExtractionPass]:
+        """Declare the 7 robust passes; passes 3-5 and passes 6-7 each run side by side"""
+        def all_data(r):
+            return {
+                "knowledge_map": r["knowledge_map"],
+                "entities": r["entities"],
+                "assessments": r["assessments"],
+                "interventions": r["interventions"],
+                "contextual_factors": r["contextual_factors"]
+            }
         
+        all_data_passes = ["knowledge_map", "entities", "assessments", "interventions", "contextual_factors"]
+        
+        return [
+            ExtractionPass(
+                "knowledge_map", "  🗺️  Pass 1: Knowledge domain mapping...",
+                lambda r: self.extract_knowledge_domains(transcript)),
+            ExtractionPass(
+                "entities", "  🔍 Pass 2: Comprehensive entity extraction...",
+                lambda r: self.extract_comprehensive_entities(transcript, r["knowledge_map"]),
+                depends_on=["knowledge_map"]),
+            ExtractionPass(
+                "assessments", "  🧪 Pass 3: Detailed assessment extraction...",
+                lambda r: self.extract_detailed_assessments(transcript, r["entities"]),
+                depends_on=["entities"]),
+            ExtractionPass(
+                "interventions", "  💊 Pass 4: Detailed intervention extraction...",
+                lambda r: self.extract_detailed_interventions(transcript, r["entities"]),
+                depends_on=["entities"]),
+            ExtractionPass(
+                "contextual_factors", "  🎯 Pass 5: Contextual factors extraction...",
+                lambda r: self.extract_contextual_factors(transcript, r["entities"]),
+                depends_on=["entities"]),
+            ExtractionPass(
+                "relationships", "  🔗 Pass 6: Comprehensive relationship extraction...",
+                lambda r: self.extract_comprehensive_relationships(transcript, all_data(r)),
+                depends_on=all_data_passes),
+            ExtractionPass(
+                "validation", "  ✅ Pass 7: Validation and enhancement...",
+                lambda r: self.validate_and_enhance(transcript, all_data(r)),
+                depends_on=all_data_passes),
+        ]
+    
+    def build_result(self, file_path: Path, transcript: str, outputs: Dict[str, Dict]) -> Dict:
+        """Assemble the robust per-file result"""
         # Extract construct names for summary
-        constructs_list = []
-        if entities and "constructs_mentioned" in entities:
-            constructs_list = [c.get("construct_name", "") for c in entities["constructs_mentioned"]]
+        constructs_list = self.entity_names(outputs["entities"], "constructs_mentioned", "construct_name")
         
         result = {
             "file_name": file_path.name,
             "transcript_length": len(transcript),
             "constructs_identified": len(constructs_list),
-            "knowledge_map": knowledge_map,
-            "entities": entities,
-            "assessments": assessments,
-            "interventions": interventions,
-            "contextual_factors": contextual_factors,
-            "relationships": relationships,
-            "validation": validation
+            "knowledge_map": outputs["knowledge_map"],
+            "entities": outputs["entities"],
+            "assessments": outputs["assessments"],
+            "interventions": outputs["interventions"],
+            "contextual_factors": outputs["contextual_factors"],
+            "relationships": outputs["relationships"],
+            "validation": outputs["validation"]
         }
         
-        print(f"  ✅ Found {len(constructs_list)} constructs")
+        self.log(f"  ✅ Found {len(constructs_list)} constructs")
         return result
-    
-    def process_transcript_folder(self, folder_path: str) -> Dict:
-        """Process all transcripts using 7-pass robust extraction with incremental processing"""
-        folder = Path(folder_path)
-        if not folder.exists():
-            raise ValueError(f"Folder does not exist: {folder_path}")
-        
-        # Load existing results
-        existing_results = self.load_existing_results()
-        processed_filenames = self.get_processed_filenames(existing_results)
-        
-        transcript_files = list(folder.glob("*.txt"))
-        if not transcript_files:
-            print(f"❌ No .txt files found in {folder_path}")
-            return existing_results or {"error": "No transcript files found"}
-        
-        # Filter for only new/unprocessed files
-        new_files = [f for f in transcript_files if f.name not in processed_filenames]
-        already_processed = [f for f in transcript_files if f.name in processed_filenames]
-        
-        print(f"📁 Found {len(transcript_files)} total transcript files")
-        print(f"✅ Already processed: {len(already_processed)} files")
-        print(f"🆕 New files to process: {len(new_files)} files")
-        
-        if not new_files:
-            print("🎉 All transcripts already processed!")
-            return existing_results
-        
-        # Process only new files
-        new_results = {
-            "processed_files": [],
-            "summary": {
-                "total_files": len(new_files),
-                "successful": 0,
-                "failed": 0,
-                "extraction_type": self.extraction_type,
-                "total_api_calls": 0
-            }
-        }
-        
-        for i, file_path in enumerate(new_files, 1):
-            try:
-                print(f"\n[{i}/{len(new_files)}] Processing new file: {file_path.name}")
-                file_result = self.process_single_transcript(file_path)
-                new_results["processed_files"].append(file_result)
-                new_results["summary"]["successful"] += 1
-                new_results["summary"]["total_api_calls"] += 7  # 7 passes
-                
-                # Small delay for API rate limiting
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"❌ Error processing {file_path.name}: {e}")
-                new_results["processed_files"].append({
-                    "file_name": file_path.name,
-                    "error": str(e)
-                })
-                new_results["summary"]["failed"] += 1
-        
-        # Merge with existing results
-        final_results = self.merge_results(existing_results, new_results)
-        
-        print(f"\n📊 MERGE SUMMARY:")
-        print(f"   Existing files preserved: {len(already_processed)}")
-        print(f"   New files processed: {len(new_files)}")
-        print(f"   Total files in results: {final_results['summary']['total_files']}")
-        print(f"   New API calls made: {new_results['summary']['total_api_calls']}")
-        print(f"   Total API calls (all time): {final_results['summary']['total_api_calls']}")
-        
-        return final_results
 
 class OntologyGuidedExtractor(BaseOntologyExtractor):
     """Ontology-guided extraction that combines comprehensive coverage with specific term hunting"""
     
-    def __init__(self, api_key=None):
-        super().__init__(api_key)
+    def __init__(self, api_key=None, **kwargs):
+        super().__init__(api_key, **kwargs)
         self.extraction_type = "Ontology-Guided (8-pass)"
+        self.output_schemas = {
+            "domains_constructs": DOMAINS_CONSTRUCTS,
+            "assessments": ASSESSMENTS,
+            "technologies_metrics": TECHNOLOGIES_METRICS,
+            "interventions": INTERVENTIONS,
+            "goals_constraints": GOALS_CONSTRAINTS,
+            "relationships": RELATIONSHIPS,
+            "protocols": PROTOCOLS,
+            "validation": VALIDATION,
+        }
         print("✅ Ontology-Guided Extractor initialized successfully")
         print("🔄 Using 8-pass ontology-guided extraction strategy")
     
     def extract_domains_constructs_guided(self, transcript: str) -> Dict:
         """Pass 1: Ontology-guided domain and construct extraction"""
         prompt = self.prompts.domains_constructs_standard(transcript)
-        response_text = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response_text)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("domains_constructs"))
     
     def extract_technologies_metrics_guided(self, transcript: str, assessments: List[str]) -> Dict:
         """Pass 3: Fixed technology and metrics extraction"""
         # Use the fixed prompt method
         prompt = self.prompts.technologies_metrics_guided_fixed(transcript, assessments)
-        response = self.make_api_call(prompt, max_tokens=3000)  # Reduced tokens
-        return self.safe_json_parse(response)
+        return self.run_prompt(prompt, max_tokens=3000,  # Reduced tokens
+                               tool=self.output_tool("technologies_metrics"))
     
     def extract_assessments_guided(self, transcript: str, constructs: List[str]) -> Dict:
         """Pass 2: Fixed assessment extraction"""
         prompt = self.prompts.assessments_guided_fixed(transcript, constructs)
-        response = self.make_api_call(prompt, max_tokens=3000)
-        return self.safe_json_parse(response)
+        return self.run_prompt(prompt, max_tokens=3000, tool=self.output_tool("assessments"))
     
     def extract_interventions_guided(self, transcript: str, constructs: List[str]) -> Dict:
         """Pass 4: Fixed intervention extraction"""
         prompt = self.prompts.interventions_guided_fixed(transcript, constructs)
-        response = self.make_api_call(prompt, max_tokens=3000)
-        return self.safe_json_parse(response)
+        return self.run_prompt(prompt, max_tokens=3000, tool=self.output_tool("interventions"))
     
     def extract_goals_constraints_guided(self, transcript: str, constructs: List[str]) -> Dict:
         """Pass 5: Goals, constraints, and contextual factors"""
-        prompt = f"""
-        Extract goals, constraints, and contextual factors that affect practice decisions.
-
-        CONSTRUCTS CONTEXT: {", ".join(constructs[:10])}
-
-        TRANSCRIPT:
-        {transcript}
-
-        Extract contextual information:
-        {{
-            "client_goals": [
-                {{
-                    "goal_description": "string (specific goal mentioned)",
-                    "goal_type": "string (performance/health/aesthetic/functional)",
-                    "target_constructs": ["which constructs this goal relates to"],
-                    "success_metrics": ["how success is measured"],
-                    "timeline": "string (timeframe mentioned)",
-                    "priority_level": "string (if indicated)"
-                }}
-            ],
-            "constraints_preferences": [
-                {{
-                    "constraint_type": "string (equipment/time/access/medical/preference)",
-                    "description": "string",
-                    "impact_on_assessment": "string (how it affects testing)",
-                    "impact_on_intervention": "string (how it affects treatment)",
-                    "workaround_strategies": ["how to accommodate this constraint"]
-                }}
-            ],
-            "moderating_factors": [
-                {{
-                    "factor_name": "string",
-                    "description": "string",
-                    "what_it_affects": "string (assessment results/intervention effectiveness)",
-                    "management_approach": "string (how to account for this factor)"
-                }}
-            ],
-            "individual_differences": [
-                {{
-                    "difference_factor": "string (age/sex/training status/health condition)",
-                    "assessment_implications": "string",
-                    "intervention_implications": "string"
-                }}
-            ]
-        }}
-        """
-        
-        response = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response)
+        prompt = self.prompts.goals_constraints_guided(transcript, constructs)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("goals_constraints"))
     
     def extract_relationships_guided(self, transcript: str, all_entities: Dict) -> Dict:
         """Pass 6: Comprehensive relationship extraction"""
         # Build context from extracted entities
-        constructs = []
-        assessments = []
-        interventions = []
-        
-        if all_entities.get('constructs'):
-            constructs = [c.get('construct_name', '') for c in all_entities['constructs'].get('constructs_mentioned', [])]
-        if all_entities.get('assessments'):
-            assessments = [a.get('assessment_name', '') for a in all_entities['assessments'].get('assessments', [])]
-        if all_entities.get('interventions'):
-            interventions = [i.get('intervention_name', '') for i in all_entities['interventions'].get('interventions', [])]
-        
-        context = f"""
-        CONSTRUCTS: {", ".join(constructs[:10])}
-        ASSESSMENTS: {", ".join(assessments[:10])}
-        INTERVENTIONS: {", ".join(interventions[:10])}
-        """
+        constructs = self.entity_names(all_entities.get('constructs'), 'constructs_mentioned', 'construct_name')
+        assessments = self.entity_names(all_entities.get('assessments'), 'assessments', 'assessment_name')
+        interventions = self.entity_names(all_entities.get('interventions'), 'interventions', 'intervention_name')
         
-        prompt = f"""
-        Analyze this interview for relationships between the entities identified:
-        
-        {context}
-
-        TRANSCRIPT:
-        {transcript}
-
-        Extract all relationships mentioned:
-        {{
-            "construct_relationships": [
-                {{
-                    "source_construct": "string",
-                    "target_construct": "string",
-                    "relationship_type": "string (causal/association/dependency)",
-                    "relationship_description": "string",
-                    "evidence_mentioned": "string (what supports this relationship)",
-                    "directionality": "string (bidirectional/unidirectional)"
-                }}
-            ],
-            "assessment_construct_links": [
-                {{
-                    "assessment_name": "string",
-                    "constructs_measured": ["list of constructs this assessment evaluates"],
-                    "measurement_relationship": "string (direct/indirect/predictive)",
-                    "interpretation_factors": ["what affects how results are interpreted"]
-                }}
-            ],
-            "intervention_construct_links": [
-                {{
-                    "intervention_name": "string",
-                    "constructs_targeted": ["list of constructs this intervention affects"],
-                    "mechanism_of_action": "string (how the intervention works)",
-                    "expected_outcomes": ["what changes are expected"],
-                    "timeline_expectations": "string (how quickly effects are seen)"
-                }}
-            ],
-            "assessment_intervention_connections": [
-                {{
-                    "assessment_name": "string",
-                    "intervention_name": "string",
-                    "connection_type": "string (informs/monitors/triggers/evaluates)",
-                    "connection_description": "string"
-                }}
-            ]
-        }}
-        """
-        
-        response = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response)
+        prompt = self.prompts.relationships_guided(transcript, constructs, assessments, interventions)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("relationships"))
     
     def extract_protocols_details(self, transcript: str, assessments: List[str], interventions: List[str]) -> Dict:
         """Pass 7: Detailed protocols and implementation specifics"""
-        
-        prompt = f"""
-        Extract detailed protocols and implementation specifics for the assessments and interventions identified.
-
-        ASSESSMENTS: {", ".join(assessments[:10])}
-        INTERVENTIONS: {", ".join(interventions[:10])}
-
-        TRANSCRIPT:
-        {transcript}
-
-        Extract detailed protocols:
-        {{
-            "assessment_protocols": [
-                {{
-                    "assessment_name": "string",
-                    "detailed_steps": ["ordered list of protocol steps"],
-                    "preparation_requirements": ["what needs to be done before"],
-                    "equipment_setup": "string",
-                    "data_collection_process": "string",
-                    "quality_assurance": ["how to ensure reliable results"],
-                    "troubleshooting": ["common issues and solutions"]
-                }}
-            ],
-            "intervention_protocols": [
-                {{
-                    "intervention_name": "string",
-                    "implementation_steps": ["how to deliver this intervention"],
-                    "dosage_specifications": {{
-                        "specific_parameters": "string",
-                        "progression_rules": "string",
-                        "modification_criteria": "string"
-                    }},
-                    "monitoring_protocols": ["how to track progress"],
-                    "safety_considerations": ["precautions and contraindications"]
-                }}
-            ],
-            "practical_considerations": [
-                {{
-                    "consideration_type": "string",
-                    "description": "string",
-                    "practical_solutions": ["how to address this consideration"]
-                }}
-            ]
-        }}
-        """
-        
-        response = self.make_api_call(prompt, max_tokens=4000)
-        return self.safe_json_parse(response)
+        prompt = self.prompts.protocols_guided(transcript, assessments, interventions)
+        return self.run_prompt(prompt, max_tokens=4000, tool=self.output_tool("protocols"))
     
     def validate_ontology_coverage(self, transcript: str, all_extractions: Dict) -> Dict:
         """Pass 8: Validation against ontology framework and gap identification"""
         prompt = self.prompts.validation_guided(transcript, all_extractions)
-        response = self.make_api_call(prompt, max_tokens=3000)
-        return self.safe_json_parse(response)
+        return self.run_prompt(prompt, max_tokens=3000, tool=self.output_tool("validation"))
     
-    def process_single_transcript(self, file_path: Path) -> Dict:
-        """Process transcript with 8-pass ontology-guided extraction"""
-        print(f"📄 Processing: {file_path.name}")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            transcript = f.read()
-        
-        # Pass 1: Guided domain and construct extraction
-        print("  🎯 Pass 1: Guided domains and constructs extraction...")
-        domains_constructs = self.extract_domains_constructs_guided(transcript)
+    def build_pass_graph(self, transcript: str) -> List[ExtractionPass]:
+        """Declare the 8 ontology-guided passes and the earlier outputs each one needs
         
-        # Extract construct names for subsequent passes
-        constructs_list = []
-        if domains_constructs and "constructs_mentioned" in domains_constructs:
-            constructs_list = [c.get("construct_name", "") for c in domains_constructs["constructs_mentioned"]]
-        
-        # Pass 2: Guided assessment extraction
-        print("  🧪 Pass 2: Guided assessments extraction...")
-        assessments = self.extract_assessments_guided(transcript, constructs_list)
-        
-        # Extract assessment names
-        assessment_names = []
-        if assessments and "assessments" in assessments:
-            assessment_names = [a.get("assessment_name", "") for a in assessments["assessments"]]
-        
-        # Pass 3: Dedicated technology and metrics extraction
-        print("  ⚙️  Pass 3: Technologies and metrics extraction...")
-        technologies_metrics = self.extract_technologies_metrics_guided(transcript, assessment_names)
-        
-        # Pass 4: Guided intervention extraction
-        print("  💊 Pass 4: Guided interventions extraction...")
-        interventions = self.extract_interventions_guided(transcript, constructs_list)
-        
-        # Extract intervention names
-        intervention_names = []
-        if interventions and "interventions" in interventions:
-            intervention_names = [i.get("intervention_name", "") for i in interventions["interventions"]]
-        
-        # Pass 5: Goals and constraints
-        print("  🎯 Pass 5: Goals and constraints extraction...")
-        goals_constraints = self.extract_goals_constraints_guided(transcript, constructs_list)
-        
-        # Pass 6: Relationships
-        print("  🔗 Pass 6: Relationships extraction...")
-        all_entities = {
-            'constructs': domains_constructs,
-            'assessments': assessments,
-            'interventions': interventions,
-            'technologies': technologies_metrics
-        }
-        relationships = self.extract_relationships_guided(transcript, all_entities)
-        
-        # Pass 7: Detailed protocols
-        print("  📋 Pass 7: Detailed protocols extraction...")
-        protocols = self.extract_protocols_details(transcript, assessment_names, intervention_names)
-        
-        # Pass 8: Validation
-        print("  ✅ Pass 8: Ontology validation...")
-        all_extractions = {
-            'constructs': domains_constructs,
-            'assessments': assessments,
-            'interventions': interventions,
-            'technologies': technologies_metrics,
-            'goals_constraints': goals_constraints,
-            'relationships': relationships,
-            'protocols': protocols
-        }
-        validation = self.validate_ontology_coverage(transcript, all_extractions)
+        Critical path: constructs -> assessments -> technologies/relationships/protocols -> validation
+        """
+        def constructs(r):
+            return self.entity_names(r['domains_constructs'], "constructs_mentioned", "construct_name")
+        
+        def assessments(r):
+            return self.entity_names(r['assessments'], "assessments", "assessment_name")
+        
+        def interventions(r):
+            return self.entity_names(r['interventions'], "interventions", "intervention_name")
+        
+        # With streaming, passes that only use entity name lists start once those lists are complete
+        constructs_field = {"domains_constructs": ["constructs_mentioned"]}
+        
+        return [
+            ExtractionPass(
+                "domains_constructs", "  🎯 Pass 1: Guided domains and constructs extraction...",
+                lambda r: self.extract_domains_constructs_guided(transcript)),
+            ExtractionPass(
+                "assessments", "  🧪 Pass 2: Guided assessments extraction...",
+                lambda r: self.extract_assessments_guided(transcript, constructs(r)),
+                depends_on=["domains_constructs"], needs=constructs_field),
+            ExtractionPass(
+                "technologies_metrics", "  ⚙️  Pass 3: Technologies and metrics extraction...",
+                lambda r: self.extract_technologies_metrics_guided(transcript, assessments(r)),
+                depends_on=["assessments"], needs={"assessments": ["assessments"]}),
+            ExtractionPass(
+                "interventions", "  💊 Pass 4: Guided interventions extraction...",
+                lambda r: self.extract_interventions_guided(transcript, constructs(r)),
+                depends_on=["domains_constructs"], needs=constructs_field),
+            ExtractionPass(
+                "goals_constraints", "  🎯 Pass 5: Goals and constraints extraction...",
+                lambda r: self.extract_goals_constraints_guided(transcript, constructs(r)),
+                depends_on=["domains_constructs"], needs=constructs_field),
+            ExtractionPass(
+                "relationships", "  🔗 Pass 6: Relationships extraction...",
+                lambda r: self.extract_relationships_guided(transcript, {
+                    'constructs': r['domains_constructs'],
+                    'assessments': r['assessments'],
+                    'interventions': r['interventions']
+                }),
+                depends_on=["domains_constructs", "assessments", "interventions"]),
+            ExtractionPass(
+                "protocols", "  📋 Pass 7: Detailed protocols extraction...",
+                lambda r: self.extract_protocols_details(transcript, assessments(r), interventions(r)),
+                depends_on=["assessments", "interventions"],
+                needs={"assessments": ["assessments"], "interventions": ["interventions"]}),
+            ExtractionPass(
+                "validation", "  ✅ Pass 8: Ontology validation...",
+                lambda r: self.validate_ontology_coverage(transcript, {
+                    'constructs': r['domains_constructs'],
+                    'assessments': r['assessments'],
+                    'interventions': r['interventions'],
+                    'technologies': r['technologies_metrics'],
+                    'goals_constraints': r['goals_constraints'],
+                    'relationships': r['relationships'],
+                    'protocols': r['protocols']
+                }),
+                depends_on=["domains_constructs", "assessments", "interventions", "technologies_metrics",
+                            "goals_constraints", "relationships", "protocols"]),
+        ]
+    
+    def build_result(self, file_path: Path, transcript: str, outputs: Dict[str, Dict]) -> Dict:
+        """Assemble the ontology-guided per-file result"""
+        domains_constructs = outputs['domains_constructs']
+        assessments = outputs['assessments']
+        technologies_metrics = outputs['technologies_metrics']
+        interventions = outputs['interventions']
+        goals_constraints = outputs['goals_constraints']
+        relationships = outputs['relationships']
+        protocols = outputs['protocols']
+        validation = outputs['validation']
+        
+        constructs_list = self.entity_names(domains_constructs, "constructs_mentioned", "construct_name")
+        assessment_names = self.entity_names(assessments, "assessments", "assessment_name")
+        intervention_names = self.entity_names(interventions, "interventions", "intervention_name")
         
         # Calculate summary stats
         total_constructs = len(constructs_list)
@@ -911,97 +1490,145 @@ class OntologyGuidedExtractor(BaseOntologyExtractor):
             }
         }
         
-        print(f"  ✅ Found: {total_constructs} constructs, {total_assessments} assessments, {total_interventions} interventions")
-        print(f"     Technologies: {total_technologies}, Metrics: {total_metrics}")
+        self.log(f"  ✅ Found: {total_constructs} constructs, {total_assessments} assessments, {total_interventions} interventions")
+        self.log(f"     Technologies: {total_technologies}, Metrics: {total_metrics}")
         return result
+
+class FusedOntologyExtractor(BaseOntologyExtractor):
+    """Fused extraction: every entity type in one structured call, relationships and protocols in a second
     
-    def process_transcript_folder(self, folder_path: str) -> Dict:
-        """Process all transcripts using ontology-guided extraction with incremental processing"""
-        folder = Path(folder_path)
-        if not folder.exists():
-            raise ValueError(f"Folder does not exist: {folder_path}")
-        
-        # Load existing results
-        existing_results = self.load_existing_results()
-        processed_filenames = self.get_processed_filenames(existing_results)
-        
-        transcript_files = list(folder.glob("*.txt"))
-        if not transcript_files:
-            print(f"❌ No .txt files found in {folder_path}")
-            return existing_results or {"error": "No transcript files found"}
-        
-        # Filter for only new/unprocessed files
-        new_files = [f for f in transcript_files if f.name not in processed_filenames]
-        already_processed = [f for f in transcript_files if f.name in processed_filenames]
-        
-        print(f"📁 Found {len(transcript_files)} total transcript files")
-        print(f"✅ Already processed: {len(already_processed)} files")
-        print(f"🆕 New files to process: {len(new_files)} files")
-        
-        if not new_files:
-            print("🎉 All transcripts already processed!")
-            return existing_results
-        
-        # Process only new files
-        new_results = {
-            "processed_files": [],
-            "summary": {
-                "total_files": len(new_files),
-                "successful": 0,
-                "failed": 0,
-                "extraction_type": self.extraction_type,
-                "total_api_calls": 0
+    Replies are forced tool calls whose input schemas mirror the guided passes' JSON layouts, so the
+    result has the same shape as OntologyGuidedExtractor's. With fused_calls=1 (or EXTRACTION_FUSED_CALLS=1)
+    everything comes back from a single call. The validation pass is replaced by local coverage counts.
+    """
+    
+    def __init__(self, api_key=None, fused_calls: Optional[int] = None, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.fused_calls = fused_calls or int(os.getenv('EXTRACTION_FUSED_CALLS', 2))
+        if self.fused_calls not in (1, 2):
+            raise ValueError(f"fused_calls must be 1 or 2, got {self.fused_calls}")
+        self.extraction_type = f"Fused ({self.fused_calls}-call)"
+        self.structured_output = True  # Fused replies are always forced tool calls
+        if self.fused_calls == 1:
+            self.output_schemas = {"ontology": merge_schemas(FUSED_ENTITIES, FUSED_LINKS)}
+        else:
+            self.output_schemas = {"entities": FUSED_ENTITIES, "links": FUSED_LINKS}
+        print("✅ Fused Extractor initialized successfully")
+        print(f"🔄 Using {self.fused_calls}-call fused extraction with structured tool output")
+    
+    def extract_entities(self, transcript: str) -> Dict:
+        """Call 1: domains, constructs, assessments, technologies, metrics, interventions, goals and constraints"""
+        prompt = self.prompts.fused_entities(transcript)
+        return self.run_prompt(prompt, max_tokens=12000, tool=self.output_tool("entities"))
+    
+    def extract_links(self, transcript: str, entities: Dict) -> Dict:
+        """Call 2: relationships and protocols for the entities from call 1"""
+        prompt = self.prompts.fused_links(
+            transcript,
+            self.entity_names(entities, 'constructs_mentioned', 'construct_name'),
+            self.entity_names(entities, 'assessments', 'assessment_name'),
+            self.entity_names(entities, 'interventions', 'intervention_name'))
+        return self.run_prompt(prompt, max_tokens=8000, tool=self.output_tool("links"))
+    
+    def extract_all(self, transcript: str) -> Dict:
+        """Single call: everything the two fused calls return"""
+        prompt = self.prompts.fused_all(transcript)
+        return self.run_prompt(prompt, max_tokens=16000, tool=self.output_tool("ontology"))
+    
+    def build_pass_graph(self, transcript: str) -> List[ExtractionPass]:
+        """Declare the fused call(s)"""
+        if self.fused_calls == 1:
+            return [ExtractionPass("all", "  🧩 Fused call: entities, relationships and protocols...",
+                                   lambda r: self.extract_all(transcript))]
+        return [
+            ExtractionPass("entities", "  🧩 Fused call 1: all entities...",
+                           lambda r: self.extract_entities(transcript)),
+            ExtractionPass("links", "  🔗 Fused call 2: relationships and protocols...",
+                           lambda r: self.extract_links(transcript, r['entities']),
+                           depends_on=["entities"]),
+        ]
+    
+    def build_result(self, file_path: Path, transcript: str, outputs: Dict[str, Dict]) -> Dict:
+        """Split the fused output(s) into the ontology-guided per-file layout"""
+        if self.fused_calls == 1:
+            entities = links = outputs['all']
+        else:
+            entities, links = outputs['entities'], outputs['links']
+        domains_constructs, assessments, technologies_metrics, interventions, goals_constraints = split_output(
+            entities, [DOMAINS_CONSTRUCTS, ASSESSMENTS, TECHNOLOGIES_METRICS, INTERVENTIONS, GOALS_CONSTRAINTS])
+        relationships, protocols = split_output(links, [RELATIONSHIPS, PROTOCOLS])
+        
+        counts = {
+            "constructs_identified": len(domains_constructs.get('constructs_mentioned', [])),
+            "assessments_identified": len(assessments.get('assessments', [])),
+            "interventions_identified": len(interventions.get('interventions', [])),
+            "technologies_identified": len(technologies_metrics.get('technologies', [])),
+            "metrics_identified": len(technologies_metrics.get('metrics', []))
+        }
+        result = {
+            "file_name": file_path.name,
+            "transcript_length": len(transcript),
+            "constructs_identified": counts["constructs_identified"],
+            
+            # Same layout as the ontology-guided extractor
+            "domains_constructs": domains_constructs,
+            "assessments": assessments,
+            "interventions": interventions,
+            "relationships": relationships,
+            "ontology_guided_data": {
+                "technologies_metrics": technologies_metrics,
+                "goals_constraints": goals_constraints,
+                "detailed_protocols": protocols,
+                "validation": {"ontology_coverage_check": counts}
             }
         }
         
-        for i, file_path in enumerate(new_files, 1):
-            try:
-                print(f"\n[{i}/{len(new_files)}] Processing new file: {file_path.name}")
-                file_result = self.process_single_transcript(file_path)
-                new_results["processed_files"].append(file_result)
-                new_results["summary"]["successful"] += 1
-                new_results["summary"]["total_api_calls"] += 8  # 8 passes
-                
-                # Small delay for API rate limiting
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"❌ Error processing {file_path.name}: {e}")
-                new_results["processed_files"].append({
-                    "file_name": file_path.name,
-                    "error": str(e)
-                })
-                new_results["summary"]["failed"] += 1
-        
-        # Merge with existing results
-        final_results = self.merge_results(existing_results, new_results)
-        
-        print(f"\n📊 MERGE SUMMARY:")
-        print(f"   Existing files preserved: {len(already_processed)}")
-        print(f"   New files processed: {len(new_files)}")
-        print(f"   Total files in results: {final_results['summary']['total_files']}")
-        print(f"   New API calls made: {new_results['summary']['total_api_calls']}")
-        print(f"   Total API calls (all time): {final_results['summary']['total_api_calls']}")
-        
-        return final_results
+        self.log(f"  ✅ Found: {counts['constructs_identified']} constructs, {counts['assessments_identified']} assessments, "
+                 f"{counts['interventions_identified']} interventions")
+        self.log(f"     Technologies: {counts['technologies_identified']}, Metrics: {counts['metrics_identified']}")
+        return result
 
 # Factory function for easy extractor selection
-def create_extractor(extractor_type: str = "standard", api_key: Optional[str] = None):
+def create_extractor(extractor_type: str = "standard", api_key: Optional[str] = None, async_mode: bool = False,
+                     batch_mode: bool = False, **kwargs):
     """
     Factory function to create the appropriate extractor
     
     Args:
-        extractor_type: "standard" for 4-pass, "robust" for 7-pass, or "guided" for 8-pass ontology-guided
+        extractor_type: "standard" for 4-pass, "robust" for 7-pass, "guided" for 8-pass ontology-guided,
+            or "fused" for one or two structured calls
         api_key: Optional API key
+        async_mode: Use the asyncio variant built on AsyncAnthropic
+        batch_mode: Use the Message Batches variant for bulk runs (half price, results in minutes to hours)
+        **kwargs: Extra extractor options (e.g. max_workers, chunk_tokens)
     
     Returns:
         Configured extractor instance
     """
-    if extractor_type.lower() in ["guided", "ontology-guided", "8-pass", "ontology"]:
-        return OntologyGuidedExtractor(api_key=api_key)
+    if async_mode and batch_mode:
+        raise ValueError("Choose either async_mode or batch_mode, not both")
+    
+    if batch_mode:
+        from src.batch_extractor import (BatchOntologyExtractor, BatchRobustOntologyExtractor, BatchOntologyGuidedExtractor,
+                                         BatchFusedOntologyExtractor)
+        guided_cls, robust_cls, standard_cls = BatchOntologyGuidedExtractor, BatchRobustOntologyExtractor, BatchOntologyExtractor
+        fused_cls = BatchFusedOntologyExtractor
+    elif async_mode:
+        from src.async_extractor import (AsyncOntologyExtractor, AsyncRobustOntologyExtractor, AsyncOntologyGuidedExtractor,
+                                         AsyncFusedOntologyExtractor)
+        guided_cls, robust_cls, standard_cls = AsyncOntologyGuidedExtractor, AsyncRobustOntologyExtractor, AsyncOntologyExtractor
+        fused_cls = AsyncFusedOntologyExtractor
+    else:
+        guided_cls, robust_cls, standard_cls = OntologyGuidedExtractor, RobustOntologyExtractor, OntologyExtractor
+        fused_cls = FusedOntologyExtractor
+    
+    if extractor_type.lower() in ["fused", "single-call"]:
+        return fused_cls(api_key=api_key, **kwargs)
+    elif extractor_type.lower() in ["guided", "ontology-guided", "8-pass", "ontology"]:
+        return guided_cls(api_key=api_key, **kwargs)
     elif extractor_type.lower() in ["robust", "7-pass", "enhanced"]:
-        return RobustOntologyExtractor(api_key=api_key)
+        return robust_cls(api_key=api_key, **kwargs)
     elif extractor_type.lower() in ["standard", "4-pass", "original"]:
-        return OntologyExtractor(api_key=api_key)
+        return standard_cls(api_key=api_key, **kwargs)
     else:
-        raise ValueError(f"Unknown extractor type: {extractor_type}. Use 'standard', 'robust', or 'guided'")
\ No newline at end of file
+        raise ValueError(f"Unknown extractor type: {extractor_type}. Use 'standard', 'robust', 'guided' or 'fused'")
@@ -0,0 +1,175 @@
+# src/graph_figure.py
+"""
+Plotly figures for the explorer's relationship graph
+SVG traces for small graphs; WebGL traces with level-of-detail labels once graphs get large
+"""
+
+import json
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import networkx as nx
+import plotly.graph_objects as go
+
+NODE_COLORS = {
+    'construct': '#4a148c',
+    'assessment': '#0277bd',
+    'intervention': '#2e7d32'
+}
+
+# "auto" renders with WebGL above this many visible nodes
+RENDERERS = ["auto", "svg", "webgl"]
+WEBGL_NODE_THRESHOLD = 150
+
+# In WebGL mode only this many of the best-connected nodes (plus the isolated node and its
+# neighbours) get a text label; every node still shows its name on hover
+WEBGL_LABELLED_NODES = 40
+COORDINATE_DECIMALS = 4
+
+# Payload sizes are estimated from this many values of each array rather than by serialising the figure
+PAYLOAD_SAMPLE = 50
+
+
+def choose_renderer(renderer: str, node_count: int) -> str:
+    """Resolve "auto" to "svg" or "webgl" for this many visible nodes"""
+    if renderer == "auto":
+        return "webgl" if node_count > WEBGL_NODE_THRESHOLD else "svg"
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown renderer '{renderer}' (choose from {', '.join(RENDERERS)})")
+    return renderer
+
+
+def _edge_coordinates(G: nx.DiGraph, pos: Dict, visible: Set[str]):
+    """All visible edges as one polyline (None breaks between segments), plus each edge's midpoint"""
+    edge_x, edge_y, midpoints = [], [], []
+    for src, tgt in G.edges():
+        if src in visible and tgt in visible:
+            x0, y0 = pos[src]
+            x1, y1 = pos[tgt]
+            edge_x.extend([x0, x1, None])
+            edge_y.extend([y0, y1, None])
+            midpoints.append(((src, tgt), (x0 + x1) / 2, (y0 + y1) / 2))
+    return edge_x, edge_y, midpoints
+
+
+def _svg_traces(G, pos, node_types, edge_labels, visible, show_edge_labels):
+    """The original rendering: every node labelled, one annotation per edge label"""
+    edge_x, edge_y, midpoints = _edge_coordinates(G, pos, visible)
+    nodes = list(visible)
+    edge_trace = go.Scatter(x=edge_x, y=edge_y, mode='lines',
+                            line=dict(width=1, color='#ccc'), hoverinfo='none')
+    node_trace = go.Scatter(x=[pos[n][0] for n in nodes], y=[pos[n][1] for n in nodes], mode='markers+text',
+                            text=nodes, textposition='top center',
+                            hoverinfo='text',
+                            marker=dict(color=[NODE_COLORS.get(node_types.get(n, 'construct'), '#999') for n in nodes],
+                                        size=10, line=dict(width=1, color='black')))
+
+    annotations = []
+    if show_edge_labels:
+        annotations = [dict(x=x, y=y, text=edge_labels.get(edge, ''), showarrow=False, font=dict(size=10),
+                            xanchor="center", yanchor="middle")
+                       for edge, x, y in midpoints]
+    return [edge_trace, node_trace], annotations, len(nodes)
+
+
+def _webgl_traces(G, pos, node_types, edge_labels, visible, show_edge_labels, focus):
+    """Scattergl traces: edges bundled into one trace, labels only on high-degree and focused nodes
+
+    Coordinates are rounded and each node type is one single-colour trace, to keep the payload small.
+    """
+    pos = {node: (round(x, COORDINATE_DECIMALS), round(y, COORDINATE_DECIMALS)) for node, (x, y) in pos.items()}
+    edge_x, edge_y, midpoints = _edge_coordinates(G, pos, visible)
+    degree = dict(G.degree(visible))
+    labelled = sorted(visible, key=lambda n: degree[n], reverse=True)[:WEBGL_LABELLED_NODES]
+    labelled = set(labelled) | (focus & visible)
+
+    traces = [go.Scattergl(x=edge_x, y=edge_y, mode='lines', line=dict(width=1, color='#ccc'), hoverinfo='none')]
+    if show_edge_labels and midpoints:
+        # Edge labels as hover text on one trace of invisible midpoint markers, not one annotation each
+        traces.append(go.Scattergl(x=[x for _, x, _ in midpoints], y=[y for _, _, y in midpoints], mode='markers',
+                                   marker=dict(size=6, color='rgba(0,0,0,0)'), hoverinfo='text',
+                                   hovertext=[f"{src} → {tgt}: {edge_labels.get((src, tgt), '')}"
+                                              for (src, tgt), _, _ in midpoints]))
+
+    for node_type, color in NODE_COLORS.items():
+        nodes = [n for n in visible if node_types.get(n, 'construct') == node_type]
+        if nodes:
+            traces.append(go.Scattergl(x=[pos[n][0] for n in nodes], y=[pos[n][1] for n in nodes], mode='markers',
+                                       hoverinfo='text', hovertext=nodes,
+                                       marker=dict(color=color, size=[8 + min(degree[n], 12) for n in nodes],
+                                                   line=dict(width=1, color='black'))))
+    traces.append(go.Scattergl(x=[pos[n][0] for n in labelled], y=[pos[n][1] for n in labelled], mode='text',
+                               text=list(labelled), textposition='top center', hoverinfo='skip'))
+    return traces, [], len(labelled)
+
+
+@lru_cache(maxsize=1)
+def _empty_figure_bytes() -> int:
+    """Size of an empty figure's JSON: the layout and template every figure carries"""
+    return len(go.Figure().to_json())
+
+
+def _sampled_bytes(values: Sequence) -> int:
+    """Approximate JSON size of an array, from the mean encoded length of its first values"""
+    if not values:
+        return 2
+    sample = values[:PAYLOAD_SAMPLE]
+    mean = sum(len(json.dumps(value)) for value in sample) / len(sample)
+    return int(mean * len(values)) + len(values) + 1
+
+
+def estimate_payload_kb(traces: List, annotations: List[Dict]) -> float:
+    """Approximate size of the figure JSON sent to the browser, in KB
+
+    The coordinate, label, hover-text and marker arrays are nearly all of it; each is sized from a
+    sample of its values, which is far cheaper than fig.to_json() on every render.
+    """
+    size = _empty_figure_bytes() + _sampled_bytes(annotations)
+    for trace in traces:
+        arrays = [trace[key] for key in ("x", "y", "text", "hovertext")]
+        arrays += [trace.marker[key] for key in ("color", "size")]
+        size += sum(_sampled_bytes(array) for array in arrays if isinstance(array, (list, tuple)))
+    return round(size / 1024, 1)
+
+
+def build_network_figure(G: nx.DiGraph, pos: Dict, node_types: Dict[str, str], edge_labels: Dict[Tuple[str, str], str],
+                         visible: Iterable[str], show_edge_labels: bool = False, context_label: str = "",
+                         renderer: str = "auto", focus: Optional[Iterable[str]] = None) -> Tuple[go.Figure, Dict]:
+    """The graph figure for the visible nodes, plus build statistics
+
+    The statistics give the renderer used, node and edge counts, labelled nodes, the Python-side
+    build time and an estimate of the size of the figure JSON sent to the browser (see estimate_payload_kb).
+    """
+    started = time.perf_counter()
+    visible = set(visible)
+    renderer = choose_renderer(renderer, len(visible))
+    if renderer == "webgl":
+        traces, annotations, labelled = _webgl_traces(G, pos, node_types, edge_labels, visible, show_edge_labels,
+                                                      set(focus or ()))
+    else:
+        traces, annotations, labelled = _svg_traces(G, pos, node_types, edge_labels, visible, show_edge_labels)
+
+    fig = go.Figure(data=traces)
+    fig.update_layout(
+        title=f"Ontology Graph – {context_label}",
+        title_font_size=18,
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(b=20, l=5, r=5, t=40),
+        xaxis=dict(showgrid=False, zeroline=False),
+        yaxis=dict(showgrid=False, zeroline=False),
+        height=600,
+        annotations=annotations
+    )
+    build_s = time.perf_counter() - started
+
+    stats = {
+        "renderer": renderer,
+        "nodes": len(visible),
+        "edges": sum(1 for src, tgt in G.edges() if src in visible and tgt in visible),
+        "labelled_nodes": labelled,
+        "build_ms": round(build_s * 1000, 1),
+        "payload_kb": estimate_payload_kb(traces, annotations)
+    }
+    return fig, stats
@@ -0,0 +1,198 @@
+# src/graph_layout.py
+"""
+Relationship graph construction and layout for the explorer app
+Layouts are persisted per view, so a grown graph keeps its old positions and only new nodes are placed
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from src.atomic_io import write_json_atomic
+from src.canonicalisation import canonical_names
+
+DEFAULT_LAYOUT_PATH = "data/outputs/graph_layouts.json"
+
+NODE_TYPES = ["construct", "assessment", "intervention"]
+
+# "auto" uses networkx's spring layout for small graphs and the vectorised layout above this many
+# nodes (networkx itself switches to a per-node Python loop, which needs SciPy, from 500 nodes)
+LAYOUT_BACKENDS = ["auto", "spring", "vectorised"]
+VECTORISED_LAYOUT_THRESHOLD = 500
+
+SPRING_K = 0.7
+LAYOUT_ITERATIONS = 50
+LAYOUT_SEED = 42
+
+# Rows of the pairwise repulsion computed at once (bounds memory to a few BLOCK x nodes float32 arrays)
+REPULSION_BLOCK = 1024
+
+Positions = Dict[str, Tuple[float, float]]
+
+
+def build_graph(relationships: Dict, node_types: Iterable[str],
+                canonical: Optional[Dict] = None) -> Tuple[nx.DiGraph, Dict[str, str], Dict[Tuple[str, str], str]]:
+    """Directed graph of the relationships between nodes of the selected types
+
+    With a canonical-name mapping, spelling variants of an entity become one node.
+    Returns the graph, each node's type and each edge's label.
+    """
+    selected = set(node_types)
+    names = {node_type: canonical_names(canonical, node_type + "s") for node_type in NODE_TYPES}
+    G = nx.DiGraph()
+    types = {}
+    edge_labels = {}
+
+    def add_edge(src, src_type, tgt, tgt_type, label):
+        if src_type in selected and tgt_type in selected:
+            src = names[src_type].get(src, src)
+            tgt = names[tgt_type].get(tgt, tgt)
+            G.add_edge(src, tgt)
+            types[src] = src_type
+            types[tgt] = tgt_type
+            edge_labels[(src, tgt)] = label
+
+    for rel in relationships.get('construct_relationships', []):
+        add_edge(rel['source_construct'], 'construct', rel['target_construct'], 'construct',
+                 rel.get('relationship_type', ''))
+
+    for rel in relationships.get('assessment_construct_links', []):
+        for c in rel.get('constructs_measured', []):
+            add_edge(rel['assessment_name'], 'assessment', c, 'construct',
+                     rel.get('measurement_relationship', 'measures'))
+
+    for rel in relationships.get('intervention_construct_links', []):
+        for c in rel.get('constructs_targeted', []):
+            add_edge(rel['intervention_name'], 'intervention', c, 'construct', 'targets')
+
+    for rel in relationships.get('assessment_intervention_connections', []):
+        add_edge(rel['assessment_name'], 'assessment', rel['intervention_name'], 'intervention',
+                 rel.get('connection_type', 'informs'))
+
+    return G, types, edge_labels
+
+
+def vectorised_layout(G: nx.Graph, k: Optional[float] = None, pos: Optional[Positions] = None,
+                      fixed: Optional[Iterable[str]] = None, iterations: int = LAYOUT_ITERATIONS,
+                      seed: int = LAYOUT_SEED) -> Positions:
+    """Fruchterman-Reingold force-directed layout computed with whole-array NumPy operations
+
+    Same model and cooling schedule as networkx's spring_layout, but repulsion is computed in
+    float32 blocks and attraction only along edges, so large graphs stay fast without SciPy.
+    Nodes in `fixed` keep their `pos`; as in networkx, the result is only rescaled to [-1, 1]
+    when nothing is fixed.
+    """
+    nodes = list(G)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    if n == 1 and not pos:
+        return {nodes[0]: (0.0, 0.0)}
+
+    rng = np.random.default_rng(seed)
+    xy = rng.random((n, 2), dtype=np.float32)
+    if pos:
+        for i, node in enumerate(nodes):
+            if node in pos:
+                xy[i] = pos[node]
+    fixed = set(fixed or ())
+    movable = np.array([node not in fixed for node in nodes])
+
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges() if u != v], dtype=np.int64).reshape(-1, 2)
+    k = np.float32(k if k is not None else np.sqrt(1.0 / n))
+
+    t = max(np.ptp(xy[:, 0]), np.ptp(xy[:, 1])) * 0.1
+    dt = t / (iterations + 1)
+    for _ in range(iterations):
+        displacement = np.empty_like(xy)
+        x, y = xy[:, 0], xy[:, 1]
+        for start in range(0, n, REPULSION_BLOCK):
+            dx = x[start:start + REPULSION_BLOCK, None] - x[None, :]
+            dy = y[start:start + REPULSION_BLOCK, None] - y[None, :]
+            weight = k * k / np.maximum(dx * dx + dy * dy, 1e-4)
+            displacement[start:start + REPULSION_BLOCK, 0] = (dx * weight).sum(axis=1)
+            displacement[start:start + REPULSION_BLOCK, 1] = (dy * weight).sum(axis=1)
+
+        if len(edges):
+            delta = xy[edges[:, 0]] - xy[edges[:, 1]]
+            pull = delta * (np.sqrt(np.einsum("ij,ij->i", delta, delta)) / k)[:, None]
+            np.add.at(displacement, edges[:, 0], -pull)
+            np.add.at(displacement, edges[:, 1], pull)
+
+        length = np.sqrt(np.einsum("ij,ij->i", displacement, displacement))
+        length = np.where(length < 0.01, 0.1, length)
+        step = displacement * (t / length)[:, None]
+        xy[movable] += step[movable]
+        t -= dt
+
+    if not fixed:
+        xy = nx.rescale_layout(xy.astype(np.float64))
+    return {node: (float(x), float(y)) for node, (x, y) in zip(nodes, xy)}
+
+
+def choose_backend(backend: str, node_count: int) -> str:
+    """Resolve "auto" to a concrete layout backend for a graph of this size"""
+    if backend == "auto":
+        return "vectorised" if node_count > VECTORISED_LAYOUT_THRESHOLD else "spring"
+    if backend not in LAYOUT_BACKENDS:
+        raise ValueError(f"Unknown layout backend '{backend}' (choose from {', '.join(LAYOUT_BACKENDS)})")
+    return backend
+
+
+def compute_layout(G: nx.Graph, previous: Optional[Positions] = None, backend: str = "auto") -> Positions:
+    """Positions for every node, keeping previously placed nodes where they were
+
+    With no new nodes the previous positions are reused as they are; otherwise only the new nodes
+    are laid out, around the fixed old ones.
+    """
+    previous = previous or {}
+    known = [node for node in G if node in previous]
+    if len(known) == len(G):
+        return {node: tuple(previous[node]) for node in G}
+
+    backend = choose_backend(backend, len(G))
+    initial = {node: previous[node] for node in known} or None
+    if backend == "vectorised":
+        return vectorised_layout(G, k=SPRING_K, pos=initial, fixed=known or None)
+    layout = nx.spring_layout(G, k=SPRING_K, pos=initial, fixed=known or None, seed=LAYOUT_SEED)
+    return {node: (float(x), float(y)) for node, (x, y) in layout.items()}
+
+
+class LayoutStore:
+    """Node positions per view (e.g. a transcript or the full ontology), saved as one JSON file"""
+
+    def __init__(self, path: str = DEFAULT_LAYOUT_PATH):
+        self.path = Path(path)
+
+    def _read(self) -> Dict[str, Dict[str, List[float]]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def get(self, view: str) -> Positions:
+        return {node: tuple(xy) for node, xy in self._read().get(view, {}).items()}
+
+    def update(self, view: str, positions: Positions):
+        """Merge positions into a view's saved layout (nodes filtered out of this graph keep theirs)"""
+        layouts = self._read()
+        saved = layouts.setdefault(view, {})
+        if all(tuple(saved.get(node, ())) == tuple(xy) for node, xy in positions.items()):
+            return
+        saved.update({node: [round(x, 5), round(y, 5)] for node, (x, y) in positions.items()})
+        write_json_atomic(self.path, layouts, ensure_ascii=False)
+
+
+def layout_for_view(G: nx.Graph, view: str, backend: str = "auto", store: Optional[LayoutStore] = None) -> Positions:
+    """Lay out a view's graph incrementally from its saved layout, and save the result"""
+    store = store or LayoutStore()
+    positions = compute_layout(G, store.get(view), backend)
+    store.update(view, positions)
+    return positions
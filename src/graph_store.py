@@ -0,0 +1,405 @@
+# src/graph_store.py
+"""
+Persistent graph of the merged ontology
+Canonical entities and their relationships across all transcripts in SQLite, indexed for neighbour and path queries
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.canonicalisation import (ENTITY_FIELDS, canonical_key, canonical_names, canonical_settings,
+                                  refresh_canonical_map)
+from src.entity_catalog import results_source, source_signature
+from src.results_store import DEFAULT_STORE_DIR, LEGACY_RESULTS_FILE, load_results
+
+GRAPH_FILE = "ontology_graph.sqlite"
+
+# Bump when the schema or the way results are loaded changes so stale stores are rebuilt
+GRAPH_VERSION = 1
+
+# Entity type in the results -> node type in the graph
+NODE_TYPES = {
+    "domains": "domain",
+    "constructs": "construct",
+    "assessments": "assessment",
+    "interventions": "intervention",
+    "technologies": "technology",
+    "metrics": "metric",
+}
+
+# Relation -> (source node type, target node type)
+RELATIONS = {
+    "relates_to": ("construct", "construct"),
+    "measures": ("assessment", "construct"),
+    "targets": ("intervention", "construct"),
+    "informs": ("assessment", "intervention"),
+    "used_for": ("technology", "assessment"),
+    "metric_of": ("metric", "assessment"),
+}
+
+DEFAULT_MAX_PATH_DEPTH = 6
+
+
+def graph_path(source: Path) -> Path:
+    """Where the graph store for a results source lives (next to it)"""
+    return source.parent / GRAPH_FILE
+
+
+def result_edges(file_data: Dict) -> Iterator[Tuple[str, str, str, str]]:
+    """(relation, source name, target name, label) for every relationship in one transcript's result
+
+    The relationships pass comes first, so its labels win over the links listed on the entities themselves.
+    """
+    relationships = file_data.get('relationships', {})
+    for rel in relationships.get('construct_relationships', []):
+        yield "relates_to", rel.get('source_construct'), rel.get('target_construct'), rel.get('relationship_type', '')
+    for rel in relationships.get('assessment_construct_links', []):
+        for construct in rel.get('constructs_measured', []):
+            yield "measures", rel.get('assessment_name'), construct, rel.get('measurement_relationship', 'measures')
+    for rel in relationships.get('intervention_construct_links', []):
+        for construct in rel.get('constructs_targeted', []):
+            yield "targets", rel.get('intervention_name'), construct, 'targets'
+    for rel in relationships.get('assessment_intervention_connections', []):
+        yield "informs", rel.get('assessment_name'), rel.get('intervention_name'), rel.get('connection_type', 'informs')
+
+    for assessment in file_data.get('assessments', {}).get('assessments', []):
+        for construct in assessment.get('constructs_measured', []):
+            yield "measures", assessment.get('assessment_name'), construct, 'measures'
+    for intervention in file_data.get('interventions', {}).get('interventions', []):
+        for construct in intervention.get('constructs_targeted', []):
+            yield "targets", intervention.get('intervention_name'), construct, 'targets'
+
+    tech_metrics = file_data.get('ontology_guided_data', {}).get('technologies_metrics', {})
+    for tech in tech_metrics.get('technologies', []):
+        for assessment in tech.get('used_for_assessments', []):
+            yield "used_for", tech.get('technology_name'), assessment, 'used for'
+    for metric in tech_metrics.get('metrics', []):
+        yield "metric_of", metric.get('metric_name'), metric.get('assessment_source'), 'metric of'
+
+
+class GraphStore:
+    """The merged ontology as nodes, aliases and per-transcript edges in one SQLite file
+
+    Nodes are canonical entities (one per type and canonical name); every spelling seen in the
+    results is an alias, looked up by its canonical key. An edge row records that one transcript
+    states a relation between two nodes, so "across transcripts" queries just group the rows.
+    Edges are indexed from both ends, so neighbour lookups touch only the rows they return.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection shared by all threads, serialised by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS nodes (
+                id INTEGER PRIMARY KEY,
+                type TEXT NOT NULL,
+                name TEXT NOT NULL,
+                UNIQUE (type, name)
+            );
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias_key TEXT NOT NULL,
+                node_id INTEGER NOT NULL REFERENCES nodes(id),
+                UNIQUE (alias_key, node_id)
+            );
+            CREATE TABLE IF NOT EXISTS edges (
+                src INTEGER NOT NULL REFERENCES nodes(id),
+                tgt INTEGER NOT NULL REFERENCES nodes(id),
+                relation TEXT NOT NULL,
+                label TEXT NOT NULL,
+                file TEXT NOT NULL,
+                UNIQUE (src, tgt, relation, file)
+            );
+            CREATE INDEX IF NOT EXISTS idx_edges_src ON edges(src, relation);
+            CREATE INDEX IF NOT EXISTS idx_edges_tgt ON edges(tgt, relation);
+        """)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Building
+
+    def meta(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT key, value FROM meta"))
+
+    def update_meta(self, meta: Dict):
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                   [(key, str(value)) for key, value in meta.items()])
+
+    def rebuild(self, data: Dict, canonical: Optional[Dict] = None, meta: Optional[Dict[str, str]] = None) -> Dict:
+        """Replace the whole graph with the one in these results, in one transaction
+
+        Readers see the old graph until the new one is committed. Returns the node and edge counts.
+        """
+        names = {node_type: canonical_names(canonical, entity_type) for entity_type, node_type in NODE_TYPES.items()}
+        node_ids: Dict[Tuple[str, str], int] = {}
+        aliases = set()
+
+        def node(node_type: str, name: str) -> int:
+            canonical_name = names[node_type].get(name, name)
+            node_id = node_ids.get((node_type, canonical_name))
+            if node_id is None:
+                node_id = node_ids[(node_type, canonical_name)] = len(node_ids) + 1
+                aliases.add((canonical_key(canonical_name), node_id))
+            aliases.add((canonical_key(name), node_id))
+            return node_id
+
+        edges = {}
+        for file_data in data.get('processed_files', []):
+            if 'error' in file_data:
+                continue
+            file_name = file_data.get('file_name', 'Unknown')
+            for entity_type, path, name_field in ENTITY_FIELDS:
+                items = file_data
+                for key in path:
+                    items = items.get(key, {}) if isinstance(items, dict) else {}
+                for item in items or []:
+                    if isinstance(item, dict) and item.get(name_field):
+                        node(NODE_TYPES[entity_type], item[name_field])
+            for relation, src, tgt, label in result_edges(file_data):
+                if src and tgt:
+                    src_type, tgt_type = RELATIONS[relation]
+                    edge = (node(src_type, src), node(tgt_type, tgt), relation, file_name)
+                    edges.setdefault(edge, label or relation)
+
+        with self._lock, self._conn:
+            for table in ("edges", "aliases", "nodes", "meta"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.executemany("INSERT INTO nodes (id, type, name) VALUES (?, ?, ?)",
+                                   [(node_id, node_type, name) for (node_type, name), node_id in node_ids.items()])
+            self._conn.executemany("INSERT INTO aliases (alias_key, node_id) VALUES (?, ?)", sorted(aliases))
+            self._conn.executemany("INSERT INTO edges (src, tgt, relation, file, label) VALUES (?, ?, ?, ?, ?)",
+                                   [edge + (label,) for edge, label in edges.items()])
+            self._conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                   [(key, str(value)) for key, value in (meta or {}).items()])
+        return {"nodes": len(node_ids), "edges": len(edges)}
+
+    # Queries
+
+    def find(self, name: str, node_type: Optional[str] = None) -> List[Dict]:
+        """Nodes a name refers to: its canonical entity, whichever spelling is used (one per type)"""
+        # CROSS JOIN keeps SQLite from scanning every node of the type before looking at the alias
+        query = ("SELECT DISTINCT n.id, n.type, n.name FROM aliases a CROSS JOIN nodes n ON n.id = a.node_id "
+                 "WHERE a.alias_key = ?")
+        params = [canonical_key(name)]
+        if node_type:
+            query += " AND n.type = ?"
+            params.append(node_type)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY n.type", params).fetchall()
+        return [{"id": node_id, "type": kind, "name": node_name} for node_id, kind, node_name in rows]
+
+    def _node_ids(self, name: str, node_type: Optional[str]) -> List[int]:
+        return [node["id"] for node in self.find(name, node_type)]
+
+    def _linked(self, name: str, node_type: Optional[str], relation: Optional[str],
+                direction: str) -> List[Dict]:
+        """Nodes linked to a name's node(s), one row per (node, relation, direction), with the transcripts saying so"""
+        ids = self._node_ids(name, node_type)
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        relation_filter = " AND e.relation = ?" if relation else ""
+        selects, params = [], []
+        if direction in ("out", "both"):
+            selects.append(f"SELECT e.tgt AS other, e.relation, 'out' AS direction, e.label, e.file FROM edges e "
+                           f"WHERE e.src IN ({marks}){relation_filter}")
+            params += ids + ([relation] if relation else [])
+        if direction in ("in", "both"):
+            selects.append(f"SELECT e.src AS other, e.relation, 'in' AS direction, e.label, e.file FROM edges e "
+                           f"WHERE e.tgt IN ({marks}){relation_filter}")
+            params += ids + ([relation] if relation else [])
+        if not selects:
+            raise ValueError(f"Unknown direction '{direction}' (choose from out, in, both)")
+
+        # Grouped here rather than with GROUP_CONCAT, as labels and file names may contain its separator
+        query = (f"SELECT DISTINCT l.other, n.name, n.type, l.relation, l.direction, l.label, l.file "
+                 f"FROM ({' UNION ALL '.join(selects)}) l JOIN nodes n ON n.id = l.other")
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        grouped = {}
+        for other_id, other, kind, rel, way, label, file_name in rows:
+            row = grouped.setdefault((other_id, rel, way), {"name": other, "type": kind, "relation": rel,
+                                                            "direction": way, "labels": set(), "files": set()})
+            row["labels"].add(label)
+            row["files"].add(file_name)
+        linked = [dict(row, labels=sorted(row["labels"]), files=sorted(row["files"])) for row in grouped.values()]
+        linked.sort(key=lambda row: (-len(row["files"]), row["name"]))
+        return linked
+
+    def neighbours(self, name: str, node_type: Optional[str] = None, relation: Optional[str] = None,
+                   direction: str = "both") -> List[Dict]:
+        """Everything linked to an entity ("out" to targets, "in" from sources, or "both"), most-attested first
+
+        Each row gives the neighbour's name and type, the relation and its direction, the labels the
+        transcripts used and the transcripts it was found in.
+        """
+        return self._linked(name, node_type, relation, direction)
+
+    def assessments_measuring(self, construct: str) -> List[Dict]:
+        """Assessments that measure a construct, across transcripts, most-attested first"""
+        return self._linked(construct, "construct", "measures", "in")
+
+    def interventions_targeting(self, construct: str) -> List[Dict]:
+        """Interventions that target a construct, across transcripts, most-attested first"""
+        return self._linked(construct, "construct", "targets", "in")
+
+    def shortest_path(self, source: str, target: str, max_depth: int = DEFAULT_MAX_PATH_DEPTH,
+                      directed: bool = False) -> Optional[List[Dict]]:
+        """The fewest hops from one entity to another, as the list of nodes along the way
+
+        Searches from both ends at once, one indexed query per level, so only the neighbourhoods
+        actually reached are read. Edges are followed either way unless `directed`. None if the
+        entities aren't connected within max_depth hops.
+        """
+        starts, goals = set(self._node_ids(source, None)), set(self._node_ids(target, None))
+        if not starts or not goals:
+            return None
+        common = starts & goals
+        if common:
+            return self._path_nodes([min(common)])
+
+        # Predecessor maps per side: node -> the node it was reached from (None for the start nodes)
+        forward = dict.fromkeys(starts)
+        backward = dict.fromkeys(goals)
+        forward_frontier, backward_frontier = set(starts), set(goals)
+        for _ in range(max_depth):
+            # Expand the smaller frontier
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier = self._expand(forward_frontier, forward, "out" if directed else "both")
+                frontier, seen_other = forward_frontier, backward
+            else:
+                backward_frontier = self._expand(backward_frontier, backward, "in" if directed else "both")
+                frontier, seen_other = backward_frontier, forward
+            meeting = [node_id for node_id in frontier if node_id in seen_other]
+            if meeting:
+                return self._path_nodes(self._join(min(meeting), forward, backward))
+            if not frontier:
+                return None
+        return None
+
+    def _expand(self, frontier: set, seen: Dict, direction: str) -> set:
+        """The unseen nodes one hop from the frontier, recorded in `seen` with the node they came from"""
+        frontier = list(frontier)
+        found = set()
+        for start in range(0, len(frontier), 500):
+            chunk = frontier[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            selects, params = [], []
+            if direction in ("out", "both"):
+                selects.append(f"SELECT src, tgt FROM edges WHERE src IN ({marks})")
+                params += chunk
+            if direction in ("in", "both"):
+                selects.append(f"SELECT tgt, src FROM edges WHERE tgt IN ({marks})")
+                params += chunk
+            with self._lock:
+                rows = self._conn.execute(" UNION ".join(selects), params).fetchall()
+            for node_id, other in rows:
+                if other not in seen:
+                    seen[other] = node_id
+                    found.add(other)
+        return found
+
+    @staticmethod
+    def _join(meeting: int, forward: Dict, backward: Dict) -> List[int]:
+        path = []
+        node_id = meeting
+        while node_id is not None:
+            path.append(node_id)
+            node_id = forward[node_id]
+        path.reverse()
+        node_id = backward[meeting]
+        while node_id is not None:
+            path.append(node_id)
+            node_id = backward[node_id]
+        return path
+
+    def _path_nodes(self, ids: List[int]) -> List[Dict]:
+        marks = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id, type, name FROM nodes WHERE id IN ({marks})", ids).fetchall()
+        nodes = {node_id: {"type": kind, "name": name} for node_id, kind, name in rows}
+        return [nodes[node_id] for node_id in ids]
+
+    def relationships(self) -> Dict[str, List[Dict]]:
+        """The merged relationships in the per-file `relationships` layout, one entry per distinct link"""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT e.relation, s.name, t.name, MIN(e.label) FROM edges e
+                JOIN nodes s ON s.id = e.src JOIN nodes t ON t.id = e.tgt
+                WHERE e.relation IN ('relates_to', 'measures', 'targets', 'informs')
+                GROUP BY e.src, e.tgt, e.relation
+            """).fetchall()
+        merged = {"construct_relationships": [], "assessment_construct_links": [],
+                  "intervention_construct_links": [], "assessment_intervention_connections": []}
+        for relation, src, tgt, label in rows:
+            if relation == "relates_to":
+                merged["construct_relationships"].append(
+                    {"source_construct": src, "target_construct": tgt, "relationship_type": label})
+            elif relation == "measures":
+                merged["assessment_construct_links"].append(
+                    {"assessment_name": src, "constructs_measured": [tgt], "measurement_relationship": label})
+            elif relation == "targets":
+                merged["intervention_construct_links"].append({"intervention_name": src, "constructs_targeted": [tgt]})
+            else:
+                merged["assessment_intervention_connections"].append(
+                    {"assessment_name": src, "intervention_name": tgt, "connection_type": label})
+        return merged
+
+    def stats(self) -> Dict:
+        """Node counts per type and edge counts per relation"""
+        with self._lock:
+            nodes = dict(self._conn.execute("SELECT type, COUNT(*) FROM nodes GROUP BY type"))
+            edges = dict(self._conn.execute("SELECT relation, COUNT(*) FROM edges GROUP BY relation"))
+        return {"nodes": nodes, "edges": edges,
+                "total_nodes": sum(nodes.values()), "total_edges": sum(edges.values())}
+
+
+def open_graph_store(store_dir: str = DEFAULT_STORE_DIR, legacy_path: str = LEGACY_RESULTS_FILE) -> Optional[GraphStore]:
+    """The graph store for the current results, rebuilt first if the results changed since it was built
+
+    A matching mtime and size is trusted as is; otherwise the content hash decides, as for the
+    entity catalog. None if there are no results.
+    """
+    source = results_source(store_dir, legacy_path)
+    if source is None:
+        return None
+    store = GraphStore(str(graph_path(source)))
+    meta = store.meta()
+    settings = canonical_settings()
+    current = (meta.get("version") == str(GRAPH_VERSION)
+               and meta.get("canonical_threshold") == str(settings["threshold"])
+               and meta.get("canonical_embeddings") == str(settings["embedding_model"]))
+
+    signature = source_signature(source, with_hash=False)
+    if current and all(meta.get(key) == str(value) for key, value in signature.items()):
+        return store
+
+    signature = source_signature(source)
+    if current and meta.get("sha256") == signature["sha256"]:
+        store.update_meta(signature)
+        return store
+
+    loaded = []
+
+    def load_data() -> Dict:
+        if not loaded:
+            loaded.append(load_results(store_dir, legacy_path) or {})
+        return loaded[0]
+
+    canonical = refresh_canonical_map(source, signature, load_data)
+    store.rebuild(load_data(), canonical, dict(signature, version=GRAPH_VERSION,
+                                               canonical_threshold=settings["threshold"],
+                                               canonical_embeddings=settings["embedding_model"]))
+    return store
@@ -0,0 +1,55 @@
+# src/models.py
+"""
+Model catalogue and per-pass model routing
+Prices and output limits by model family, and which model each extraction pass is sent to
+"""
+
+from typing import Dict, Optional, Tuple
+
+DEFAULT_MODEL = "claude-sonnet-4-20250514"
+
+# Faster, cheaper tier for passes that restate or check what earlier passes found
+LIGHT_MODEL = "claude-haiku-4-5-20251001"
+
+# Pass name -> model or tier ("default" / "light"); passes not listed use the default model.
+# Empty, so the light tier is opt-in (e.g. --route protocols=light --route validation=light)
+DEFAULT_ROUTES = {}
+
+# (model id prefix, USD per million input tokens, USD per million output tokens, max output tokens);
+# the first matching prefix wins
+MODEL_CATALOGUE = [
+    ("claude-opus-4-5", 5.0, 25.0, 64000),
+    ("claude-opus-4", 15.0, 75.0, 32000),
+    ("claude-sonnet-4", 3.0, 15.0, 64000),
+    ("claude-3-7-sonnet", 3.0, 15.0, 64000),
+    ("claude-haiku-4-5", 1.0, 5.0, 64000),
+    ("claude-3-5-haiku", 0.8, 4.0, 8192),
+]
+
+
+def model_info(model: Optional[str]) -> Tuple[float, float, int]:
+    """(input price, output price, max output tokens) for a model id; unknown models are priced as Sonnet"""
+    for prefix, input_price, output_price, max_output in MODEL_CATALOGUE:
+        if model and model.startswith(prefix):
+            return input_price, output_price, max_output
+    return 3.0, 15.0, 64000
+
+
+def parse_routes(spec: str) -> Dict[str, str]:
+    """Parse 'pass=model,pass=model' (as in EXTRACTION_MODEL_ROUTES or --route) into a routing table"""
+    routes = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        pass_name, sep, model = item.partition("=")
+        if not sep or not pass_name.strip() or not model.strip():
+            raise ValueError(f"Invalid model route '{item}': expected pass=model")
+        routes[pass_name.strip()] = model.strip()
+    return routes
+
+
+def resolve_model(route: Optional[str], default_model: str, light_model: str) -> str:
+    """The model id for a route, expanding the 'default' and 'light' tiers"""
+    if not route or route == "default":
+        return default_model
+    if route == "light":
+        return light_model
+    return route
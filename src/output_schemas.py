@@ -0,0 +1,309 @@
+# src/output_schemas.py
+"""
+JSON schemas for extraction pass outputs, declared once per pass
+Sent as forced tool input schemas, rendered into the prompts' JSON layouts and used to check what comes back
+"""
+
+import json
+from typing import Dict, List
+
+
+def schema_from_example(example, top_level: bool = True) -> Dict:
+    """JSON schema for values shaped like `example`
+
+    A string is a string property (its text, if any, becomes the description), a number an integer,
+    [x] a list of x and a dict an object. Top-level keys are all required; objects inside lists require only
+    their first key, which names the entity.
+    """
+    if isinstance(example, str):
+        return {"type": "string", "description": example} if example else {"type": "string"}
+    if isinstance(example, int):
+        return {"type": "integer"}
+    if isinstance(example, list):
+        return {"type": "array", "items": schema_from_example(example[0], top_level=False)}
+    properties = {key: schema_from_example(value, top_level=False) for key, value in example.items()}
+    required = list(example) if top_level else list(example)[:1]
+    return {"type": "object", "properties": properties, "required": required}
+
+
+# Standard extractor
+
+DOMAINS_CONSTRUCTS = schema_from_example({
+    "practitioner_domains": [{"domain_name": "use terminology from examples when possible", "domain_description": "",
+                              "specialization_notes": ""}],
+    "constructs_mentioned": [{"construct_name": "use specific terminology when possible", "construct_description": "",
+                              "domain_association": "", "assessment_context": ""}],
+    "sport_specificity": [{"sport": "", "assessment_modifications": "", "intervention_modifications": ""}],
+})
+
+ASSESSMENTS_STANDARD = schema_from_example({
+    "assessments": [{
+        "assessment_name": "exact name used",
+        "assessment_description": "",
+        "constructs_measured": ["constructs from the list above"],
+        "modality": "Physical test/Wearable monitoring/Labs/Imaging/Survey/etc.",
+        "technology_vendor": {"name": "exact vendor/brand name", "type": "hardware/software/service",
+                              "specific_equipment": "model numbers, specific devices"},
+        "protocols": {"preparation_steps": [""], "coaching_cues": ["specific instructions"],
+                      "common_mistakes": ["errors that affect results"]},
+        "metrics": [{"metric_name": "exact metric name", "unit": "specific units: cm, kg, mmHg, %, etc.",
+                     "reference_ranges": "normal values mentioned", "validity_confidence": "",
+                     "reliability_confidence": ""}],
+        "state_influences": [{"state_name": "", "impact_on_assessment": "", "impact_on_interpretation": ""}],
+        "assets_generated": [{"asset_name": "", "asset_type": "PDF report/raw data/video/dashboard/etc.",
+                              "description": ""}],
+    }],
+})
+
+INTERVENTIONS_STANDARD = schema_from_example({
+    "interventions": [{
+        "intervention_name": "exact name used",
+        "intervention_description": "",
+        "purpose": "",
+        "constructs_targeted": ["constructs from the list above"],
+        "intervention_types": ["Physical/Nutrition/Sleep/Stress Management/Medical/Education/Recovery"],
+        "protocols": {"duration": "specific timeframes", "frequency": "how often", "intensity": "how hard/strong",
+                      "volume": "how much", "progression_criteria": ["when/how to advance"],
+                      "reassessment_intervals": ""},
+        "constraints_accommodations": [{"constraint_type": "", "accommodation_strategy": ""}],
+        "resource_requirements": {"time": "", "equipment": "", "staff_expertise": "", "cost_level": "High/Moderate/Low"},
+    }],
+})
+
+RELATIONSHIPS_STANDARD = schema_from_example({
+    "construct_relationships": [{"source_construct": "", "target_construct": "",
+                                 "relationship_type": "causal/association/dependency", "relationship_description": "",
+                                 "evidence_mentioned": "", "directionality": "bidirectional/unidirectional"}],
+    "assessment_intervention_links": [{"assessment_name": "", "intervention_name": "",
+                                       "connection_type": "informs/measures_progress/triggers/evaluates",
+                                       "description": ""}],
+    "goal_connections": [{"goal_description": "", "target_constructs": [""], "supporting_assessments": [""],
+                          "recommended_interventions": [""]}],
+})
+
+# Robust extractor
+
+KNOWLEDGE_MAP = schema_from_example({
+    "primary_expertise": [{"area": "", "description": "", "scope": "",
+                           "depth_indicators": ["specific examples showing depth"]}],
+    "knowledge_domains": [{"domain": "", "description": "", "sub_areas": ["sub-specializations"]}],
+    "target_populations": [{"population": "", "characteristics": "", "specific_needs": ""}],
+})
+
+CONSTRUCTS_DETAILED = schema_from_example({
+    "constructs_mentioned": [{"construct_name": "use specific terminology when possible", "construct_description": "",
+                              "domain_association": "", "why_important": "why practitioner focuses on this",
+                              "how_assessed": "how they evaluate this construct", "measurement_approach": ""}],
+    "health_performance_factors": [{"factor_name": "",
+                                    "factor_type": "physiological/psychological/behavioral/environmental",
+                                    "description": "", "measurement_approach": ""}],
+})
+
+ASSESSMENTS_DETAILED = schema_from_example({
+    "assessments": [{
+        "assessment_name": "exact name used",
+        "assessment_description": "",
+        "constructs_measured": ["which constructs this assesses"],
+        "modality": "Physical test/Wearable monitoring/Consultation/Labs/Imaging/Survey/etc",
+        "administration_details": {"where_performed": "lab/clinic/field/home", "duration": "",
+                                   "preparation_required": "", "frequency": ""},
+        "protocol_details": {"key_steps": ["main protocol steps"], "coaching_cues": ["specific instructions given"],
+                             "common_mistakes": ["errors that affect results"],
+                             "quality_controls": ["how to ensure good data"]},
+    }],
+})
+
+INTERVENTIONS_DETAILED = schema_from_example({
+    "interventions": [{
+        "intervention_name": "exact name used",
+        "intervention_description": "",
+        "purpose": "what it aims to achieve",
+        "constructs_targeted": ["which constructs this improves"],
+        "intervention_types": ["Physical/Nutrition/Sleep/Stress Management/Medical/Education/Recovery"],
+        "dosage_details": {"frequency": "how often", "duration": "how long", "intensity": "how hard/strong",
+                           "volume": "how much", "progression": "how it advances"},
+        "implementation_specifics": {"delivery_method": "how it's delivered",
+                                     "monitoring_approach": "how progress is tracked",
+                                     "adjustment_criteria": "when/how it's modified"},
+        "resource_requirements": {"equipment_needed": [""], "time_commitment": "", "expertise_required": "",
+                                  "cost_level": "High/Moderate/Low if mentioned"},
+    }],
+})
+
+CONTEXTUAL_FACTORS = schema_from_example({
+    "client_goals": [{"goal_description": "", "goal_type": "", "target_metrics": ["specific measurable outcomes"],
+                      "timeline": ""}],
+    "constraints_and_limitations": [{"constraint_type": "", "description": "", "impact_on_assessment": "",
+                                     "impact_on_intervention": "", "workaround_strategies": ["accommodations"]}],
+    "moderating_factors": [{"factor_name": "", "description": "", "what_it_moderates": "",
+                            "management_strategies": ["how to account for this factor"]}],
+})
+
+RELATIONSHIPS_ROBUST = schema_from_example({
+    "causal_relationships": [{"cause": "", "effect": "", "relationship_strength": "", "mechanism": "",
+                              "evidence_mentioned": ""}],
+    "assessment_construct_links": [{"assessment": "", "constructs_measured": [""], "measurement_quality": ""}],
+    "intervention_outcome_links": [{"intervention": "", "target_outcomes": [""], "expected_timeline": "",
+                                    "moderating_factors": ["what affects effectiveness"]}],
+})
+
+VALIDATION_ROBUST = schema_from_example({
+    "extraction_confidence": {"overall_confidence": "high/medium/low", "most_reliable_sections": [""],
+                              "areas_needing_review": [""]},
+    "missing_information": [{"category": "", "missing_element": "", "importance_level": "high/medium/low"}],
+    "quality_indicators": [{"aspect": "", "quality_score": "high/medium/low", "reasoning": ""}],
+})
+
+# Ontology-guided extractor (DOMAINS_CONSTRUCTS is shared with the standard extractor)
+
+ASSESSMENTS = schema_from_example({
+    "assessments": [{"assessment_name": "", "assessment_description": "", "constructs_measured": [""],
+                     "modality": ""}],
+})
+
+TECHNOLOGIES_METRICS = schema_from_example({
+    "technologies": [{"technology_name": "", "vendor_manufacturer": "", "technology_type": "hardware/software/service",
+                      "specific_model": "", "used_for_assessments": [""], "what_it_measures": [""],
+                      "data_output_format": ""}],
+    "metrics": [{"metric_name": "", "measurement_unit": "", "assessment_source": "", "normal_ranges": "",
+                 "interpretation_notes": ""}],
+})
+
+INTERVENTIONS = schema_from_example({
+    "interventions": [{"intervention_name": "", "intervention_description": "", "constructs_targeted": [""],
+                       "intervention_types": [""]}],
+})
+
+GOALS_CONSTRAINTS = schema_from_example({
+    "client_goals": [{"goal_description": "specific goal mentioned", "goal_type": "performance/health/aesthetic/functional",
+                      "target_constructs": ["which constructs this goal relates to"],
+                      "success_metrics": ["how success is measured"], "timeline": "timeframe mentioned",
+                      "priority_level": "if indicated"}],
+    "constraints_preferences": [{"constraint_type": "equipment/time/access/medical/preference", "description": "",
+                                 "impact_on_assessment": "how it affects testing",
+                                 "impact_on_intervention": "how it affects treatment",
+                                 "workaround_strategies": ["how to accommodate this constraint"]}],
+    "moderating_factors": [{"factor_name": "", "description": "",
+                            "what_it_affects": "assessment results/intervention effectiveness",
+                            "management_approach": "how to account for this factor"}],
+    "individual_differences": [{"difference_factor": "age/sex/training status/health condition",
+                                "assessment_implications": "", "intervention_implications": ""}],
+})
+
+RELATIONSHIPS = schema_from_example({
+    "construct_relationships": [{"source_construct": "", "target_construct": "",
+                                 "relationship_type": "causal/association/dependency", "relationship_description": "",
+                                 "evidence_mentioned": "what supports this relationship",
+                                 "directionality": "bidirectional/unidirectional"}],
+    "assessment_construct_links": [{"assessment_name": "",
+                                    "constructs_measured": ["constructs this assessment evaluates"],
+                                    "measurement_relationship": "direct/indirect/predictive",
+                                    "interpretation_factors": ["what affects how results are interpreted"]}],
+    "intervention_construct_links": [{"intervention_name": "",
+                                      "constructs_targeted": ["constructs this intervention affects"],
+                                      "mechanism_of_action": "how the intervention works",
+                                      "expected_outcomes": ["what changes are expected"],
+                                      "timeline_expectations": "how quickly effects are seen"}],
+    "assessment_intervention_connections": [{"assessment_name": "", "intervention_name": "",
+                                             "connection_type": "informs/monitors/triggers/evaluates",
+                                             "connection_description": ""}],
+})
+
+PROTOCOLS = schema_from_example({
+    "assessment_protocols": [{"assessment_name": "", "detailed_steps": ["protocol steps, in order"],
+                              "preparation_requirements": ["what needs to be done before"], "equipment_setup": "",
+                              "data_collection_process": "", "quality_assurance": ["how to ensure reliable results"],
+                              "troubleshooting": ["common issues and solutions"]}],
+    "intervention_protocols": [{"intervention_name": "", "implementation_steps": ["how to deliver this intervention"],
+                                "dosage_specifications": {"specific_parameters": "", "progression_rules": "",
+                                                          "modification_criteria": ""},
+                                "monitoring_protocols": ["how to track progress"],
+                                "safety_considerations": ["precautions and contraindications"]}],
+    "practical_considerations": [{"consideration_type": "", "description": "",
+                                  "practical_solutions": ["how to address this consideration"]}],
+})
+
+VALIDATION = schema_from_example({
+    "ontology_coverage_check": {"constructs_identified": 0, "assessments_identified": 0,
+                                "interventions_identified": 0, "technologies_identified": 0,
+                                "metrics_identified": 0},
+    "potential_missed_entities": [{"entity_type": "construct/assessment/intervention/technology/metric",
+                                   "potential_entity": "", "evidence_in_transcript": "",
+                                   "confidence": "high/medium/low"}],
+    "quality_assessment": {"extraction_completeness": "high/medium/low", "terminology_consistency": "high/medium/low",
+                           "relationship_coverage": "high/medium/low", "overall_confidence": "high/medium/low"},
+    "recommendations": [{"recommendation_type": "", "description": "", "priority": "high/medium/low"}],
+})
+
+
+def merge_schemas(*schemas: Dict) -> Dict:
+    """One object schema with the top-level properties of several"""
+    properties = {}
+    for schema in schemas:
+        properties.update(schema["properties"])
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def schema_layout(schema: Dict) -> str:
+    """The JSON layout a prompt shows for a schema, so prompts and schemas are declared only once
+
+    Strings show as "string (description)", integers as "integer" and lists as one example item.
+    """
+    def example(schema):
+        if schema["type"] == "object":
+            return {key: example(value) for key, value in schema["properties"].items()}
+        if schema["type"] == "array":
+            return [example(schema["items"])]
+        if schema.get("description"):
+            return f"{schema['type']} ({schema['description']})"
+        return schema["type"]
+
+    return json.dumps(example(schema), indent=4)
+
+
+def schema_tool(name: str, description: str, schema: Dict) -> Dict:
+    """Tool definition whose input is the pass output (the model is made to call it, see request_params)"""
+    return {"name": name, "description": description, "input_schema": schema}
+
+
+def split_output(output: Dict, schemas: List[Dict]) -> List[Dict]:
+    """Split a merged output back into one dict per schema; an error on the merged output is kept on each"""
+    parts = []
+    for schema in schemas:
+        part = {key: output[key] for key in schema["properties"] if key in output}
+        if "error" in output:
+            part["error"] = output["error"]
+        parts.append(part)
+    return parts
+
+
+_JSON_TYPES = {"object": dict, "array": list, "string": str, "integer": int}
+
+
+def schema_problems(value, schema: Dict, path: str = "$", limit: int = 10) -> List[str]:
+    """Ways `value` breaks `schema` (types, required keys), as short messages; empty if it conforms
+
+    Only the subset of JSON schema used above is checked. Null is accepted wherever a key isn't required.
+    """
+    problems = []
+
+    def check(value, schema, path):
+        if len(problems) >= limit:
+            return
+        expected = _JSON_TYPES[schema["type"]]
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            problems.append(f"{path}: expected {schema['type']}, got {type(value).__name__}")
+            return
+        if expected is dict:
+            for key in schema.get("required", []):
+                if value.get(key) is None:
+                    problems.append(f"{path}: missing required '{key}'")
+            for key, subschema in schema.get("properties", {}).items():
+                if value.get(key) is not None:
+                    check(value[key], subschema, f"{path}.{key}")
+        elif expected is list:
+            for i, item in enumerate(value):
+                check(item, schema["items"], f"{path}[{i}]")
+
+    check(value, schema, path)
+    return problems
@@ -0,0 +1,198 @@
+# src/pass_graph.py
+"""
+Dependency-graph scheduling for multi-pass extraction
+Each pass declares the passes whose output it needs and starts as soon as they finish
+"""
+
+import asyncio
+import contextvars
+import inspect
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Set by the schedulers while a pass runs: its name, and where it reports output fields that are already complete
+current_pass: ContextVar[str] = ContextVar("current_pass", default="")
+_partial_sink: ContextVar[Optional[Callable[[Dict], None]]] = ContextVar("partial_sink", default=None)
+
+
+class ExtractionPass:
+    """One extraction pass and the earlier passes it depends on"""
+
+    def __init__(self, name: str, label: str, run: Callable[[Dict], Dict], depends_on: Sequence[str] = (),
+                 needs: Optional[Dict[str, Sequence[str]]] = None):
+        self.name = name
+        self.label = label  # Progress message printed when the pass starts
+        self.run = run  # Called with {pass name: output} for the completed dependencies
+        self.depends_on = tuple(depends_on)
+        # Top-level fields this pass actually reads from a dependency's output. When that dependency
+        # streams its reply, the pass may start as soon as these fields are complete.
+        self.needs = {d: tuple(fields) for d, fields in (needs or {}).items()}
+
+    def __repr__(self):
+        return f"ExtractionPass({self.name!r}, depends_on={list(self.depends_on)})"
+
+
+def publish_partial(fields: Dict):
+    """Report finished top-level fields of the running pass's output to the scheduler"""
+    sink = _partial_sink.get()
+    if sink:
+        sink(fields)
+
+
+def pass_levels(passes: Sequence[ExtractionPass]) -> List[List[str]]:
+    """Group passes into waves where every pass only depends on earlier waves"""
+    names = {p.name for p in passes}
+    for p in passes:
+        missing = [d for d in p.depends_on if d not in names]
+        if missing:
+            raise ValueError(f"Pass '{p.name}' depends on unknown passes: {missing}")
+        undeclared = [d for d in p.needs if d not in p.depends_on]
+        if undeclared:
+            raise ValueError(f"Pass '{p.name}' needs fields from passes it doesn't depend on: {undeclared}")
+
+    levels = []
+    placed = set()
+    remaining = list(passes)
+    while remaining:
+        ready = [p for p in remaining if all(d in placed for d in p.depends_on)]
+        if not ready:
+            raise ValueError(f"Cycle in pass graph between: {[p.name for p in remaining]}")
+        levels.append([p.name for p in ready])
+        placed.update(p.name for p in ready)
+        remaining = [p for p in remaining if p.name not in placed]
+
+    return levels
+
+
+def run_pass_graph(passes: Sequence[ExtractionPass], max_workers: Optional[int] = None,
+                   log: Callable[[str], None] = print, completed: Optional[Dict[str, Dict]] = None,
+                   on_complete: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Dict]:
+    """Run passes on a thread pool, starting each one as soon as its dependencies complete
+
+    Returns {pass name: output}. Passes already in `completed` (e.g. from a checkpoint) are not
+    run again, and on_complete is called with each newly finished pass. A pass with `needs` starts
+    once the fields it needs have been published by its dependencies, without waiting for the rest.
+    If any pass raises, passes that have not started yet are cancelled and the exception is re-raised
+    once in-flight passes finish (those still go to on_complete, so their work isn't lost).
+    """
+    pass_levels(passes)  # Validate before any API calls are made
+
+    results = {p.name: completed[p.name] for p in passes if completed and p.name in completed}
+    pending = {p.name: p for p in passes if p.name not in results}
+    partials = {}
+    events = queue.Queue()  # ("partial", name, fields) and ("done", name, future) from worker threads
+
+    def available(p: ExtractionPass, dependency: str) -> bool:
+        if dependency in results:
+            return True
+        fields = p.needs.get(dependency)
+        return fields is not None and all(f in partials.get(dependency, {}) for f in fields)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(passes) or 1) as executor:
+        running = set()
+
+        def start(p: ExtractionPass, inputs: Dict):
+            def run():
+                current_pass.set(p.name)
+                _partial_sink.set(lambda fields: events.put(("partial", p.name, fields)))
+                return p.run(inputs)
+
+            log(p.label)
+            # Copy the caller's context so per-file state (e.g. progress prefix) follows the pass
+            future = executor.submit(contextvars.copy_context().run, run)
+            future.add_done_callback(lambda f: events.put(("done", p.name, f)))
+            running.add(p.name)
+
+        def submit_ready():
+            for name, p in list(pending.items()):
+                if all(available(p, d) for d in p.depends_on):
+                    del pending[name]
+                    start(p, {d: results[d] if d in results else dict(partials[d]) for d in p.depends_on})
+
+        error = None
+        submit_ready()
+        while running:
+            kind, name, payload = events.get()
+            if kind == "partial":
+                partials.setdefault(name, {}).update(payload)
+            else:
+                running.discard(name)
+                try:
+                    results[name] = payload.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if on_complete:
+                    on_complete(name, results[name])
+            if error is None:
+                submit_ready()
+
+    if error is not None:
+        raise error
+    return results
+
+
+async def arun_pass_graph(passes: Sequence[ExtractionPass], log: Callable[[str], None] = print,
+                          completed: Optional[Dict[str, Dict]] = None,
+                          on_complete: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Dict]:
+    """Async counterpart of run_pass_graph: one task per pass, each awaiting its dependencies
+
+    Pass run callables should return awaitables (as the async extractors' pass methods do);
+    plain return values are accepted but block the event loop while they are computed.
+    """
+    by_name = {p.name: p for p in passes}
+    tasks = {}
+    failures = []
+    partials = {p.name: {} for p in passes}
+    updated = {p.name: asyncio.Event() for p in passes}
+
+    async def dependency_output(p: ExtractionPass, dependency: str) -> Dict:
+        fields = p.needs.get(dependency)
+        task = tasks[dependency]
+        if fields is None:
+            return await task
+        while not task.done():
+            if all(f in partials[dependency] for f in fields):
+                return dict(partials[dependency])
+            updated[dependency].clear()
+            waiter = asyncio.ensure_future(updated[dependency].wait())
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+        return task.result()
+
+    def publish(name: str, fields: Dict):
+        partials[name].update(fields)
+        updated[name].set()
+
+    async def run_pass(p: ExtractionPass):
+        if completed and p.name in completed:
+            return completed[p.name]
+        inputs = {d: await dependency_output(p, d) for d in p.depends_on}
+        if failures:
+            raise asyncio.CancelledError()  # Don't start new passes once one has failed
+        log(p.label)
+        current_pass.set(p.name)
+        _partial_sink.set(lambda fields: publish(p.name, fields))
+        try:
+            output = p.run(inputs)
+            if inspect.isawaitable(output):
+                output = await output
+        except Exception as e:
+            failures.append(e)
+            raise
+        if on_complete:
+            on_complete(p.name, output)
+        return output
+
+    # Create tasks wave by wave so every dependency task exists before its dependents
+    for level in pass_levels(passes):
+        for name in level:
+            tasks[name] = asyncio.ensure_future(run_pass(by_name[name]))
+
+    # Passes already in flight are allowed to finish (and reach on_complete) before a failure is raised
+    outputs = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    if failures:
+        raise failures[0]
+    return dict(zip(tasks, outputs))
@@ -0,0 +1,326 @@
+# src/planner.py
+"""
+Pre-flight planning for extraction runs
+Builds every prompt a run would send and projects tokens, cost and wall-clock time without calling the API
+"""
+
+import contextlib
+import io
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.chunking import chunk_transcript
+from src.extractor import (
+    Prompt,
+    OntologyExtractor,
+    FusedOntologyExtractor,
+    RobustOntologyExtractor,
+    OntologyGuidedExtractor,
+)
+from src.pass_graph import ExtractionPass, current_pass, pass_levels
+from src.results_store import DEFAULT_STORE_DIR, ResultsStore
+from src.token_counter import count_prompt_tokens, count_tokens
+from src.usage import request_cost
+
+# Latency model used until streamed runs have recorded real figures in runs.jsonl
+DEFAULT_OUTPUT_TOKENS_PER_S = 50.0
+DEFAULT_FIRST_TOKEN_S = 1.0
+PREFILL_TOKENS_PER_S = 10000.0
+
+# Assumed output size for a pass with no history, as a share of its max_tokens
+DEFAULT_OUTPUT_SHARE = 0.5
+
+# Output sizes are averaged over at most this many of the most recently saved results
+OUTPUT_HISTORY_SAMPLE = 20
+
+EXTRACTOR_TYPES = ["standard", "robust", "guided", "fused"]
+
+
+class PlannedRequest:
+    """A request a pass would send, recorded instead of sent"""
+
+    def __init__(self, prompt: Prompt, max_tokens: int, tool: Optional[Dict] = None, model: Optional[str] = None):
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.tool = tool
+        self.model = model
+
+
+class PlanningExtractorMixin:
+    """Runs pass methods to build their prompts, but returns PlannedRequests instead of calling the API"""
+
+    def run_prompt(self, prompt: Prompt, max_tokens: int = 4000, tool: Optional[Dict] = None) -> PlannedRequest:
+        return PlannedRequest(prompt, self.output_budget(prompt, max_tokens), tool, self.model_for())
+
+    def run_chunk_passes(self, chunk_passes: List[ExtractionPass], inputs: Dict) -> List[PlannedRequest]:
+        return [p.run(inputs) for p in chunk_passes]
+
+    def log(self, message: str):
+        pass  # Planning is silent; the planner prints its own report
+
+
+class PlanningOntologyExtractor(PlanningExtractorMixin, OntologyExtractor):
+    """Plans 4-pass standard runs"""
+
+
+class PlanningRobustOntologyExtractor(PlanningExtractorMixin, RobustOntologyExtractor):
+    """Plans 7-pass robust runs"""
+
+
+class PlanningOntologyGuidedExtractor(PlanningExtractorMixin, OntologyGuidedExtractor):
+    """Plans 8-pass ontology-guided runs"""
+
+
+class PlanningFusedOntologyExtractor(PlanningExtractorMixin, FusedOntologyExtractor):
+    """Plans fused (one- or two-call) runs"""
+
+
+PLANNING_EXTRACTORS = {
+    "standard": PlanningOntologyExtractor,
+    "robust": PlanningRobustOntologyExtractor,
+    "guided": PlanningOntologyGuidedExtractor,
+    "fused": PlanningFusedOntologyExtractor,
+}
+
+
+def pass_output(result: Dict, name: str) -> Optional[Dict]:
+    """Find a pass's output inside a stored per-file result (guided results nest some passes)"""
+    nested = result.get("ontology_guided_data", {})
+    for candidate in (result.get(name), nested.get(name), nested.get(f"detailed_{name}")):
+        if isinstance(candidate, dict):
+            return candidate
+    return None
+
+
+class RunPlanner:
+    """Projects a run's tokens, dollars and wall-clock time per file and in total, for one extractor type
+
+    Input tokens are counted offline from the real prompts (after preprocessing and chunking).
+    Output tokens come from the most recent stored results of the same extractor type: the mean JSON
+    size of each pass's output, capped at the pass's max_tokens. Passes with no history assume half of
+    max_tokens. Like a folder run, planning reads the results manifest rather than every stored record.
+    """
+
+    def __init__(self, extractor_type: str = "guided", store_dir: str = DEFAULT_STORE_DIR, **extractor_options):
+        api_key = os.getenv('ANTHROPIC_API_KEY') or "dry-run"  # The client is built but never used
+        with contextlib.redirect_stdout(io.StringIO()):  # Extractors announce themselves when created
+            self.extractor = PLANNING_EXTRACTORS[extractor_type](api_key=api_key, **extractor_options)
+            self.extractor.results_store = ResultsStore(store_dir)
+            self.extractor.migrate_legacy_results()  # As the run itself would, before reading the manifest
+        self.manifest = self.extractor.results_store.manifest()
+        self.store_type = self.extractor.results_store.summary().get("extraction_type")
+        self.output_history = self._output_history()
+        self.output_tokens_per_s, self.first_token_s = self._latency_history()
+
+    def _entry_type(self, entry: Dict) -> Optional[str]:
+        """The extractor type behind a manifest entry"""
+        fingerprint = entry.get("fingerprint") or {}
+        return fingerprint.get("extractor") or entry.get("extraction_type") or self.store_type
+
+    def _output_history(self) -> Dict[str, float]:
+        """Mean output tokens per pass over the latest OUTPUT_HISTORY_SAMPLE results of this extractor type"""
+        entries = [e for e in self.manifest.values()
+                   if e["status"] == "ok" and self._entry_type(e) == self.extractor.extraction_type]
+        entries.sort(key=lambda e: e.get("saved_at") or "", reverse=True)
+        totals, counts = {}, {}
+        for entry in entries[:OUTPUT_HISTORY_SAMPLE]:
+            result = self.extractor.results_store.get(entry["file_name"])
+            if result is None:
+                continue
+            for p in self.extractor.build_pass_graph(""):
+                output = pass_output(result, p.name)
+                if output is not None:
+                    totals[p.name] = totals.get(p.name, 0) + count_tokens(json.dumps(output, indent=2))
+                    counts[p.name] = counts.get(p.name, 0) + 1
+        return {name: totals[name] / counts[name] for name in totals}
+
+    def _latency_history(self):
+        """Generation speed and time to first token from the most recent streamed run, if any"""
+        runs_path = self.extractor.results_store.runs_path
+        if runs_path.exists():
+            with open(runs_path, 'r', encoding='utf-8') as f:
+                runs = [json.loads(line) for line in f if line.strip()]
+            for run in reversed(runs):
+                streaming = run.get("streaming") or {}
+                if streaming.get("tokens_per_second") and streaming.get("avg_first_token_s") is not None:
+                    return streaming["tokens_per_second"], streaming["avg_first_token_s"]
+        return DEFAULT_OUTPUT_TOKENS_PER_S, DEFAULT_FIRST_TOKEN_S
+
+    def _placeholder_outputs(self, file_name: str) -> Dict[str, Dict]:
+        """Earlier outputs for this file (so dependent prompts carry realistic entity lists), else empty"""
+        entry = self.manifest.get(file_name)
+        result = self.extractor.results_store.get(file_name) if entry and entry["status"] == "ok" else None
+        if result is None:
+            return {}
+        return {p.name: pass_output(result, p.name) or {} for p in self.extractor.build_pass_graph("")}
+
+    def plan_request(self, name: str, request: PlannedRequest, prefix_cached: bool) -> Dict:
+        """Tokens, cost and latency for one request"""
+        extractor = self.extractor
+        cacheable, uncached = count_prompt_tokens(request.prompt)
+        if request.tool:
+            # Every pass sends the same tools list, which is part of the cached prefix when the prompt has one
+            tool_tokens = count_tokens(json.dumps(extractor.output_tools()))
+            if cacheable:
+                cacheable += tool_tokens
+            else:
+                uncached += tool_tokens
+        expected = self.output_history.get(name, request.max_tokens * DEFAULT_OUTPUT_SHARE)
+        output_tokens = int(min(request.max_tokens, expected))
+
+        if extractor.cached_response(request.prompt, request.max_tokens, request.tool) is not None:
+            return {"input_tokens": cacheable + uncached, "output_tokens": output_tokens, "limited_tokens": 0,
+                    "cache_read_tokens": 0, "cost": 0.0, "latency_s": 0.0, "response_cached": True}
+
+        # Prompt-cache reads are cheap, fast and don't count towards the input-tokens-per-minute limit
+        limited_tokens = uncached + (0 if prefix_cached else cacheable)
+        cost = request_cost(uncached, output_tokens, cache_read_input_tokens=cacheable if prefix_cached else 0,
+                            cache_creation_input_tokens=0 if prefix_cached else cacheable, model=request.model)
+        latency = (self.first_token_s + limited_tokens / PREFILL_TOKENS_PER_S
+                   + output_tokens / self.output_tokens_per_s)
+        return {"input_tokens": cacheable + uncached, "output_tokens": output_tokens, "limited_tokens": limited_tokens,
+                "cache_read_tokens": cacheable if prefix_cached else 0, "cost": cost, "latency_s": latency,
+                "response_cached": False}
+
+    def plan_file(self, file_path: Path) -> Dict:
+        """Every request one transcript would send, rolled up along its pass graph"""
+        extractor = self.extractor
+        raw = extractor.read_transcript(file_path)
+        transcript, preprocessing = extractor.prepare_transcript(raw)
+        passes = extractor.plan_pass_graph(transcript)
+        placeholders = self._placeholder_outputs(file_path.name)
+
+        totals = {"requests": 0, "input_tokens": 0, "output_tokens": 0, "limited_tokens": 0, "cache_read_tokens": 0,
+                  "cost": 0.0, "cached_responses": 0}
+        finish = {}
+        written_prefixes = set()
+        for level in pass_levels(passes):
+            for name in level:
+                p = next(p for p in passes if p.name == name)
+                current_pass.set(name)  # Pass methods pick their model from the current pass
+                planned = p.run({d: placeholders.get(d, {}) for d in p.depends_on})
+                requests = planned if isinstance(planned, list) else [planned]
+
+                # Chunks run side by side: the pass takes as long as its slowest request
+                pass_latency = 0.0
+                for request in requests:
+                    # The prompt cache is per model
+                    prefix = (request.model, json.dumps(request.prompt[0])) if isinstance(request.prompt, list) else None
+                    estimate = self.plan_request(name, request, prefix in written_prefixes)
+                    if prefix is not None:
+                        written_prefixes.add(prefix)
+                    totals["requests"] += 1
+                    totals["input_tokens"] += estimate["input_tokens"]
+                    totals["output_tokens"] += estimate["output_tokens"]
+                    totals["limited_tokens"] += estimate["limited_tokens"]
+                    totals["cache_read_tokens"] += estimate["cache_read_tokens"]
+                    totals["cost"] += estimate["cost"]
+                    totals["cached_responses"] += estimate["response_cached"]
+                    pass_latency = max(pass_latency, estimate["latency_s"])
+                finish[name] = max((finish[d] for d in p.depends_on), default=0.0) + pass_latency
+        current_pass.set("")
+
+        chunks = chunk_transcript(transcript, extractor.chunk_tokens, extractor.chunk_overlap_tokens)
+        return dict(totals, file_name=file_path.name, transcript_tokens=count_tokens(transcript),
+                    preprocessing=preprocessing, chunks=len(chunks),
+                    wall_clock_s=max(finish.values(), default=0.0))
+
+    def files_to_run(self, folder_path: str, include_processed: bool = False) -> List[Path]:
+        """Transcripts a folder run would process, matched against the results manifest as _select_new_files does
+
+        A file is skipped when a stored result has its fingerprint (under any name), when it has its
+        name, no fingerprint yet and came from this extractor type (such results are adopted rather
+        than re-extracted), or when an earlier file in the folder has the same content.
+        """
+        files = sorted(Path(folder_path).glob("*.txt"))
+        if include_processed:
+            return files
+
+        by_name = {name: e for name, e in self.manifest.items() if e["status"] == "ok"}
+        fingerprints = [e["fingerprint"] for e in by_name.values() if e.get("fingerprint")]
+        pending = []
+        for f in files:
+            fingerprint = self.extractor.fingerprint(self.extractor.read_transcript(f))
+            previous = by_name.get(f.name)
+            adoptable = (previous is not None and not previous.get("fingerprint")
+                         and self._entry_type(previous) == self.extractor.extraction_type)
+            if fingerprint in fingerprints or adoptable:
+                continue
+            fingerprints.append(fingerprint)
+            pending.append(f)
+        return pending
+
+    def plan_folder(self, folder_path: str, include_processed: bool = False, max_workers: Optional[int] = None) -> Dict:
+        """Plan every file a folder run would process, plus run totals
+
+        Wall-clock time is the largest of: the slowest file, the files' critical paths spread over the
+        worker pool, and the time the rate limiter needs to admit all the requests, input tokens and output tokens.
+        """
+        files = [self.plan_file(f) for f in self.files_to_run(folder_path, include_processed)]
+        workers = max(1, min(max_workers or self.extractor.max_workers, len(files) or 1))
+        limiter = self.extractor.rate_limiter
+
+        total = {key: sum(f[key] for f in files)
+                 for key in ("requests", "input_tokens", "output_tokens", "limited_tokens", "cache_read_tokens", "cost",
+                             "cached_responses")}
+        sent_requests = total["requests"] - total["cached_responses"]
+        # Share of input tokens read from the prompt cache, comparable with the run's reported hit rate
+        total["cache_hit_rate"] = round(total["cache_read_tokens"] / total["input_tokens"], 3) if total["input_tokens"] else 0.0
+        total["wall_clock_s"] = max(
+            max((f["wall_clock_s"] for f in files), default=0.0),
+            sum(f["wall_clock_s"] for f in files) / workers,
+            60 * total["limited_tokens"] / limiter.tokens.capacity,
+            60 * sent_requests / limiter.requests.capacity,
+            60 * total["output_tokens"] / limiter.output_tokens.capacity
+        )
+        return {
+            "extraction_type": self.extractor.extraction_type,
+            "files": files,
+            "total": dict(total, files=len(files), workers=workers)
+        }
+
+
+def print_plan(plan: Dict, per_file: bool = True):
+    """Print a plan from RunPlanner.plan_folder"""
+    total = plan["total"]
+    print(f"\n📐 {plan['extraction_type']}: {total['files']} file(s), {total['requests']} request(s)")
+    if per_file:
+        for f in plan["files"]:
+            chunks = f" [{f['chunks']} chunks]" if f["chunks"] > 1 else ""
+            print(f"  📄 {f['file_name'][:55]:55}{chunks} in ~{f['input_tokens']:>8,}  out ~{f['output_tokens']:>6,}  "
+                  f"${f['cost']:>6.2f}  ~{f['wall_clock_s']:>5.0f}s")
+    cached = f", {total['cached_responses']} answered from the response cache" if total["cached_responses"] else ""
+    print(f"  📊 Total: ~{total['input_tokens']:,} input / ~{total['output_tokens']:,} output tokens "
+          f"(prompt cache hit rate ~{total['cache_hit_rate']:.0%}), ~${total['cost']:.2f}, "
+          f"~{total['wall_clock_s'] / 60:.1f} min with {total['workers']} worker(s){cached}")
+
+
+def plan_run(folder_path: str = "data/transcripts", extractor_types: Optional[List[str]] = None,
+             include_processed: bool = False, per_file: bool = True, **extractor_options) -> Dict[str, Dict]:
+    """Plan a folder run for each extractor type and print the projections"""
+    plans = {}
+    for extractor_type in extractor_types or EXTRACTOR_TYPES:
+        plans[extractor_type] = RunPlanner(extractor_type, **extractor_options).plan_folder(
+            folder_path, include_processed=include_processed)
+        print_plan(plans[extractor_type], per_file=per_file)
+    return plans
+
+
+def preflight(extractor, folder_path: str, **model_options) -> Dict:
+    """Plan the files a configured extractor is about to process and print a one-line projection
+
+    model_options (model, light_model, model_routes) must be the ones the extractor was built with.
+    """
+    extractor_type = next(name for name, cls in (("fused", FusedOntologyExtractor),
+                                                 ("guided", OntologyGuidedExtractor),
+                                                 ("robust", RobustOntologyExtractor),
+                                                 ("standard", OntologyExtractor)) if isinstance(extractor, cls))
+    planner = RunPlanner(extractor_type, chunk_tokens=extractor.chunk_tokens, preprocess=extractor.preprocess,
+                         max_workers=extractor.max_workers, use_response_cache=extractor.response_cache is not None,
+                         **model_options)
+    plan = planner.plan_folder(folder_path)
+    print_plan(plan, per_file=False)
+    extractor.planned_cache_hit_rate = plan["total"]["cache_hit_rate"]  # Checked against the API's usage after the run
+    return plan
@@ -0,0 +1,70 @@
+# src/preprocessing.py
+"""
+Deterministic transcript normalisation applied before prompts are built
+Strips export boilerplate, timestamps and filler words so every pass sends fewer input tokens
+"""
+
+import re
+from typing import Dict, Tuple
+
+from src.token_counter import count_tokens
+
+# Bumped whenever the rules below change, so results and checkpoints from other rules are not reused
+PREPROCESSING_VERSION = "2"
+
+# Gemini "Notes" sections ahead of the transcript: a heading alone on its line, up to the next such
+# heading or the transcript heading. Exports with no transcript heading are all notes and are kept whole.
+_NOTES_HEADING = r"[ \t]*(?:Summary|Details|Suggested next steps|Attendees|Invited|Attachments|Meeting records)[ \t]*$"
+_NOTES_SECTIONS = re.compile(rf"^{_NOTES_HEADING}.*?(?=^{_NOTES_HEADING}|\Z)", re.MULTILINE | re.DOTALL)
+_TRANSCRIPT_HEADING = re.compile(r"^[ \t]*(?:📖[ \t]*)?Transcript[ \t]*$", re.MULTILINE)
+
+_LINE_RULES = [
+    re.compile(r"^\s*📖?\s*Transcript\s*$"),                                  # Gemini tab heading
+    re.compile(r"^\s*[A-Z][a-z]{2} \d{1,2}, \d{4}\s*$"),                     # "Sep 16, 2025"
+    re.compile(r"^\s*\d{1,2}:\d{2}:\d{2}\s*$"),                              # "00:01:47" section stamps
+    re.compile(r"^\s*Transcription ended after .*$"),
+    re.compile(r"^\s*This editable transcript was computer generated.*$"),
+    re.compile(r"^\s*Invited .*$"),
+    re.compile(r"^\s*Attendees?:? .*$"),
+]
+
+_INLINE_TIMESTAMP = re.compile(r"\s*\[\d{1,2}:\d{2}:\d{2}\]\s*")
+_FILLERS = re.compile(r"\b(?:u+m+|u+h+|e+r+m+|h+m+|m+h+m+)\b[,.]?\s*", re.IGNORECASE)
+_SPACES = re.compile(r"[ \t ]+")
+_BLANK_LINES = re.compile(r"\n{2,}")
+
+
+def preprocess_transcript(text: str, drop_fillers: bool = True) -> str:
+    """Normalise a transcript: the same input always gives the same output
+
+    - drops BOMs, Gemini notes sections, date/timestamp lines, inline [hh:mm:ss] markers and export footers
+    - removes filler words (um, uh, erm, ...), unless drop_fillers is False
+    - collapses runs of spaces and drops blank lines
+    Speaker labels and line breaks between turns are kept, so chunking still finds turn boundaries.
+    """
+    text = text.replace("﻿", "").replace("\r\n", "\n")
+    heading = _TRANSCRIPT_HEADING.search(text)
+    if heading:
+        text = _NOTES_SECTIONS.sub("", text[:heading.start()]) + text[heading.start():]
+
+    lines = []
+    for line in text.split("\n"):
+        if any(rule.match(line) for rule in _LINE_RULES):
+            continue
+        line = _INLINE_TIMESTAMP.sub(" ", line)
+        if drop_fillers:
+            line = _FILLERS.sub("", line)
+        lines.append(_SPACES.sub(" ", line).strip())
+
+    return _BLANK_LINES.sub("\n", "\n".join(lines)).strip() + "\n"
+
+
+def preprocess_with_stats(text: str, drop_fillers: bool = True) -> Tuple[str, Dict]:
+    """preprocess_transcript plus before/after token estimates for reporting"""
+    cleaned = preprocess_transcript(text, drop_fillers=drop_fillers)
+    before, after = count_tokens(text), count_tokens(cleaned)
+    return cleaned, {
+        "tokens_before": before,
+        "tokens_after": after,
+        "reduction_pct": round(100 * (1 - after / before), 1) if before else 0.0
+    }
@@ -7,6 +7,41 @@ Provides consistent, high-quality prompts with ontology guidance
 import json
 from typing import List, Dict, Optional
 
+from src.output_schemas import (
+    ASSESSMENTS,
+    ASSESSMENTS_DETAILED,
+    ASSESSMENTS_STANDARD,
+    CONSTRUCTS_DETAILED,
+    CONTEXTUAL_FACTORS,
+    DOMAINS_CONSTRUCTS,
+    GOALS_CONSTRAINTS,
+    INTERVENTIONS,
+    INTERVENTIONS_DETAILED,
+    INTERVENTIONS_STANDARD,
+    KNOWLEDGE_MAP,
+    PROTOCOLS,
+    RELATIONSHIPS,
+    RELATIONSHIPS_ROBUST,
+    RELATIONSHIPS_STANDARD,
+    TECHNOLOGIES_METRICS,
+    VALIDATION,
+    VALIDATION_ROBUST,
+    schema_layout,
+)
+
+# Bump whenever prompt wording or output structure changes; stored results carry this
+# version so the folder runner knows to re-extract them
+PROMPT_VERSION = "4"
+
+# What the fused extractor's entity call hunts for (shared by its one- and two-call prompts)
+FUSED_ENTITY_CHECKLIST = """\
+- practitioner domains, and every construct mentioned with its domain
+- assessments, with the constructs each one measures
+- technologies (hunt for equipment brands, vendors, model numbers, labs, apps) and the metrics they produce (hunt for units such as cm, mmHg, %, ms)
+- interventions (exercise programmes, nutrition plans, treatments, strategies), with the constructs they target
+- client goals, constraints and preferences, moderating factors and individual differences
+"""
+
 class OntologyPrompts:
     """Centralized prompt system with ontology definitions and examples"""
     
@@ -59,11 +94,14 @@ class OntologyPrompts:
         
         return "\n".join(context_parts)
     
-    # STANDARD EXTRACTOR PROMPTS (Enhanced versions)
+    # CACHEABLE PROMPT PREFIX
     
-    def domains_constructs_standard(self, transcript: str) -> str:
-        """Enhanced standard domain/construct extraction with ontology guidance"""
-        ontology_context = self.get_ontology_context(["domain", "construct"])
+    def shared_context(self, transcript: str) -> str:
+        """Stable prefix shared by every pass: ontology framework followed by the transcript
+
+        Must be byte-identical across passes so the Anthropic prompt cache can reuse it.
+        """
+        ontology_context = self.get_ontology_context(list(self.ontology_definitions))
         
         return f"""
 You are analyzing a semi-structured interview transcript about health and performance assessment practices.
@@ -73,571 +111,319 @@ ONTOLOGY FRAMEWORK:
 
 TRANSCRIPT:
 {transcript}
+"""
+    
+    def cached_prompt(self, transcript: str, instructions: str) -> List[Dict]:
+        """Build message content with the shared prefix marked for prompt caching
 
-Extract and return a JSON structure with:
-{{
-    "practitioner_domains": [
-        {{
-            "domain_name": "string (use terminology from examples when possible)",
-            "domain_description": "string", 
-            "specialization_notes": "string"
-        }}
-    ],
-    "constructs_mentioned": [
-        {{
-            "construct_name": "string (use specific terminology when possible)",
-            "construct_description": "string",
-            "domain_association": "string",
-            "assessment_context": "string"
-        }}
-    ],
-    "sport_specificity": [
-        {{
-            "sport": "string",
-            "assessment_modifications": "string",
-            "intervention_modifications": "string"
-        }}
-    ]
-}}
+        The transcript is written to the cache by the first pass and read back by the later
+        passes, so only the short pass-specific instructions are billed at the full input rate.
+        """
+        return [
+            {"type": "text", "text": self.shared_context(transcript), "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": instructions}
+        ]
+    
+    # STANDARD EXTRACTOR PROMPTS (Enhanced versions)
+    
+    def domains_constructs_standard(self, transcript: str) -> List[Dict]:
+        """Enhanced standard domain/construct extraction with ontology guidance"""
+        return self.cached_prompt(transcript, f"""
+TASK: Using the DOMAIN and CONSTRUCT definitions in the ontology framework, extract and return a JSON structure with:
+{schema_layout(DOMAINS_CONSTRUCTS)}
 
 Be precise and look for specific terminology that matches the ontology framework.
-"""
+""")
     
-    def assessments_standard(self, transcript: str, constructs: List[str]) -> str:
+    def assessments_standard(self, transcript: str, constructs: List[str]) -> List[Dict]:
         """Enhanced standard assessment extraction with technology/metrics focus"""
         constructs_context = "\n".join([f"- {c}" for c in constructs])
-        ontology_context = self.get_ontology_context(["assessment", "technology", "metric"])
         
-        return f"""
-Analyze this interview transcript to extract assessment information.
-
-ONTOLOGY FRAMEWORK:
-{ontology_context}
+        return self.cached_prompt(transcript, f"""
+TASK: Extract assessment information, using the ASSESSMENT, TECHNOLOGY and METRIC definitions in the ontology framework.
 
 CONSTRUCTS TO ASSESS:
 {constructs_context}
 
-TRANSCRIPT:
-{transcript}
-
 For each assessment mentioned, extract:
-{{
-    "assessments": [
-        {{
-            "assessment_name": "string (exact name used)",
-            "assessment_description": "string",
-            "constructs_measured": ["list of constructs from above"],
-            "modality": "string (Physical test/Wearable monitoring/Labs/Imaging/Survey/etc.)",
-            "technology_vendor": {{
-                "name": "string (exact vendor/brand name)",
-                "type": "hardware/software/service",
-                "specific_equipment": "string (model numbers, specific devices)"
-            }},
-            "protocols": {{
-                "preparation_steps": ["list"],
-                "coaching_cues": ["specific instructions"],
-                "common_mistakes": ["errors that affect results"]
-            }},
-            "metrics": [
-                {{
-                    "metric_name": "string (exact metric name)",
-                    "unit": "string (specific units: cm, kg, mmHg, %, etc.)",
-                    "reference_ranges": "string (normal values mentioned)",
-                    "validity_confidence": "string",
-                    "reliability_confidence": "string"
-                }}
-            ],
-            "state_influences": [
-                {{
-                    "state_name": "string",
-                    "impact_on_assessment": "string",
-                    "impact_on_interpretation": "string"
-                }}
-            ],
-            "assets_generated": [
-                {{
-                    "asset_name": "string",
-                    "asset_type": "PDF report/raw data/video/dashboard/etc.",
-                    "description": "string"
-                }}
-            ]
-        }}
-    ]
-}}
+{schema_layout(ASSESSMENTS_STANDARD)}
 
 Hunt specifically for technology vendor names, specific equipment models, and measurable metrics with units.
-"""
+""")
     
-    def interventions_standard(self, transcript: str, constructs: List[str]) -> str:
+    def interventions_standard(self, transcript: str, constructs: List[str]) -> List[Dict]:
         """Enhanced standard intervention extraction"""
         constructs_context = "\n".join([f"- {c}" for c in constructs])
-        ontology_context = self.get_ontology_context(["intervention"])
         
-        return f"""
-Analyze this transcript for intervention information.
-
-ONTOLOGY FRAMEWORK:
-{ontology_context}
+        return self.cached_prompt(transcript, f"""
+TASK: Extract intervention information, using the INTERVENTION definition in the ontology framework.
 
 CONSTRUCTS TO TARGET:
 {constructs_context}
 
-TRANSCRIPT:
-{transcript}
-
 Extract:
-{{
-    "interventions": [
-        {{
-            "intervention_name": "string (exact name used)",
-            "intervention_description": "string",
-            "purpose": "string",
-            "constructs_targeted": ["which constructs from above list"],
-            "intervention_types": ["Physical/Nutrition/Sleep/Stress Management/Medical/Education/Recovery"],
-            "protocols": {{
-                "duration": "string (specific timeframes)",
-                "frequency": "string (how often)",
-                "intensity": "string (how hard/strong)",
-                "volume": "string (how much)",
-                "progression_criteria": ["when/how to advance"],
-                "reassessment_intervals": "string"
-            }},
-            "constraints_accommodations": [
-                {{
-                    "constraint_type": "string",
-                    "accommodation_strategy": "string"
-                }}
-            ],
-            "resource_requirements": {{
-                "time": "string",
-                "equipment": "string",
-                "staff_expertise": "string",
-                "cost_level": "High/Moderate/Low"
-            }}
-        }}
-    ]
-}}
+{schema_layout(INTERVENTIONS_STANDARD)}
 
 Look for specific protocols, dosage details, and resource requirements.
-"""
+""")
     
-    def relationships_standard(self, transcript: str, all_entities: Dict) -> str:
+    def relationships_standard(self, transcript: str, all_entities: Dict) -> List[Dict]:
         """Enhanced relationship extraction"""
-        return f"""
-Based on this interview transcript and the entities already identified, extract relationships:
+        return self.cached_prompt(transcript, f"""
+TASK: Based on the transcript and the entities already identified, extract relationships.
 
 IDENTIFIED ENTITIES:
 {json.dumps(all_entities, indent=2)[:1000]}...
 
-TRANSCRIPT:
-{transcript}
-
 Extract:
-{{
-    "construct_relationships": [
-        {{
-            "source_construct": "string",
-            "target_construct": "string", 
-            "relationship_type": "causal/association/dependency",
-            "relationship_description": "string",
-            "evidence_mentioned": "string",
-            "directionality": "bidirectional/unidirectional"
-        }}
-    ],
-    "assessment_intervention_links": [
-        {{
-            "assessment_name": "string",
-            "intervention_name": "string",
-            "connection_type": "informs/measures_progress/triggers/evaluates",
-            "description": "string"
-        }}
-    ],
-    "goal_connections": [
-        {{
-            "goal_description": "string",
-            "target_constructs": ["list"],
-            "supporting_assessments": ["list"],
-            "recommended_interventions": ["list"]
-        }}
-    ]
-}}
-"""
+{schema_layout(RELATIONSHIPS_STANDARD)}
+""")
+    
+    # ROBUST EXTRACTOR PROMPTS
+    
+    def contextual_factors_robust(self, transcript: str) -> List[Dict]:
+        """Goals, constraints, and contextual factors"""
+        return self.cached_prompt(transcript, f"""
+TASK: Extract all contextual information that affects assessment and intervention decisions.
+
+Extract contextual factors:
+{schema_layout(CONTEXTUAL_FACTORS)}
+""")
+    
+    def relationships_robust(self, transcript: str) -> List[Dict]:
+        """Comprehensive relationship extraction"""
+        return self.cached_prompt(transcript, f"""
+TASK: Analyze this interview for ALL types of relationships, dependencies, and connections discussed.
+
+Extract all relationship types:
+{schema_layout(RELATIONSHIPS_ROBUST)}
+""")
+    
+    def validation_robust(self, transcript: str) -> List[Dict]:
+        """Gaps and confidence in the robust extraction"""
+        return self.cached_prompt(transcript, f"""
+TASK: Review this transcript and the extracted information to identify any significant gaps.
+
+Provide validation:
+{schema_layout(VALIDATION_ROBUST)}
+""")
     
     # ONTOLOGY-GUIDED EXTRACTOR PROMPTS
     
-    def knowledge_mapping_guided(self, transcript: str) -> str:
+    def knowledge_mapping_guided(self, transcript: str) -> List[Dict]:
         """Comprehensive knowledge domain mapping"""
-        return f"""
-Analyze this interview transcript to create a comprehensive knowledge map. Be expansive and inclusive - capture ALL areas of expertise, knowledge domains, and specializations mentioned.
-
-TRANSCRIPT:
-{transcript}
+        return self.cached_prompt(transcript, f"""
+TASK: Create a comprehensive knowledge map of this interview. Be expansive and inclusive - capture ALL areas of expertise, knowledge domains, and specializations mentioned.
 
 Extract and return JSON:
-{{
-    "primary_expertise": [
-        {{
-            "area": "string",
-            "description": "string",
-            "scope": "string",
-            "depth_indicators": ["specific examples showing depth"]
-        }}
-    ],
-    "knowledge_domains": [
-        {{
-            "domain": "string", 
-            "description": "string",
-            "sub_areas": ["list of sub-specializations"]
-        }}
-    ],
-    "target_populations": [
-        {{
-            "population": "string",
-            "characteristics": "string",
-            "specific_needs": "string"
-        }}
-    ]
-}}
-"""
+{schema_layout(KNOWLEDGE_MAP)}
+""")
     
-    def constructs_guided(self, transcript: str, expertise_context: str = "") -> str:
+    def constructs_guided(self, transcript: str, expertise_context: str = "") -> List[Dict]:
         """Ontology-guided construct extraction"""
-        ontology_context = self.get_ontology_context(["construct"])
-        
-        return f"""
-Extract ALL constructs using this specific ontology definition.
-
-ONTOLOGY FRAMEWORK:
-{ontology_context}
+        return self.cached_prompt(transcript, f"""
+TASK: Extract ALL constructs using the CONSTRUCT definition in the ontology framework.
 
 EXPERTISE CONTEXT: {expertise_context}
 
-TRANSCRIPT:
-{transcript}
-
 Look specifically for attributes that practitioners measure, track, or influence. Use exact terminology when possible.
 
 Extract:
-{{
-    "constructs_mentioned": [
-        {{
-            "construct_name": "string (use specific terminology when possible)",
-            "construct_description": "string",
-            "domain_association": "string",
-            "why_important": "string (why practitioner focuses on this)",
-            "how_assessed": "string (how they evaluate this construct)",
-            "measurement_approach": "string"
-        }}
-    ],
-    "health_performance_factors": [
-        {{
-            "factor_name": "string",
-            "factor_type": "string (physiological/psychological/behavioral/environmental)",
-            "description": "string",
-            "measurement_approach": "string"
-        }}
-    ]
-}}
+{schema_layout(CONSTRUCTS_DETAILED)}
 
 Be specific - look for exact terminology like "sleep quality," "muscular power," "insulin sensitivity," etc.
-"""
+""")
     
-    def assessments_guided(self, transcript: str, constructs: List[str]) -> str:
+    def assessments_guided(self, transcript: str, constructs: List[str]) -> List[Dict]:
         """Ontology-guided assessment extraction"""
         constructs_context = ", ".join(constructs[:10])
-        ontology_context = self.get_ontology_context(["assessment"])
         
-        return f"""
-Extract ALL assessments using this specific definition.
-
-ONTOLOGY FRAMEWORK:
-{ontology_context}
+        return self.cached_prompt(transcript, f"""
+TASK: Extract ALL assessments using the ASSESSMENT definition in the ontology framework.
 
 CONSTRUCTS IDENTIFIED: {constructs_context}
 
-TRANSCRIPT:
-{transcript}
-
 Look for ANY method used to evaluate, test, measure, or gather information about the constructs above.
 
 Extract all assessments:
-{{
-    "assessments": [
-        {{
-            "assessment_name": "string (exact name used)",
-            "assessment_description": "string",
-            "constructs_measured": ["list - which constructs does this assess"],
-            "modality": "string (Physical test/Wearable monitoring/Consultation/Labs/Imaging/Survey/etc)",
-            "administration_details": {{
-                "where_performed": "string (lab/clinic/field/home)",
-                "duration": "string",
-                "preparation_required": "string",
-                "frequency": "string"
-            }},
-            "protocol_details": {{
-                "key_steps": ["list of main protocol steps"],
-                "coaching_cues": ["specific instructions given"],
-                "common_mistakes": ["errors that affect results"],
-                "quality_controls": ["how to ensure good data"]
-            }}
-        }}
-    ]
-}}
+{schema_layout(ASSESSMENTS_DETAILED)}
 
 Include formal tests, informal observations, questionnaires, monitoring approaches - anything used to gather assessment data.
-"""
-    
-    def technologies_metrics_guided(self, transcript: str, assessments: List[str]) -> str:
-        """Dedicated technology and metrics extraction"""
-        tech_context = self.get_ontology_context(["technology", "metric"])
-        assessments_context = ", ".join(assessments[:10])
-        
-        return f"""
-Extract ALL technologies and metrics mentioned in this interview.
-
-ONTOLOGY FRAMEWORK:
-{tech_context}
-
-ASSESSMENTS IDENTIFIED: {assessments_context}
-
-TRANSCRIPT:
-{transcript}
-
-Hunt specifically for:
-1. Equipment brands, models, software names
-2. Specific measurable outputs with units
-3. Any vendor or manufacturer names
-4. Specific measurement values or ranges
-
-Extract technologies and metrics:
-{{
-    "technologies": [
-        {{
-            "technology_name": "string (exact name/brand mentioned)",
-            "vendor_manufacturer": "string (company name)",
-            "technology_type": "string (hardware/software/device/service)",
-            "specific_model": "string (if mentioned)",
-            "used_for_assessments": ["which assessments use this"],
-            "what_it_measures": ["capabilities it assesses"],
-            "data_output_format": "string (PDF report/raw data/dashboard/etc)",
-            "mentioned_advantages": ["benefits mentioned"],
-            "mentioned_limitations": ["constraints mentioned"]
-        }}
-    ],
-    "metrics": [
-        {{
-            "metric_name": "string (exact name used)",
-            "measurement_unit": "string (cm, kg, mmHg, %, etc)",
-            "assessment_source": "string (which assessment produces this)",
-            "normal_ranges": "string (any reference values mentioned)",
-            "interpretation_notes": "string (how values are interpreted)",
-            "factors_affecting_values": ["what influences this measurement"],
-            "reliability_notes": "string (confidence/validity mentioned)"
-        }}
-    ],
-    "measurement_contexts": [
-        {{
-            "context_description": "string",
-            "specific_values_mentioned": ["any specific numbers, ranges, or thresholds"],
-            "reference_populations": ["athlete/health seeker/age groups/etc"],
-            "timing_considerations": ["when measurements are taken"]
-        }}
-    ]
-}}
-
-Look for specific brand names, model numbers, measurement units, reference ranges, and any quantitative values mentioned.
-"""
+""")
     
-    def interventions_guided(self, transcript: str, constructs: List[str]) -> str:
+    def interventions_guided(self, transcript: str, constructs: List[str]) -> List[Dict]:
         """Ontology-guided intervention extraction"""
-        intervention_context = self.get_ontology_context(["intervention"])
         constructs_context = ", ".join(constructs[:10])
         
-        return f"""
-Extract ALL interventions using this specific definition.
-
-ONTOLOGY FRAMEWORK:
-{intervention_context}
+        return self.cached_prompt(transcript, f"""
+TASK: Extract ALL interventions using the INTERVENTION definition in the ontology framework.
 
 CONSTRUCTS TO TARGET: {constructs_context}
 
-TRANSCRIPT:
-{transcript}
-
 Look for ANY strategy, program, treatment, or approach used to improve the constructs above.
 
 Extract all interventions:
-{{
-    "interventions": [
-        {{
-            "intervention_name": "string (exact name used)",
-            "intervention_description": "string",
-            "purpose": "string (what it aims to achieve)",
-            "constructs_targeted": ["which constructs does this improve"],
-            "intervention_types": ["Physical/Nutrition/Sleep/Stress Management/Medical/Education/Recovery"],
-            "dosage_details": {{
-                "frequency": "string (how often)",
-                "duration": "string (how long)",
-                "intensity": "string (how hard/strong)",
-                "volume": "string (how much)",
-                "progression": "string (how it advances)"
-            }},
-            "implementation_specifics": {{
-                "delivery_method": "string (how it's delivered)",
-                "monitoring_approach": "string (how progress is tracked)",
-                "adjustment_criteria": "string (when/how it's modified)"
-            }},
-            "resource_requirements": {{
-                "equipment_needed": ["list"],
-                "time_commitment": "string",
-                "expertise_required": "string",
-                "cost_level": "string (High/Moderate/Low if mentioned)"
-            }}
-        }}
-    ]
-}}
+{schema_layout(INTERVENTIONS_DETAILED)}
 
 Include exercise programs, nutrition plans, lifestyle modifications, medical treatments, education protocols - anything designed to improve health/performance outcomes.
-"""
-    # Quick fix for src/prompts.py - add these methods to OntologyPrompts class
-
-    def technologies_metrics_guided_fixed(self, transcript: str, assessments: List[str]) -> str:
+""")
+    
+    def technologies_metrics_guided_fixed(self, transcript: str, assessments: List[str]) -> List[Dict]:
         """Fixed technology and metrics extraction with strict JSON requirements"""
-        tech_context = self.get_ontology_context(["technology", "metric"])
         assessments_context = ", ".join(assessments[:10])
         
-        return f"""
-    Extract ALL technologies and metrics mentioned in this interview transcript.
-    
-    ONTOLOGY FRAMEWORK:
-    {tech_context}
-    
-    ASSESSMENTS IDENTIFIED: {assessments_context}
-    
-    TRANSCRIPT:
-    {transcript}...
-    
-    CRITICAL: Return ONLY valid JSON. No explanatory text, no markdown, no comments.
-    
-    {{
-        "technologies": [
-            {{
-                "technology_name": "string",
-                "vendor_manufacturer": "string", 
-                "technology_type": "hardware/software/service",
-                "specific_model": "string",
-                "used_for_assessments": ["list"],
-                "what_it_measures": ["list"],
-                "data_output_format": "string"
-            }}
-        ],
-        "metrics": [
-            {{
-                "metric_name": "string",
-                "measurement_unit": "string",
-                "assessment_source": "string",
-                "normal_ranges": "string",
-                "interpretation_notes": "string"
-            }}
-        ]
-    }}
+        return self.cached_prompt(transcript, f"""
+TASK: Extract ALL technologies and metrics mentioned in this interview transcript, using the TECHNOLOGY and METRIC definitions in the ontology framework.
+
+ASSESSMENTS IDENTIFIED: {assessments_context}
+
+CRITICAL: Return ONLY valid JSON. No explanatory text, no markdown, no comments.
+
+{schema_layout(TECHNOLOGIES_METRICS)}
+
+Hunt for: equipment brands (VALD, Oura, COSMED), measurement units (cm, mmHg, %), specific values, vendor names.
+""")
     
-    Hunt for: equipment brands (VALD, Oura, COSMED), measurement units (cm, mmHg, %), specific values, vendor names.
-    """
+    def assessments_guided_fixed(self, transcript: str, constructs: List[str]) -> List[Dict]:
+        """Fixed assessment extraction with strict JSON requirements"""
+        constructs_context = ", ".join(constructs[:10])
+        
+        return self.cached_prompt(transcript, f"""
+TASK: Extract the assessments mentioned, using the ASSESSMENT definition in the ontology framework.
+
+CONSTRUCTS: {constructs_context}
+
+Return ONLY valid JSON:
+
+{schema_layout(ASSESSMENTS)}
+""")
     
-    def assessments_guided_fixed(self, transcript: str, constructs: List[str]) -> str:
-        """Fixed assessment extraction with truncated transcript"""
+    def interventions_guided_fixed(self, transcript: str, constructs: List[str]) -> List[Dict]:
+        """Fixed intervention extraction"""
         constructs_context = ", ".join(constructs[:10])
-        ontology_context = self.get_ontology_context(["assessment"])
         
-        return f"""
-    ONTOLOGY FRAMEWORK:
-    {ontology_context}
+        return self.cached_prompt(transcript, f"""
+TASK: Extract the interventions mentioned, using the INTERVENTION definition in the ontology framework.
+
+CONSTRUCTS: {constructs_context}
+
+Return ONLY valid JSON:
+
+{schema_layout(INTERVENTIONS)}
+
+Look for: exercise programs, nutrition plans, treatments, protocols, strategies to improve health/performance.
+""")
     
-    CONSTRUCTS: {constructs_context}
+    def goals_constraints_guided(self, transcript: str, constructs: List[str]) -> List[Dict]:
+        """Goals, constraints, and contextual factors"""
+        return self.cached_prompt(transcript, f"""
+TASK: Extract goals, constraints, and contextual factors that affect practice decisions.
+
+CONSTRUCTS CONTEXT: {", ".join(constructs[:10])}
+
+Extract contextual information:
+{schema_layout(GOALS_CONSTRAINTS)}
+""")
     
-    TRANSCRIPT (truncated):
-    {transcript}...
+    def relationships_guided(self, transcript: str, constructs: List[str], assessments: List[str], interventions: List[str]) -> List[Dict]:
+        """Relationships between the entities identified in earlier passes"""
+        return self.cached_prompt(transcript, f"""
+TASK: Analyze this interview for relationships between the entities identified:
+
+CONSTRUCTS: {", ".join(constructs[:10])}
+ASSESSMENTS: {", ".join(assessments[:10])}
+INTERVENTIONS: {", ".join(interventions[:10])}
+
+Extract all relationships mentioned:
+{schema_layout(RELATIONSHIPS)}
+""")
     
-    Return ONLY valid JSON:
+    def protocols_guided(self, transcript: str, assessments: List[str], interventions: List[str]) -> List[Dict]:
+        """Detailed protocols and implementation specifics"""
+        return self.cached_prompt(transcript, f"""
+TASK: Extract detailed protocols and implementation specifics for the assessments and interventions identified.
+
+ASSESSMENTS: {", ".join(assessments[:10])}
+INTERVENTIONS: {", ".join(interventions[:10])}
+
+Extract detailed protocols:
+{schema_layout(PROTOCOLS)}
+""")
     
-    {{
-        "assessments": [
-            {{
-                "assessment_name": "string",
-                "assessment_description": "string", 
-                "constructs_measured": ["list"],
-                "modality": "string"
-            }}
-        ]
-    }}
-    """
+    def validation_guided(self, transcript: str, all_extractions: Dict) -> List[Dict]:
+        """Validation and gap identification"""
+        counts = {
+            "constructs_identified": len(all_extractions.get('constructs', {}).get('constructs_mentioned', [])),
+            "assessments_identified": len(all_extractions.get('assessments', {}).get('assessments', [])),
+            "interventions_identified": len(all_extractions.get('interventions', {}).get('interventions', [])),
+            "technologies_identified": len(all_extractions.get('technologies', {}).get('technologies', [])),
+            "metrics_identified": len(all_extractions.get('technologies', {}).get('metrics', []))
+        }
+        return self.cached_prompt(transcript, f"""
+TASK: Review the transcript and the extracted information to identify any significant gaps.
+
+ENTITIES EXTRACTED (copy these counts into ontology_coverage_check):
+{json.dumps(counts, indent=4)}
+
+Perform ontology validation:
+{schema_layout(VALIDATION)}
+""")
+
+    # FUSED EXTRACTOR PROMPTS (replies are structured tool calls; see src/output_schemas.py)
     
-    def interventions_guided_fixed(self, transcript: str, constructs: List[str]) -> str:
-        """Fixed intervention extraction"""
-        constructs_context = ", ".join(constructs[:10])
-        
-        return f"""
-    CONSTRUCTS: {constructs_context}
+    def fused_entities(self, transcript: str) -> List[Dict]:
+        """Every entity type in one reply"""
+        return self.cached_prompt(transcript, f"""
+TASK: Extract ALL of the following from this interview in a single pass, using the definitions in the ontology framework:
+{FUSED_ENTITY_CHECKLIST}
+Use specific terminology from the transcript, matching the ontology examples where they fit. Be exhaustive: list every
+distinct entity once. Record everything with the record_entities tool.
+""")
     
-    TRANSCRIPT (truncated):
-    {transcript}...
+    def fused_links(self, transcript: str, constructs: List[str], assessments: List[str], interventions: List[str]) -> List[Dict]:
+        """Relationships and protocols for the entities found by fused_entities"""
+        return self.cached_prompt(transcript, f"""
+TASK: For the entities below, extract the relationships mentioned in this interview and the protocols used to run the
+assessments and deliver the interventions.
+
+CONSTRUCTS: {", ".join(constructs[:30])}
+ASSESSMENTS: {", ".join(assessments[:30])}
+INTERVENTIONS: {", ".join(interventions[:30])}
+
+Relationships: construct-to-construct (causal/association/dependency), which constructs each assessment measures, which
+constructs each intervention targets, and how assessments inform or monitor interventions.
+Protocols: ordered steps, preparation, equipment setup, dosage and progression, monitoring and safety considerations.
+Record everything with the record_links tool.
+""")
     
-    Return ONLY valid JSON:
+    def fused_all(self, transcript: str) -> List[Dict]:
+        """Entities, relationships and protocols in one reply"""
+        return self.cached_prompt(transcript, f"""
+TASK: Extract ALL of the following from this interview in a single pass, using the definitions in the ontology framework:
+{FUSED_ENTITY_CHECKLIST}- relationships between constructs, assessments and interventions
+- assessment and intervention protocols (steps, preparation, equipment, dosage, monitoring, safety)
+
+Use specific terminology from the transcript, matching the ontology examples where they fit. Be exhaustive: list every
+distinct entity once. Record everything with the record_ontology tool.
+""")
+
     
-    {{
-        "interventions": [
-            {{
-                "intervention_name": "string",
-                "intervention_description": "string",
-                "constructs_targeted": ["list"],
-                "intervention_types": ["list"]
-            }}
-        ]
-    }}
+    # SCHEMA REPAIR (sent without the transcript: only the broken output and what is wrong with it)
     
-    Look for: exercise programs, nutrition plans, treatments, protocols, strategies to improve health/performance.
-    """    
+    def repair_output(self, broken_json: str, problems: List[str]) -> str:
+        """Ask for a reply that failed its schema check to be corrected, changing nothing else"""
+        issues = "\n".join(f"- {problem}" for problem in problems)
+        return f"""The JSON below was extracted from an interview transcript but does not match its required schema.
 
-    def validation_guided(self, transcript: str, all_extractions: Dict) -> str:
-        """Validation and gap identification"""
-        return f"""
-Review this transcript and the extracted information to identify any significant gaps.
+PROBLEMS:
+{issues}
 
-TRANSCRIPT EXCERPT :
-{transcript}...
+BROKEN OUTPUT:
+{broken_json}
 
-Perform ontology validation:
-{{
-    "ontology_coverage_check": {{
-        "constructs_identified": {len(all_extractions.get('constructs', {}).get('constructs_mentioned', []))},
-        "assessments_identified": {len(all_extractions.get('assessments', {}).get('assessments', []))},
-        "interventions_identified": {len(all_extractions.get('interventions', {}).get('interventions', []))},
-        "technologies_identified": {len(all_extractions.get('technologies', {}).get('technologies', []))},
-        "metrics_identified": {len(all_extractions.get('technologies', {}).get('metrics', []))}
-    }},
-    "potential_missed_entities": [
-        {{
-            "entity_type": "string (construct/assessment/intervention/technology/metric)",
-            "potential_entity": "string",
-            "evidence_in_transcript": "string",
-            "confidence": "string (high/medium/low)"
-        }}
-    ],
-    "quality_assessment": {{
-        "extraction_completeness": "string (high/medium/low)",
-        "terminology_consistency": "string (high/medium/low)",
-        "relationship_coverage": "string (high/medium/low)",
-        "overall_confidence": "string (high/medium/low)"
-    }},
-    "recommendations": [
-        {{
-            "recommendation_type": "string",
-            "description": "string",
-            "priority": "string (high/medium/low)"
-        }}
-    ]
-}}
+Return the same data corrected to fit the schema: fix syntax errors and wrong types, fill missing required fields
+from the data already present (use an empty string or empty list when nothing fits). Do not add, drop or rename
+entities. Record the result with the provided tool.
 """
 
 
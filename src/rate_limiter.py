@@ -0,0 +1,183 @@
+# src/rate_limiter.py
+"""
+Shared rate limiting and retry policy for Anthropic API calls
+Token buckets for requests, input tokens and output tokens per minute, tuned live from rate-limit response headers
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import anthropic
+
+DEFAULT_REQUESTS_PER_MINUTE = 50
+DEFAULT_TOKENS_PER_MINUTE = 30000
+DEFAULT_OUTPUT_TOKENS_PER_MINUTE = 8000
+DEFAULT_MAX_RETRIES = 6
+
+# Backoff before retry n is drawn from [0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2**n)] ("full jitter")
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S = 60.0
+
+# Status codes worth retrying: timeout, conflict, rate limit, server errors and 529 overloaded
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class TokenBucket:
+    """Refills continuously up to `capacity` per minute; may go negative to queue callers"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def take(self, amount: float, now: float) -> float:
+        """Debit `amount` and return seconds until the bucket is back above zero"""
+        self.refill(now)
+        self.level -= min(amount, self.capacity)  # Oversized requests wait for at most a full bucket
+        return 0.0 if self.level >= 0 else -self.level * 60 / self.capacity
+
+    def set_limit(self, per_minute: Optional[float], remaining: Optional[float], now: float):
+        """Adopt the server's limit and never assume more headroom than it reports"""
+        self.refill(now)
+        if per_minute:
+            self.capacity = float(per_minute)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+
+class RateLimiter:
+    """Paces requests across all workers and records throttling/retry statistics
+
+    reserve() never blocks: it debits the buckets and returns how long the caller should wait,
+    so the same limiter serves threads (time.sleep) and coroutines (asyncio.sleep). The output
+    bucket is debited a request's max_tokens up front, as the API does, and release_output()
+    gives back what the reply didn't use (all of it when the attempt fails).
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 output_tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute or float(os.getenv('EXTRACTION_RPM', DEFAULT_REQUESTS_PER_MINUTE)))
+        self.tokens = TokenBucket(tokens_per_minute or float(os.getenv('EXTRACTION_TPM', DEFAULT_TOKENS_PER_MINUTE)))
+        self.output_tokens = TokenBucket(output_tokens_per_minute or
+                                         float(os.getenv('EXTRACTION_OUTPUT_TPM', DEFAULT_OUTPUT_TOKENS_PER_MINUTE)))
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "throttled_requests": 0,
+            "throttle_wait_s": 0.0,
+            "retries": 0,
+            "retry_wait_s": 0.0,
+            "retries_by_status": {},
+            "failed_requests": 0
+        }
+
+    def reserve(self, estimated_tokens: int, max_output_tokens: int = 0, retry: bool = False) -> float:
+        """Claim capacity for one attempt and return the delay before it may be sent
+
+        Retries of a request (retry=True) add to the wait times but not to the request counts.
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = max(
+                self.requests.take(1, now),
+                self.tokens.take(estimated_tokens, now),
+                self.output_tokens.take(max_output_tokens, now),
+                self._cooldown_until - now
+            )
+            if not retry:
+                self.stats["requests"] += 1
+            if delay > 0:
+                self.stats["throttled_requests"] += not retry
+                self.stats["throttle_wait_s"] += delay
+            return max(0.0, delay)
+
+    def release_output(self, unused_tokens: int):
+        """Return output capacity reserved for a reply that came back shorter than max_tokens"""
+        if unused_tokens > 0:
+            with self._lock:
+                bucket = self.output_tokens
+                bucket.refill(time.monotonic())
+                bucket.level = min(bucket.capacity, bucket.level + unused_tokens)
+
+    def update_from_headers(self, headers):
+        """Tune the buckets from anthropic-ratelimit-* response headers"""
+        def number(name):
+            value = headers.get(name)
+            try:
+                return float(value) if value is not None else None
+            except ValueError:
+                return None
+
+        with self._lock:
+            now = time.monotonic()
+            self.requests.set_limit(number("anthropic-ratelimit-requests-limit"),
+                                    number("anthropic-ratelimit-requests-remaining"), now)
+            self.tokens.set_limit(number("anthropic-ratelimit-input-tokens-limit"),
+                                  number("anthropic-ratelimit-input-tokens-remaining"), now)
+            self.output_tokens.set_limit(number("anthropic-ratelimit-output-tokens-limit"),
+                                         number("anthropic-ratelimit-output-tokens-remaining"), now)
+
+    def retry_delay(self, error: Exception, attempt: int, max_retries: int) -> Optional[float]:
+        """Seconds to wait before retrying after `error`, or None if it should not be retried
+
+        Rate-limit and overload errors also pause every other worker for the same period.
+        """
+        status = retry_status(error)
+        if status is None or attempt >= max_retries:
+            with self._lock:
+                self.stats["failed_requests"] += 1
+            return None
+
+        delay = random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        with self._lock:
+            if status in (429, 529):
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+            self.stats["retries"] += 1
+            self.stats["retry_wait_s"] += delay
+            key = str(status)
+            self.stats["retries_by_status"][key] = self.stats["retries_by_status"].get(key, 0) + 1
+        return delay
+
+    def summary(self) -> Dict:
+        """Statistics for the run summary, plus the limits currently in force"""
+        with self._lock:
+            summary = dict(self.stats, retries_by_status=dict(self.stats["retries_by_status"]))
+            summary["requests_per_minute_limit"] = self.requests.capacity
+            summary["input_tokens_per_minute_limit"] = self.tokens.capacity
+            summary["output_tokens_per_minute_limit"] = self.output_tokens.capacity
+        summary["throttle_wait_s"] = round(summary["throttle_wait_s"], 1)
+        summary["retry_wait_s"] = round(summary["retry_wait_s"], 1)
+        return summary
+
+
+def retry_status(error: Exception) -> Optional[int]:
+    """HTTP status to report for a retryable error (0 for connection problems), else None"""
+    if isinstance(error, anthropic.APIConnectionError):  # Includes timeouts
+        return 0
+    if isinstance(error, anthropic.APIStatusError) and error.status_code in RETRYABLE_STATUS:
+        return error.status_code
+    return None
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Server-requested wait from a retry-after header, if the error carries one"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
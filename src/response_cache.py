@@ -0,0 +1,111 @@
+# src/response_cache.py
+"""
+Content-addressed on-disk cache of API responses
+Keyed by a hash of the full request, so unchanged passes are free when a run is repeated
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = "data/cache/responses.sqlite"
+DEFAULT_MAX_MB = 512
+
+
+class ResponseCache:
+    """SQLite-backed response cache with size-based least-recently-used eviction"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_mb: float = DEFAULT_MAX_MB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+        # One connection shared by all worker threads, serialised by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt, max_tokens: int, temperature: float, tool: Optional[Dict] = None) -> str:
+        """Hash everything that determines the response; prompt may be text or content blocks"""
+        request = [model, prompt, max_tokens, temperature] + ([tool] if tool else [])
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text, refreshing its LRU timestamp, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        """Store a response and evict the least recently used entries if over the size limit"""
+        size = len(response.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def discard(self, key: str):
+        """Drop an entry (e.g. a response that turned out not to be valid JSON)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict_locked(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def stats(self) -> Dict:
+        """Hit/miss counts for this run plus current cache size"""
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size_mb": round(total / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2)
+        }
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
@@ -0,0 +1,283 @@
+# src/results_store.py
+"""
+Per-transcript results store
+One JSON record per transcript plus an append-only manifest, so saving a file's result never rewrites the others
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from src.atomic_io import append_line_durable, read_json_lines, write_json_atomic, write_text_atomic
+
+DEFAULT_STORE_DIR = "data/outputs/results"
+LEGACY_RESULTS_FILE = "data/outputs/extraction_results.json"
+
+
+class ResultsStore:
+    """Results stored as records/<hash>.json, indexed by manifest.jsonl
+
+    Each manifest line describes the latest record for a file (name, status, fingerprint), so the
+    incremental skip-list is built from the manifest alone. Later lines supersede earlier ones and
+    {"file_name": ..., "deleted": true} removes a file. Running totals live in summary.json and each
+    run's statistics are appended to runs.jsonl, with its per-request usage report in reports/.
+
+    Every change is first appended (fsynced) to wal.jsonl with the full result, then applied to the
+    record and manifest. If the process dies part-way through, the log is replayed the next time the
+    store is opened, so a completed extraction is never lost to a bad shutdown. checkpoint() empties
+    the log once everything in it is safely applied.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self.records_dir = self.root / "records"
+        self.manifest_path = self.root / "manifest.jsonl"
+        self.summary_path = self.root / "summary.json"
+        self.runs_path = self.root / "runs.jsonl"
+        self.wal_path = self.root / "wal.jsonl"
+        self.reports_dir = self.root / "reports"
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._manifest_lines = 0
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists() or self.wal_path.exists()
+
+    def manifest(self) -> Dict[str, Dict]:
+        """Latest manifest entry per file name, in the order files were first stored"""
+        with self._lock:
+            return dict(self._load_manifest())
+
+    def entry(self, file_name: str) -> Optional[Dict]:
+        """Latest manifest entry for one file"""
+        with self._lock:
+            return self._load_manifest().get(file_name)
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if self._manifest is None:
+            self._manifest = {}
+            for entry in read_json_lines(self.manifest_path):
+                self._manifest_lines += 1
+                self._apply_manifest_entry(entry)
+            self._replay_wal()
+        return self._manifest
+
+    def _apply_manifest_entry(self, entry: Dict):
+        if entry.get("deleted"):
+            self._manifest.pop(entry["file_name"], None)
+        else:
+            self._manifest[entry["file_name"]] = entry
+
+    def _replay_wal(self):
+        """Re-apply logged changes that didn't reach the manifest (or whose record is unreadable)"""
+        replayed = 0
+        for op in read_json_lines(self.wal_path):
+            file_name = op["file_name"]
+            if op.get("deleted"):
+                if file_name in self._manifest:
+                    self._remove_locked(file_name, log=False)
+                    replayed += 1
+            elif self._manifest.get(file_name) != op["entry"] or self._read_record(file_name) is None:
+                self._put_locked(op["entry"], op["result"], log=False)
+                replayed += 1
+
+        if replayed:
+            print(f"🩹 Recovered {replayed} result(s) from the write-ahead log after an interrupted run")
+        if self.wal_path.exists():
+            self._checkpoint_locked()
+
+    def _record_path(self, file_name: str) -> Path:
+        return self.records_dir / f"{hashlib.sha256(file_name.encode('utf-8')).hexdigest()[:20]}.json"
+
+    def _write_json(self, path: Path, data):
+        write_json_atomic(path, data, ensure_ascii=False)
+
+    def _append_manifest(self, entry: Dict):
+        append_line_durable(self.manifest_path, json.dumps(entry, ensure_ascii=False))
+        self._manifest_lines += 1
+
+    def _append_wal(self, op: Dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        append_line_durable(self.wal_path, json.dumps(op, ensure_ascii=False))
+
+    def _put_locked(self, entry: Dict, file_result: Dict, log: bool = True):
+        if log:
+            self._append_wal({"file_name": entry["file_name"], "entry": entry, "result": file_result})
+        self.records_dir.mkdir(parents=True, exist_ok=True)
+        self._write_json(self.records_dir / entry["record"], file_result)
+        self._append_manifest(entry)
+        self._manifest[entry["file_name"]] = entry
+
+    def _remove_locked(self, file_name: str, log: bool = True):
+        if log:
+            self._append_wal({"file_name": file_name, "deleted": True})
+        self._append_manifest({"file_name": file_name, "deleted": True})
+        del self._manifest[file_name]
+        record_path = self._record_path(file_name)
+        if record_path.exists():
+            record_path.unlink()
+
+    def _checkpoint_locked(self):
+        # Records and manifest lines are fsynced as they are written, so the log can simply go
+        if self.wal_path.exists():
+            self.wal_path.unlink()
+
+    def _read_summary(self) -> Dict:
+        if self.summary_path.exists():
+            with open(self.summary_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {"total_api_calls": 0, "extraction_type": "Unknown"}
+
+    def put(self, file_result: Dict, api_calls: int = 0, extraction_type: Optional[str] = None):
+        """Store (or replace) one transcript's result"""
+        file_name = file_result["file_name"]
+        record_path = self._record_path(file_name)
+        entry = {
+            "file_name": file_name,
+            "record": record_path.name,
+            "status": "error" if "error" in file_result else "ok",
+            "fingerprint": file_result.get("fingerprint"),
+            "extraction_type": extraction_type,
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+
+        with self._lock:
+            self._load_manifest()
+            self._put_locked(entry, file_result)
+
+            self._update_summary_locked(api_calls, extraction_type)
+
+    def add_api_calls(self, api_calls: int):
+        """Count API calls that produced no stored result (e.g. a failed retry of a file that already succeeded)"""
+        with self._lock:
+            self._update_summary_locked(api_calls)
+
+    def _update_summary_locked(self, api_calls: int, extraction_type: Optional[str] = None):
+        if api_calls or extraction_type:
+            summary = self._read_summary()
+            summary["total_api_calls"] += api_calls
+            if extraction_type:
+                summary["extraction_type"] = extraction_type
+            self._write_json(self.summary_path, summary)
+
+    def remove(self, file_name: str):
+        """Drop a file from the store (its record is deleted, the manifest gets a tombstone)"""
+        with self._lock:
+            if file_name not in self._load_manifest():
+                return
+            self._remove_locked(file_name)
+
+    def checkpoint(self):
+        """Empty the write-ahead log; everything in it has already reached the records and manifest"""
+        with self._lock:
+            self._load_manifest()
+            self._checkpoint_locked()
+
+    def _read_record(self, file_name: str) -> Optional[Dict]:
+        record_path = self._record_path(file_name)
+        if not record_path.exists():
+            return None
+        try:
+            with open(record_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def get(self, file_name: str) -> Optional[Dict]:
+        """Load one transcript's result"""
+        with self._lock:
+            self._load_manifest()  # Replays the write-ahead log on first use
+        return self._read_record(file_name)
+
+    def records(self) -> Iterator[Dict]:
+        """Every stored result, in manifest order"""
+        for file_name in self.manifest():
+            record = self.get(file_name)
+            if record is not None:
+                yield record
+
+    def summary(self) -> Dict:
+        """Counts from the manifest plus running totals"""
+        manifest = self.manifest()
+        successful = len([e for e in manifest.values() if e["status"] == "ok"])
+        with self._lock:
+            totals = self._read_summary()
+        return {
+            "total_files": len(manifest),
+            "successful": successful,
+            "failed": len(manifest) - successful,
+            "extraction_type": totals["extraction_type"],
+            "total_api_calls": totals["total_api_calls"]
+        }
+
+    def record_run(self, run_summary: Dict):
+        """Append one run's statistics to runs.jsonl"""
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            append_line_durable(self.runs_path, json.dumps(dict(run_summary, finished_at=time.strftime("%Y-%m-%dT%H:%M:%S"))))
+
+    def save_run_report(self, report: Dict) -> Path:
+        """Write one run's full usage report to reports/run-<timestamp>.json"""
+        finished_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        path = self.reports_dir / f"run-{finished_at.replace(':', '')}.json"
+        with self._lock:
+            self.reports_dir.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(path, dict(report, finished_at=finished_at), indent=2, ensure_ascii=False)
+        return path
+
+    def compact(self, force: bool = False):
+        """Rewrite the manifest with one line per stored file, once superseded lines outnumber live ones"""
+        with self._lock:
+            manifest = self._load_manifest()
+            if not self.manifest_path.exists() or (not force and self._manifest_lines <= 2 * len(manifest)):
+                return
+            write_text_atomic(self.manifest_path,
+                              "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in manifest.values()))
+            self._manifest_lines = len(manifest)
+
+    def as_legacy(self) -> Optional[Dict]:
+        """All results in the old extraction_results.json layout, or None if the store is empty"""
+        if not self.manifest():
+            return None
+        return {"processed_files": list(self.records()), "summary": self.summary()}
+
+    def export_legacy(self, path: str = LEGACY_RESULTS_FILE) -> Path:
+        """Write the old single-file layout for tools that still read it"""
+        output_path = Path(path)
+        write_json_atomic(output_path, self.as_legacy() or {"processed_files": [], "summary": self.summary()}, indent=2)
+        return output_path
+
+    def import_legacy(self, path: str = LEGACY_RESULTS_FILE) -> int:
+        """One-off migration of an extraction_results.json into the store; returns files imported"""
+        legacy_path = Path(path)
+        if not legacy_path.exists():
+            return 0
+
+        with open(legacy_path, 'r') as f:
+            legacy = json.load(f)
+        legacy_summary = legacy.get("summary", {})
+        for file_result in legacy.get("processed_files", []):
+            self.put(file_result, extraction_type=legacy_summary.get("extraction_type"))
+
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._write_json(self.summary_path, {
+                "total_api_calls": legacy_summary.get("total_api_calls", 0),
+                "extraction_type": legacy_summary.get("extraction_type", "Unknown")
+            })
+        return len(legacy.get("processed_files", []))
+
+
+def load_results(store_dir: str = DEFAULT_STORE_DIR, legacy_path: str = LEGACY_RESULTS_FILE) -> Optional[Dict]:
+    """Results in the legacy layout, from the store if there is one, else from extraction_results.json"""
+    store = ResultsStore(store_dir)
+    if store.exists():
+        return store.as_legacy()
+
+    if Path(legacy_path).exists():
+        with open(legacy_path, 'r') as f:
+            return json.load(f)
+    return None
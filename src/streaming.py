@@ -0,0 +1,167 @@
+# src/streaming.py
+"""
+Incremental handling of streamed responses
+Parses the JSON reply as it arrives so finished fields can be used before the response ends
+"""
+
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.pass_graph import current_pass, publish_partial
+
+# Warn once a reply's estimated length passes this share of max_tokens
+TRUNCATION_WARNING_RATIO = 0.9
+
+
+def delta_text(event) -> Optional[str]:
+    """The reply text a stream event carries: a text delta, or a partial tool-input JSON delta"""
+    if getattr(event, "type", None) != "content_block_delta":
+        return None
+    delta = event.delta
+    if delta.type == "text_delta":
+        return delta.text
+    if delta.type == "input_json_delta":
+        return delta.partial_json
+    return None
+
+
+class IncrementalJSONParser:
+    """Scans a JSON object as text arrives and decodes each top-level field once its value is complete
+
+    Anything before the first '{' (such as a ```json fence) is skipped, as clean_response_text does.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add streamed text; returns the names of top-level fields completed by it"""
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        self._key_start = None
+                continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = i
+            elif ch == ":" and self._depth == 1:
+                self._value_start = i + 1
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._finish_field(text[self._value_start:i + 1], completed)
+                elif self._depth == 0:
+                    self._finish_field(text[self._value_start:i], completed)
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                self._finish_field(text[self._value_start:i], completed)
+
+        self._pos = len(text)
+        return completed
+
+    def _finish_field(self, value_text: str, completed: List[str]):
+        if self._key is None or self._value_start is None:
+            return
+        try:
+            self.fields[self._key] = json.loads(value_text)
+            completed.append(self._key)
+        except json.JSONDecodeError:
+            pass
+        self._key = None
+        self._value_start = None
+
+    @classmethod
+    def salvage(cls, text: str) -> Dict:
+        """Top-level fields that are complete in a reply that failed to parse as a whole"""
+        parser = cls()
+        parser.feed(text)
+        return parser.fields
+
+
+class StreamMonitor:
+    """Follows one streamed reply: publishes finished fields, warns about truncation and times generation
+
+    A continuation of a truncated reply streams on from the middle of the JSON, so the parser is first
+    fed the prefill it continues (fields completed there were already published by the earlier stream).
+    """
+
+    def __init__(self, max_tokens: int, log: Callable[[str], None], prefill: str = ""):
+        self.max_tokens = max_tokens
+        self.log = log
+        self.parser = IncrementalJSONParser()
+        self.parser.feed(prefill)
+        self.prefill_length = len(prefill)
+        self.pass_name = current_pass.get() or "request"
+        self.started = time.time()
+        self.first_token_at = None
+        self.warned = False
+
+    def on_text(self, chunk: str):
+        if self.first_token_at is None:
+            self.first_token_at = time.time()
+
+        completed = self.parser.feed(chunk)
+        if completed:
+            publish_partial({name: self.parser.fields[name] for name in completed})
+
+        # ~4 characters per token is enough to see truncation coming
+        generated = len(self.parser.text) - self.prefill_length
+        if not self.warned and generated / 4 > TRUNCATION_WARNING_RATIO * self.max_tokens:
+            self.warned = True
+            self.log(f"  ⚠️ {self.pass_name}: reply is close to max_tokens ({self.max_tokens}) and may be truncated")
+
+    @property
+    def first_token_latency(self) -> float:
+        return (self.first_token_at or time.time()) - self.started
+
+    def finish(self, message) -> Dict:
+        """Report throughput for the finished reply and return its stream statistics"""
+        output_tokens = getattr(message.usage, "output_tokens", 0) or 0
+        generation_s = max(time.time() - (self.first_token_at or self.started), 1e-6)
+        truncated = getattr(message, "stop_reason", None) == "max_tokens"
+
+        self.log(f"  ⏱️  {self.pass_name}: {output_tokens} tokens in {generation_s:.1f}s "
+                 f"({output_tokens / generation_s:.0f} tok/s, first token after {self.first_token_latency:.1f}s)")
+        if truncated:
+            self.log(f"  ✂️  {self.pass_name}: reply truncated at max_tokens ({self.max_tokens}); "
+                     f"complete fields: {list(self.parser.fields) or 'none'}")
+
+        return {
+            "output_tokens": output_tokens,
+            "generation_s": generation_s,
+            "first_token_s": self.first_token_latency,
+            "truncated": truncated
+        }
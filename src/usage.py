@@ -0,0 +1,136 @@
+# src/usage.py
+"""
+Per-request token and latency accounting
+Each API response's usage block is recorded against its transcript and pass, then rolled up for the run report
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+from src.models import model_info
+
+# Prompt-cache writes and reads are billed relative to the model's input price (see src/models.py)
+CACHE_WRITE_COST = 1.25
+CACHE_READ_COST = 0.1
+BATCH_PRICE_FACTOR = 0.5  # Message Batches are billed at half price
+
+_TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+
+def request_cost(input_tokens: int = 0, output_tokens: int = 0, cache_read_input_tokens: int = 0,
+                 cache_creation_input_tokens: int = 0, model: Optional[str] = None) -> float:
+    """USD cost of one request from its usage token counts (input_tokens excludes cached tokens, as in the API)"""
+    input_price, output_price, _ = model_info(model)
+    billed_input = (input_tokens + cache_creation_input_tokens * CACHE_WRITE_COST
+                    + cache_read_input_tokens * CACHE_READ_COST)
+    return (billed_input * input_price + output_tokens * output_price) / 1_000_000
+
+
+def _empty_totals() -> Dict:
+    return {
+        "requests": 0,
+        "failed_requests": 0,
+        "response_cache_hits": 0,
+        **{field: 0 for field in _TOKEN_FIELDS},
+        "cost_usd": 0.0,
+        "latency_s": 0.0,
+        "wait_s": 0.0,
+        "retries": 0,
+        "stop_reasons": {}
+    }
+
+
+def _add(totals: Dict, call: Dict):
+    if call["source"] == "response_cache":
+        totals["response_cache_hits"] += 1
+        return
+    totals["requests"] += 1
+    if call.get("error"):
+        totals["failed_requests"] += 1
+    for field in _TOKEN_FIELDS:
+        totals[field] += call[field]
+    totals["cost_usd"] += call["cost_usd"]
+    totals["latency_s"] += call["latency_s"]
+    totals["wait_s"] += call["wait_s"]
+    totals["retries"] += call["retries"]
+    if call.get("stop_reason"):
+        totals["stop_reasons"][call["stop_reason"]] = totals["stop_reasons"].get(call["stop_reason"], 0) + 1
+
+
+def _rounded(totals: Dict) -> Dict:
+    answered = totals["requests"] - totals["failed_requests"]
+    return dict(totals,
+                cost_usd=round(totals["cost_usd"], 4),
+                latency_s=round(totals["latency_s"], 1),
+                wait_s=round(totals["wait_s"], 1),
+                avg_latency_s=round(totals["latency_s"] / answered, 2) if answered else None)
+
+
+class UsageLedger:
+    """Thread-safe log of every request a run makes, with totals per pass and per transcript
+
+    A call is one logical request: retries of it are counted on the same entry, and the latency is
+    that of the attempt that answered (time spent throttled or backing off is kept apart as wait_s).
+    Replies served from the response cache are logged too, with no tokens, so cached passes show up.
+    """
+
+    def __init__(self):
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, file_name: str, pass_name: str, model: str, usage=None, latency: float = 0.0,
+               wait: float = 0.0, stop_reason: Optional[str] = None, retries: int = 0, source: str = "api",
+               error: Optional[Exception] = None):
+        """Log one request; usage is the response's usage block (None for failed requests and cache hits)"""
+        call = {
+            "file_name": file_name,
+            "pass": pass_name,
+            "model": model,
+            "source": source,
+            **{field: getattr(usage, field, 0) or 0 for field in _TOKEN_FIELDS},
+            "latency_s": round(latency, 3),
+            "wait_s": round(wait, 3),
+            "stop_reason": stop_reason,
+            "retries": retries
+        }
+        cost = request_cost(*(call[field] for field in _TOKEN_FIELDS), model=model)
+        call["cost_usd"] = round(cost * BATCH_PRICE_FACTOR if source == "batch" else cost, 6)
+        if error is not None:
+            call["error"] = f"{error.__class__.__name__}: {error}"
+        with self._lock:
+            self.calls.append(call)
+
+    def totals(self, file_name: Optional[str] = None) -> Dict:
+        """Totals across the run, or for one transcript"""
+        totals = _empty_totals()
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            if file_name is None or call["file_name"] == file_name:
+                _add(totals, call)
+        return _rounded(totals)
+
+    def summary(self) -> Dict:
+        """Run totals with breakdowns by pass, transcript and model, each sorted by cost"""
+        with self._lock:
+            calls = list(self.calls)
+
+        overall = _empty_totals()
+        breakdowns = {"by_pass": {}, "by_file": {}, "by_model": {}}
+        for call in calls:
+            _add(overall, call)
+            for breakdown, key in (("by_pass", call["pass"]), ("by_file", call["file_name"]),
+                                   ("by_model", call["model"])):
+                _add(breakdowns[breakdown].setdefault(key or "(none)", _empty_totals()), call)
+
+        summary = _rounded(overall)
+        for breakdown, groups in breakdowns.items():
+            ranked = sorted(groups.items(), key=lambda item: item[1]["cost_usd"], reverse=True)
+            summary[breakdown] = {key: _rounded(totals) for key, totals in ranked}
+        return summary
+
+    def report(self) -> Dict:
+        """Machine-readable run report: the summary plus every individual call"""
+        with self._lock:
+            calls = list(self.calls)
+        return dict(self.summary(), calls=calls)
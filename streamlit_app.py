@@ -2,12 +2,16 @@ import streamlit as st
 import json
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 from collections import defaultdict, Counter
 import os
-import networkx as nx
 import datetime
 import gspread
+from src.results_store import load_results
+from src.graph_figure import RENDERERS, WEBGL_NODE_THRESHOLD, build_network_figure
+from src.graph_layout import LAYOUT_BACKENDS, NODE_TYPES, build_graph, layout_for_view
+from src.entity_catalog import build_catalog, refresh_catalog, results_source, source_signature
+from src.canonicalisation import canonical_path, read_canonical_map
+from src.graph_store import open_graph_store
 from oauth2client.service_account import ServiceAccountCredentials
 
 
@@ -58,255 +62,64 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def results_signature():
+    """Path, mtime and size of the results file, so cached data is reloaded once a run changes it"""
+    source = results_source()
+    if source is None:
+        return None
+    signature = source_signature(source, with_hash=False)
+    return (str(source), signature["mtime_ns"], signature["size"])
+
 @st.cache_data
-def load_extraction_data():
-    """Load the extraction results with caching"""
+def load_extraction_data(signature=None):
+    """Load the extraction results with caching (keyed on the results signature)"""
     try:
-        with open('data/outputs/extraction_results.json', 'r') as f:
-            data = json.load(f)
+        data = load_results()
+        if data is None:
+            st.error("⚠️ No extraction results found. Please run the extraction pipeline first.")
         return data
-    except FileNotFoundError:
-        st.error("⚠️ extraction_results.json not found. Please run the extraction pipeline first.")
-        return None
     except json.JSONDecodeError:
         st.error("⚠️ Invalid JSON format in extraction_results.json")
         return None
 
-def extract_all_entities(data):
-    """Extract and organize all entities from the data"""
-    entities = {
-        'domains': {},
-        'constructs': {},
-        'assessments': {},
-        'interventions': {},
-        'technologies': {},
-        'metrics': {}
-    }
-
-    for file_data in data.get('processed_files', []):
-        if 'error' in file_data:
-            continue
-
-        file_name = file_data.get('file_name', 'Unknown')
-
-        # Domains & Constructs
-        domains_constructs = file_data.get('domains_constructs', {})
-        for domain in domains_constructs.get('practitioner_domains', []):
-            domain_name = domain.get('domain_name', '')
-            if domain_name:
-                if domain_name not in entities['domains']:
-                    entities['domains'][domain_name] = {
-                        'description': domain.get('domain_description', ''),
-                        'files': [],
-                        'specialization_notes': []
-                    }
-                entities['domains'][domain_name]['files'].append(file_name)
-                entities['domains'][domain_name]['specialization_notes'].append(
-                    domain.get('specialization_notes', '')
-                )
+@st.cache_data
+def load_entity_catalog(signature=None):
+    """The pipeline's precomputed entity catalog, rebuilt only if the results changed since it was written"""
+    return refresh_catalog() or build_catalog({})
 
-        for construct in domains_constructs.get('constructs_mentioned', []):
-            construct_name = construct.get('construct_name', '')
-            if construct_name:
-                if construct_name not in entities['constructs']:
-                    entities['constructs'][construct_name] = {
-                        'description': construct.get('construct_description', ''),
-                        'domain_association': construct.get('domain_association', ''),
-                        'files': [],
-                        'assessment_contexts': []
-                    }
-                entities['constructs'][construct_name]['files'].append(file_name)
-                entities['constructs'][construct_name]['assessment_contexts'].append(
-                    construct.get('assessment_context', '')
-                )
+@st.cache_data
+def load_canonical_map(signature=None):
+    """The canonical-name mapping saved next to the results (refreshed with the catalog), or None"""
+    source = results_source()
+    if source is None or refresh_catalog() is None:
+        return None
+    return read_canonical_map(canonical_path(source))
 
-        # Assessments
-        assessments_data = file_data.get('assessments', {})
-        for assessment in assessments_data.get('assessments', []):
-            assessment_name = assessment.get('assessment_name', '')
-            if assessment_name:
-                if assessment_name not in entities['assessments']:
-                    entities['assessments'][assessment_name] = {
-                        'description': assessment.get('assessment_description', ''),
-                        'modality': assessment.get('modality', ''),
-                        'constructs_measured': assessment.get('constructs_measured', []),
-                        'files': [],
-                        'technologies': [],
-                        'metrics': []
-                    }
-                entities['assessments'][assessment_name]['files'].append(file_name)
+@st.cache_data
+def load_ontology_relationships(signature=None):
+    """All transcripts' relationships merged and deduplicated by the pipeline's graph store"""
+    graph = open_graph_store()
+    if graph is None:
+        return None
+    try:
+        return graph.relationships()
+    finally:
+        graph.close()
 
-        # Interventions
-        interventions_data = file_data.get('interventions', {})
-        for intervention in interventions_data.get('interventions', []):
-            intervention_name = intervention.get('intervention_name', '')
-            if intervention_name:
-                if intervention_name not in entities['interventions']:
-                    entities['interventions'][intervention_name] = {
-                        'description': intervention.get('intervention_description', ''),
-                        'purpose': intervention.get('purpose', ''),
-                        'constructs_targeted': intervention.get('constructs_targeted', []),
-                        'intervention_types': intervention.get('intervention_types', []),
-                        'files': []
-                    }
-                entities['interventions'][intervention_name]['files'].append(file_name)
-
-        # 🧠 ADD Technologies & Metrics from `ontology_guided_data`
-        tech_metrics = file_data.get('ontology_guided_data', {}).get('technologies_metrics', {})
-        for tech in tech_metrics.get('technologies', []):
-            tech_name = tech.get('technology_name', '')
-            if tech_name:
-                if tech_name not in entities['technologies']:
-                    entities['technologies'][tech_name] = {
-                        'type': tech.get('technology_type', ''),
-                        'equipment': tech.get('specific_model', ''),
-                        'used_in_assessments': tech.get('used_for_assessments', []),
-                        'files': []
-                    }
-                entities['technologies'][tech_name]['files'].append(file_name)
-
-        for metric in tech_metrics.get('metrics', []):
-            metric_name = metric.get('metric_name', '')
-            if metric_name:
-                if metric_name not in entities['metrics']:
-                    entities['metrics'][metric_name] = {
-                        'unit': metric.get('measurement_unit', ''),
-                        'reference_ranges': metric.get('normal_ranges', ''),
-                        'validity_confidence': metric.get('interpretation_notes', ''),
-                        'used_in_assessments': [metric.get('assessment_source', '')],
-                        'files': []
-                    }
-                entities['metrics'][metric_name]['files'].append(file_name)
-
-    return entities
-
-    """Extract and organize all entities from the data"""
-    entities = {
-        'domains': {},
-        'constructs': {},
-        'assessments': {},
-        'interventions': {},
-        'technologies': {},
-        'metrics': {}
-    }
-    
-    for file_data in data.get('processed_files', []):
-        if 'error' in file_data:
-            continue
-            
-        file_name = file_data.get('file_name', 'Unknown')
-        
-        # Extract domains
-        domains_constructs = file_data.get('domains_constructs', {})
-        for domain in domains_constructs.get('practitioner_domains', []):
-            domain_name = domain.get('domain_name', '')
-            if domain_name:
-                if domain_name not in entities['domains']:
-                    entities['domains'][domain_name] = {
-                        'description': domain.get('domain_description', ''),
-                        'files': [],
-                        'specialization_notes': []
-                    }
-                entities['domains'][domain_name]['files'].append(file_name)
-                entities['domains'][domain_name]['specialization_notes'].append(
-                    domain.get('specialization_notes', '')
-                )
-        
-        # Extract constructs
-        for construct in domains_constructs.get('constructs_mentioned', []):
-            construct_name = construct.get('construct_name', '')
-            if construct_name:
-                if construct_name not in entities['constructs']:
-                    entities['constructs'][construct_name] = {
-                        'description': construct.get('construct_description', ''),
-                        'domain_association': construct.get('domain_association', ''),
-                        'files': [],
-                        'assessment_contexts': []
-                    }
-                entities['constructs'][construct_name]['files'].append(file_name)
-                entities['constructs'][construct_name]['assessment_contexts'].append(
-                    construct.get('assessment_context', '')
-                )
-        
-        # Extract assessments
-        assessments_data = file_data.get('assessments', {})
-        for assessment in assessments_data.get('assessments', []):
-            assessment_name = assessment.get('assessment_name', '')
-            if assessment_name:
-                if assessment_name not in entities['assessments']:
-                    entities['assessments'][assessment_name] = {
-                        'description': assessment.get('assessment_description', ''),
-                        'modality': assessment.get('modality', ''),
-                        'constructs_measured': assessment.get('constructs_measured', []),
-                        'files': [],
-                        'technologies': [],
-                        'metrics': []
-                    }
-                entities['assessments'][assessment_name]['files'].append(file_name)
-                
-                # Extract technology
-                tech = assessment.get('technology_vendor', {})
-                if tech.get('name'):
-                    entities['assessments'][assessment_name]['technologies'].append(tech)
-                    
-                    # Add to technologies collection
-                    tech_name = tech.get('name', '')
-                    if tech_name not in entities['technologies']:
-                        entities['technologies'][tech_name] = {
-                            'type': tech.get('type', ''),
-                            'equipment': tech.get('specific_equipment', ''),
-                            'used_in_assessments': [],
-                            'files': []
-                        }
-                    entities['technologies'][tech_name]['used_in_assessments'].append(assessment_name)
-                    entities['technologies'][tech_name]['files'].append(file_name)
-                
-                # Extract metrics
-                for metric in assessment.get('metrics', []):
-                    metric_name = metric.get('metric_name', '')
-                    if metric_name:
-                        entities['assessments'][assessment_name]['metrics'].append(metric)
-                        
-                        if metric_name not in entities['metrics']:
-                            entities['metrics'][metric_name] = {
-                                'unit': metric.get('unit', ''),
-                                'reference_ranges': metric.get('reference_ranges', ''),
-                                'validity_confidence': metric.get('validity_confidence', ''),
-                                'used_in_assessments': [],
-                                'files': []
-                            }
-                        entities['metrics'][metric_name]['used_in_assessments'].append(assessment_name)
-                        entities['metrics'][metric_name]['files'].append(file_name)
-        
-        # Extract interventions
-        interventions_data = file_data.get('interventions', {})
-        for intervention in interventions_data.get('interventions', []):
-            intervention_name = intervention.get('intervention_name', '')
-            if intervention_name:
-                if intervention_name not in entities['interventions']:
-                    entities['interventions'][intervention_name] = {
-                        'description': intervention.get('intervention_description', ''),
-                        'purpose': intervention.get('purpose', ''),
-                        'constructs_targeted': intervention.get('constructs_targeted', []),
-                        'intervention_types': intervention.get('intervention_types', []),
-                        'files': []
-                    }
-                entities['interventions'][intervention_name]['files'].append(file_name)
-    
-    return entities
+# Pages that show entities from the catalog
+ENTITY_PAGES = {"📊 Overview", "🎯 Domains", "🔬 Constructs", "🧪 Assessments", "💊 Interventions",
+                "⚙️ Technologies", "📏 Metrics"}
 
 def main():
     st.title("🧠 Ontology Extraction Explorer")
     st.markdown("Explore the knowledge extracted from IST specialist interviews")
     
     # Load data
-    data = load_extraction_data()
+    signature = results_signature()
+    data = load_extraction_data(signature)
     if data is None:
         st.stop()
     
-    # Extract entities
-    entities = extract_all_entities(data)
-    
     # Sidebar navigation
     st.sidebar.title("🔍 Navigation")
     page = st.sidebar.selectbox(
@@ -319,6 +132,9 @@ def main():
     # 🟢 Call feedback form here
     sidebar_feedback_form(data)
     
+    # Only the pages that list entities load the catalog
+    entities = load_entity_catalog(signature) if page in ENTITY_PAGES else None
+    
     if page == "📊 Overview":
         show_overview(data, entities)
     elif page == "📄 By Transcript":
@@ -338,7 +154,7 @@ def main():
     elif page == "🔗 Relationships":
         show_relationships(data)
     elif page == "🕸️ Network Graph":
-        show_network_graph(data)
+        show_network_graph(data, signature)
 
 
 def show_overview(data, entities):
@@ -516,6 +332,8 @@ def show_domains(entities):
         with st.expander(f"🎯 {domain_name} ({len(domain_data['files'])} transcripts)"):
             st.write("**Description:**", domain_data['description'])
             st.write("**Found in transcripts:**", ', '.join(set(domain_data['files'])))
+            if domain_data.get('aliases'):
+                st.write("**Also written as:**", ', '.join(domain_data['aliases']))
             
             if domain_data['specialization_notes']:
                 st.write("**Specialization Notes:**")
@@ -533,8 +351,8 @@ def show_constructs(entities):
     filtered_constructs = entities['constructs']
     if selected_domain != 'All':
         filtered_constructs = {
-            name: data for name, data in entities['constructs'].items()
-            if data['domain_association'] == selected_domain
+            name: entities['constructs'][name]
+            for name in entities['index']['constructs_by_domain'].get(selected_domain, [])
         }
     
     for construct_name, construct_data in filtered_constructs.items():
@@ -543,20 +361,19 @@ def show_constructs(entities):
             if construct_data['domain_association']:
                 st.write("**Domain:**", construct_data['domain_association'])
             st.write("**Found in transcripts:**", ', '.join(set(construct_data['files'])))
+            if construct_data.get('aliases'):
+                st.write("**Also written as:**", ', '.join(construct_data['aliases']))
 
 def show_assessments(entities):
     st.header("🧪 Assessments Overview")
     
     # Filter by modality
-    all_modalities = list(set(data['modality'] for data in entities['assessments'].values() if data['modality']))
-    selected_modality = st.selectbox("Filter by modality:", ['All'] + all_modalities)
+    modalities = entities['index']['assessments_by_modality']
+    selected_modality = st.selectbox("Filter by modality:", ['All'] + list(modalities))
     
     filtered_assessments = entities['assessments']
     if selected_modality != 'All':
-        filtered_assessments = {
-            name: data for name, data in entities['assessments'].items()
-            if data['modality'] == selected_modality
-        }
+        filtered_assessments = {name: entities['assessments'][name] for name in modalities[selected_modality]}
     
     for assessment_name, assessment_data in filtered_assessments.items():
         with st.expander(f"🧪 {assessment_name}"):
@@ -570,6 +387,8 @@ def show_assessments(entities):
             
             with col2:
                 st.write("**Found in transcripts:**", ', '.join(set(assessment_data['files'])))
+                if assessment_data.get('aliases'):
+                    st.write("**Also written as:**", ', '.join(assessment_data['aliases']))
                 
                 if assessment_data['technologies']:
                     st.write("**Technologies Used:**")
@@ -597,6 +416,8 @@ def show_interventions(entities):
             if intervention_data['intervention_types']:
                 st.write("**Types:**", ', '.join(intervention_data['intervention_types']))
             st.write("**Found in transcripts:**", ', '.join(set(intervention_data['files'])))
+            if intervention_data.get('aliases'):
+                st.write("**Also written as:**", ', '.join(intervention_data['aliases']))
 
 def show_technologies(entities):
     st.header("⚙️ Technologies Overview")
@@ -613,6 +434,8 @@ def show_technologies(entities):
             with col2:
                 st.write("**Used in assessments:**", ', '.join(set(tech_data['used_in_assessments'])))
                 st.write("**Found in transcripts:**", ', '.join(set(tech_data['files'])))
+                if tech_data.get('aliases'):
+                    st.write("**Also written as:**", ', '.join(tech_data['aliases']))
 
 def show_metrics(entities):
     st.header("📏 Metrics Overview")
@@ -632,6 +455,8 @@ def show_metrics(entities):
             with col2:
                 st.write("**Used in assessments:**", ', '.join(set(metric_data['used_in_assessments'])))
                 st.write("**Found in transcripts:**", ', '.join(set(metric_data['files'])))
+                if metric_data.get('aliases'):
+                    st.write("**Also written as:**", ', '.join(metric_data['aliases']))
                 
 def show_relationships(data):
     st.header("🔗 Relationships Between Constructs, Assessments, and Interventions")
@@ -684,7 +509,7 @@ def show_relationships(data):
                 df = pd.DataFrame(assess_int_links)
                 st.dataframe(df, use_container_width=True)
 
-def show_network_graph(data):
+def show_network_graph(data, signature=None):
     st.header("🕸️ Relationship Network Graph")
 
     view_mode = st.radio("View mode:", ["By Transcript", "Full Ontology"])
@@ -694,76 +519,58 @@ def show_network_graph(data):
         selected_file = st.selectbox("Select transcript:", file_options)
         file_data = next(f for f in data['processed_files'] if f.get('file_name') == selected_file)
         relationships = file_data.get('relationships', {})
-        render_network_graph(relationships, context_label=selected_file)
+        render_network_graph(relationships, context_label=selected_file, cache_key=(signature, selected_file),
+                             canonical=load_canonical_map(signature))
 
     else:
-        # Merge all relationships from all transcripts
-        merged = {
-            "construct_relationships": [],
-            "assessment_construct_links": [],
-            "intervention_construct_links": [],
-            "assessment_intervention_connections": []
-        }
-        for file_data in data.get('processed_files', []):
-            rel = file_data.get("relationships", {})
-            for key in merged:
-                merged[key].extend(rel.get(key, []))
-        render_network_graph(merged, context_label="Full Ontology")
-
-def render_network_graph(relationships, context_label=""):
+        # All relationships from all transcripts, already merged under canonical names by the graph store
+        merged = load_ontology_relationships(signature) or {}
+        render_network_graph(merged, context_label="Full Ontology", cache_key=(signature, "Full Ontology"),
+                             canonical=load_canonical_map(signature))
+
+@st.cache_resource(max_entries=32)
+def cached_graph(cache_key, node_types, _relationships, _canonical=None):
+    """The relationship graph per (relationship set, node-type filter); the key stands in for the relationships
+    and their canonical names"""
+    return build_graph(_relationships, node_types, _canonical)
+
+@st.cache_data(max_entries=32)
+def cached_layout(cache_key, node_types, backend, view, _G):
+    """Node positions per (relationship set, node-type filter, backend), placed incrementally from the saved layout"""
+    return layout_for_view(_G, view, backend)
+
+def render_network_graph(relationships, context_label="", cache_key=None, canonical=None):
     # Filters
     st.markdown("**Filter node types:**")
     selected_types = st.multiselect(
         "Select which types of nodes to display:",
-        options=["construct", "assessment", "intervention"],
-        default=["construct", "assessment", "intervention"]
+        options=NODE_TYPES,
+        default=NODE_TYPES
     )
 
     show_edge_labels = st.checkbox("Show edge labels", value=False)
     isolate_mode = st.toggle("Click-to-isolate mode")
-
-    # Build graph
-    G = nx.DiGraph()
-    color_map = {
-        'construct': '#4a148c',
-        'assessment': '#0277bd',
-        'intervention': '#2e7d32'
-    }
-    node_types = {}
-    edge_labels = {}
-
-    def safe_add_edge(src, src_type, tgt, tgt_type, label):
-        if src_type in selected_types and tgt_type in selected_types:
-            G.add_node(src)
-            G.add_node(tgt)
-            node_types[src] = src_type
-            node_types[tgt] = tgt_type
-            G.add_edge(src, tgt)
-            edge_labels[(src, tgt)] = label
-
-    # Add edges
-    for rel in relationships.get('construct_relationships', []):
-        safe_add_edge(rel['source_construct'], 'construct', rel['target_construct'], 'construct',
-                      rel.get('relationship_type', ''))
-
-    for rel in relationships.get('assessment_construct_links', []):
-        for c in rel.get('constructs_measured', []):
-            safe_add_edge(rel['assessment_name'], 'assessment', c, 'construct',
-                          rel.get('measurement_relationship', 'measures'))
-
-    for rel in relationships.get('intervention_construct_links', []):
-        for c in rel.get('constructs_targeted', []):
-            safe_add_edge(rel['intervention_name'], 'intervention', c, 'construct', 'targets')
-
-    for rel in relationships.get('assessment_intervention_connections', []):
-        safe_add_edge(rel['assessment_name'], 'assessment', rel['intervention_name'], 'intervention',
-                      rel.get('connection_type', 'informs'))
+    layout_backend = st.selectbox("Layout:", LAYOUT_BACKENDS,
+                                  help="auto switches to the vectorised layout for large graphs")
+    renderer = st.selectbox("Renderer:", RENDERERS,
+                            help=f"auto switches to WebGL above {WEBGL_NODE_THRESHOLD} nodes, labelling only "
+                                 f"the best-connected nodes (hover shows every name)")
+
+    # Graph and layout are memoized; without a cache key they are rebuilt for these relationships
+    node_type_key = tuple(sorted(selected_types))
+    if cache_key is None:
+        G, node_types, edge_labels = build_graph(relationships, node_type_key, canonical)
+    else:
+        G, node_types, edge_labels = cached_graph(cache_key, node_type_key, relationships, canonical)
 
     if len(G.nodes) == 0:
         st.warning("No nodes to display with current filters.")
         return
 
-    pos = nx.spring_layout(G, k=0.7, seed=42)
+    if cache_key is None:
+        pos = layout_for_view(G, context_label, layout_backend)
+    else:
+        pos = cached_layout(cache_key, node_type_key, layout_backend, context_label, G)
 
     # Isolation logic
     node_list = sorted(G.nodes())
@@ -776,64 +583,12 @@ def render_network_graph(relationships, context_label=""):
     else:
         neighborhood = set(G.nodes())
 
-    edge_x, edge_y = [], []
-    for src, tgt in G.edges():
-        if src in neighborhood and tgt in neighborhood:
-            x0, y0 = pos[src]
-            x1, y1 = pos[tgt]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
-
-    node_x, node_y, node_labels, node_colors = [], [], [], []
-    for node in neighborhood:
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_labels.append(node)
-        node_colors.append(color_map.get(node_types.get(node, 'construct'), '#999'))
-
-    edge_trace = go.Scatter(x=edge_x, y=edge_y, mode='lines',
-                            line=dict(width=1, color='#ccc'), hoverinfo='none')
-
-    node_trace = go.Scatter(x=node_x, y=node_y, mode='markers+text',
-                            text=node_labels, textposition='top center',
-                            hoverinfo='text',
-                            marker=dict(color=node_colors, size=10,
-                                        line=dict(width=1, color='black')))
-
-    fig = go.Figure(data=[edge_trace, node_trace])
-
-    if show_edge_labels:
-        annotations = []
-        for (src, tgt), label in edge_labels.items():
-            if src in neighborhood and tgt in neighborhood:
-                x0, y0 = pos[src]
-                x1, y1 = pos[tgt]
-                mid_x = (x0 + x1) / 2
-                mid_y = (y0 + y1) / 2
-                annotations.append(
-                    dict(
-                        x=mid_x,
-                        y=mid_y,
-                        text=label,
-                        showarrow=False,
-                        font=dict(size=10),
-                        xanchor="center",
-                        yanchor="middle"
-                    )
-                )
-        fig.update_layout(annotations=annotations)
-
-    fig.update_layout(
-        title=f"Ontology Graph – {context_label}",
-        title_font_size=18,
-        showlegend=False,
-        hovermode='closest',
-        margin=dict(b=20, l=5, r=5, t=40),
-        xaxis=dict(showgrid=False, zeroline=False),
-        yaxis=dict(showgrid=False, zeroline=False),
-        height=600
-    )
+    fig, stats = build_network_figure(G, pos, node_types, edge_labels, neighborhood,
+                                      show_edge_labels=show_edge_labels, context_label=context_label,
+                                      renderer=renderer, focus=neighborhood if selected_node else None)
+    st.caption(f"{stats['nodes']} nodes, {stats['edges']} edges rendered with {stats['renderer'].upper()} "
+               f"({stats['labelled_nodes']} labelled) – figure built in {stats['build_ms']} ms, "
+               f"~{stats['payload_kb']:,} KB sent to the browser")
 
     st.plotly_chart(fig, use_container_width=True)
     
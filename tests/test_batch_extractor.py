@@ -0,0 +1,153 @@
+# tests/test_batch_extractor.py
+"""
+The batch extractor's wave runner against a fake Message Batches client (no API calls)
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.batch_extractor import BatchFusedOntologyExtractor
+
+
+def sample(schema):
+    """A minimal value that conforms to a tool's input schema"""
+    kind = schema["type"]
+    if kind == "object":
+        return {key: sample(schema["properties"][key]) for key in schema.get("required", [])}
+    if kind == "array":
+        return [sample(schema["items"])]
+    return {"string": "x", "integer": 1, "number": 1.0, "boolean": True}[kind]
+
+
+def message(content, stop_reason="tool_use"):
+    usage = SimpleNamespace(input_tokens=100, output_tokens=50, cache_read_input_tokens=0,
+                            cache_creation_input_tokens=0)
+    return SimpleNamespace(content=content, stop_reason=stop_reason, usage=usage, model="fake-model")
+
+
+def tool_message(name, data, stop_reason="tool_use"):
+    return message([SimpleNamespace(type="tool_use", name=name, input=data, id="toolu_1")], stop_reason)
+
+
+def text_message(text):
+    return message([SimpleNamespace(type="text", text=text)], "end_turn")
+
+
+class FakeBatches:
+    """messages.batches: each submitted batch ends at once, its replies chosen by `reply(custom_id, params)`
+
+    A reply of None makes that entry error.
+    """
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.submitted = []
+
+    def create(self, requests):
+        self.submitted.append(requests)
+        return SimpleNamespace(id=f"batch_{len(self.submitted)}")
+
+    def retrieve(self, batch_id):
+        counts = SimpleNamespace(processing=0, succeeded=0, errored=0)
+        return SimpleNamespace(id=batch_id, processing_status="ended", request_counts=counts)
+
+    def results(self, batch_id):
+        for entry in self.submitted[int(batch_id.split("_")[1]) - 1]:
+            reply = self.reply(entry["custom_id"], entry["params"])
+            if reply is None:
+                result = SimpleNamespace(type="errored", error="overloaded")
+            else:
+                result = SimpleNamespace(type="succeeded", message=reply)
+            yield SimpleNamespace(custom_id=entry["custom_id"], result=result)
+
+
+class NoDirectCalls:
+    def create(self, **params):
+        raise AssertionError("batch runs must not send direct requests")
+
+
+def make_extractor(reply, **kwargs):
+    extractor = BatchFusedOntologyExtractor(api_key="test", use_response_cache=False, poll_interval=0.01,
+                                            preprocess=False, **kwargs)
+    batches = FakeBatches(reply)
+    extractor.client = SimpleNamespace(messages=SimpleNamespace(batches=batches, with_raw_response=NoDirectCalls()))
+    return extractor, batches
+
+
+def forced_tool(params):
+    """The tool the prompt tells the model to reply through"""
+    instruction = params["messages"][0]["content"][-1]["text"]
+    return next(tool for tool in params["tools"] if f"calling the {tool['name']} tool" in instruction)
+
+
+@pytest.fixture
+def transcripts(tmp_path, monkeypatch):
+    # Results store and pass checkpoints are written under the working directory
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "transcripts"
+    folder.mkdir()
+    (folder / "a.txt").write_text("Interviewer: What do you measure?\nPractitioner: VO2 max and HRV.\n")
+    (folder / "b.txt").write_text("Interviewer: Which tools?\nPractitioner: A chest strap and a DEXA scan.\n")
+    return folder
+
+
+def test_failed_entry_and_repair_round(transcripts):
+    def reply(custom_id, params):
+        if custom_id.startswith("f1-"):
+            return None
+        tool = forced_tool(params)
+        if custom_id == "f2-entities" and "Interviewer" in json.dumps(params["messages"]):
+            broken = sample(tool["input_schema"])
+            first_list = next(key for key, value in broken.items() if isinstance(value, list))
+            broken[first_list] = [{}]
+            return tool_message(tool["name"], broken)
+        return tool_message(tool["name"], sample(tool["input_schema"]))
+
+    extractor, batches = make_extractor(reply, fused_calls=2)
+    results = extractor.process_transcript_folder(str(transcripts))
+
+    by_name = {r["file_name"]: r for r in results["processed_files"]}
+    assert "error" in by_name["a.txt"]
+    assert "error" not in by_name["b.txt"]
+
+    # Wave 1 for both files, its repair round for b.txt's broken entities, then wave 2 for b.txt only
+    assert [[entry["custom_id"] for entry in batch] for batch in batches.submitted] == [
+        ["f1-entities", "f2-entities"], ["f2-entities"], ["f2-links"]]
+    repair = batches.submitted[1][0]["params"]
+    assert "Interviewer" not in json.dumps(repair["messages"])
+    assert forced_tool(repair) == forced_tool(batches.submitted[0][1]["params"])
+    # One tool_choice for every pass, so changing passes doesn't drop the cached transcript
+    assert {json.dumps(entry["params"]["tool_choice"]) for batch in batches.submitted for entry in batch} == {
+        json.dumps({"type": "any"})}
+    assert extractor.repair_stats == {"requested": 1, "repaired": 1}
+    assert extractor.batch_stats["failed"] == 1
+
+
+def test_truncated_reply_is_continued_in_a_batch_round(transcripts):
+    (transcripts / "b.txt").unlink()
+    truncated = {}
+
+    def reply(custom_id, params):
+        if "tools" not in params:
+            # The continuation: plain text carrying on from the assistant prefill
+            prefill = params["messages"][-1]["content"]
+            return text_message(truncated["full"][len(prefill):])
+        tool = forced_tool(params)
+        data = sample(tool["input_schema"])
+        if not truncated:
+            truncated["full"] = json.dumps(data, ensure_ascii=False)
+            return tool_message(tool["name"], data, stop_reason="max_tokens")
+        return tool_message(tool["name"], data)
+
+    extractor, batches = make_extractor(reply, fused_calls=1)
+    result = extractor.process_single_transcript(transcripts / "a.txt")
+
+    assert "error" not in result
+    assert [[entry["custom_id"] for entry in batch] for batch in batches.submitted] == [["f1-all"], ["f1-all"]]
+    continuation = batches.submitted[1][0]["params"]
+    assert continuation["messages"][-1]["role"] == "assistant"
+    assert "tools" not in continuation
+    assert extractor.continuation_stats == {"truncated": 1, "continuations": 1, "unfinished": 0}
+    assert extractor.repair_stats == {"requested": 0, "repaired": 0}
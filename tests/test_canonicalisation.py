@@ -0,0 +1,74 @@
+# tests/test_canonicalisation.py
+"""
+Which surface names canonicalisation merges into one entity, and which it keeps apart
+"""
+
+from collections import Counter
+
+from src.canonicalisation import build_canonical_map, canonical_key, near_identical, name_tokens, resolve_type
+
+
+def resolved_groups(*names):
+    """The merged name groups for one entity type, as sets"""
+    entities, mapping, _ = resolve_type(Counter(names))
+    groups = {}
+    for name, canonical_id in mapping.items():
+        groups.setdefault(canonical_id, set()).add(name)
+    return sorted(groups.values(), key=sorted)
+
+
+def test_vo2_spellings_share_a_key():
+    assert canonical_key("VO2 Max Test") == canonical_key("VO2max test") == canonical_key("VO2 max testing")
+    assert resolved_groups("VO2 Max Test", "VO2max test", "VO2 max testing") == [
+        {"VO2 Max Test", "VO2max test", "VO2 max testing"}]
+
+
+def test_acronym_and_stopwords_are_ignored():
+    assert resolved_groups("Heart Rate Variability (HRV)", "heart rate variability") == [
+        {"Heart Rate Variability (HRV)", "heart rate variability"}]
+    assert resolved_groups("The Sleep Assessment", "sleep assessment") == [{"The Sleep Assessment", "sleep assessment"}]
+
+
+def test_one_word_changed_stays_apart():
+    assert resolved_groups("Sleep quantity assessment", "Sleep Quality Assessment") == [
+        {"Sleep Quality Assessment"}, {"Sleep quantity assessment"}]
+
+
+def test_misspelt_token_merges():
+    assert resolved_groups("Sleep Quality Assesment", "Sleep Quality Assessment") == [
+        {"Sleep Quality Assesment", "Sleep Quality Assessment"}]
+
+
+def test_numbers_and_initials_keep_names_apart():
+    assert resolved_groups("HDL Cholesterol", "LDL Cholesterol") == [{"HDL Cholesterol"}, {"LDL Cholesterol"}]
+    assert resolved_groups("5-Year Risk", "10-Year Risk") == [{"10-Year Risk"}, {"5-Year Risk"}]
+
+
+def test_near_identical_needs_matching_token_counts():
+    assert not near_identical(name_tokens("Sleep Assessment"), name_tokens("Sleep Quality Assessment"))
+    assert not near_identical(name_tokens("Grip Strength Test"), name_tokens("Grip Stretch Trial"))
+
+
+def test_most_frequent_surface_names_the_entity():
+    data = {"processed_files": [
+        {"file_name": "a.txt", "assessments": {"assessments": [{"assessment_name": "VO2max test"}]}},
+        {"file_name": "b.txt", "assessments": {"assessments": [{"assessment_name": "VO2 Max Test"},
+                                                               {"assessment_name": "VO2 Max Test"}]}},
+        {"file_name": "c.txt", "error": "failed", "assessments": {"assessments": [{"assessment_name": "DEXA"}]}},
+    ]}
+    canonical = build_canonical_map(data, threshold=0.92, embedding_model="")
+    entities = canonical["entities"]["assessments"]
+    assert [entity["name"] for entity in entities.values()] == ["VO2 Max Test"]
+    assert canonical["stats"]["assessments"] == {"mentions": 3, "names": 2, "canonical": 1, "comparisons": 0}
+
+
+def test_names_listed_on_entities_are_mapped():
+    data = {"processed_files": [{
+        "file_name": "a.txt",
+        "domains_constructs": {"constructs_mentioned": [{"construct_name": "Aerobic Capacity"}]},
+        "assessments": {"assessments": [{"assessment_name": "VO2 Max Test", "constructs_measured": ["aerobic capacity"]}]},
+        "interventions": {"interventions": [{"intervention_name": "Zone 2", "constructs_targeted": ["Fat Oxidation"]}]},
+    }]}
+    mapping = build_canonical_map(data, threshold=0.92, embedding_model="")["mapping"]["constructs"]
+    assert mapping["aerobic capacity"] == mapping["Aerobic Capacity"]
+    assert "Fat Oxidation" in mapping
@@ -0,0 +1,97 @@
+# tests/test_graph_store.py
+"""
+Graph store queries on a small two-transcript ontology
+"""
+
+import pytest
+
+from src.canonicalisation import build_canonical_map
+from src.graph_store import GraphStore
+
+DATA = {"processed_files": [
+    {
+        "file_name": "a.txt",
+        "domains_constructs": {"constructs_mentioned": [{"construct_name": "Aerobic Capacity"},
+                                                        {"construct_name": "Sleep Quality"}]},
+        "assessments": {"assessments": [{"assessment_name": "VO2 Max Test", "constructs_measured": ["Aerobic Capacity"]}]},
+        "interventions": {"interventions": [{"intervention_name": "Zone 2 Training",
+                                             "constructs_targeted": ["Aerobic Capacity"]}]},
+        "relationships": {
+            "construct_relationships": [{"source_construct": "Sleep Quality", "target_construct": "Aerobic Capacity",
+                                         "relationship_type": "influences"}],
+            "assessment_intervention_connections": [{"assessment_name": "VO2 Max Test",
+                                                     "intervention_name": "Zone 2 Training",
+                                                     "connection_type": "guides dosing of"}],
+        },
+    },
+    {
+        "file_name": "b.txt",
+        "assessments": {"assessments": [
+            {"assessment_name": "VO2max test", "constructs_measured": ["aerobic capacity"]},
+            {"assessment_name": "Polysomnography", "constructs_measured": ["Sleep Quality"]},
+        ]},
+        "relationships": {"assessment_construct_links": [{"assessment_name": "VO2 max testing",
+                                                          "constructs_measured": ["Aerobic Capacity"],
+                                                          "measurement_relationship": "directly measures"}]},
+    },
+    {"file_name": "c.txt", "error": "failed",
+     "assessments": {"assessments": [{"assessment_name": "Lactate Test", "constructs_measured": ["Aerobic Capacity"]}]}},
+]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    graph = GraphStore(str(tmp_path / "graph.sqlite"))
+    graph.rebuild(DATA, build_canonical_map(DATA, threshold=0.92, embedding_model=""))
+    yield graph
+    graph.close()
+
+
+def test_spellings_resolve_to_one_node(store):
+    assert [node["name"] for node in store.find("VO2 max testing")] == ["VO2 Max Test"]
+    assert store.find("Lactate Test") == []  # Failed transcripts are left out
+
+
+def test_assessments_measuring_groups_transcripts_and_labels(store):
+    rows = store.assessments_measuring("aerobic capacity")
+    assert [(row["name"], row["files"]) for row in rows] == [("VO2 Max Test", ["a.txt", "b.txt"])]
+    assert rows[0]["labels"] == ["directly measures", "measures"]
+    assert [row["name"] for row in store.assessments_measuring("Sleep Quality")] == ["Polysomnography"]
+
+
+def test_neighbours_by_direction(store):
+    incoming = store.neighbours("Aerobic Capacity", "construct", direction="in")
+    assert {(row["name"], row["relation"]) for row in incoming} == {
+        ("VO2 Max Test", "measures"), ("Zone 2 Training", "targets"), ("Sleep Quality", "relates_to")}
+    assert store.neighbours("Aerobic Capacity", "construct", direction="out") == []
+
+    outgoing = store.neighbours("VO2 Max Test", direction="out", relation="informs")
+    assert [(row["name"], row["labels"]) for row in outgoing] == [("Zone 2 Training", ["guides dosing of"])]
+
+    with pytest.raises(ValueError):
+        store.neighbours("VO2 Max Test", direction="sideways")
+
+
+def test_shortest_path(store):
+    path = store.shortest_path("Polysomnography", "Zone 2 Training")
+    assert [node["name"] for node in path] == ["Polysomnography", "Sleep Quality", "Aerobic Capacity",
+                                               "Zone 2 Training"]
+    assert [node["name"] for node in store.shortest_path("VO2max test", "VO2 Max Test")] == ["VO2 Max Test"]
+
+
+def test_shortest_path_limits(store):
+    assert store.shortest_path("Polysomnography", "Zone 2 Training", max_depth=2) is None
+    # Following edges forwards only, nothing leads away from a construct that is only a target
+    assert store.shortest_path("Aerobic Capacity", "Zone 2 Training", directed=True) is None
+    assert store.shortest_path("Polysomnography", "Unknown thing") is None
+
+
+def test_stats_and_merged_relationships(store):
+    stats = store.stats()
+    assert stats["nodes"] == {"assessment": 2, "construct": 2, "intervention": 1}
+    assert stats["edges"] == {"informs": 1, "measures": 3, "relates_to": 1, "targets": 1}
+    merged = store.relationships()
+    assert len(merged["assessment_construct_links"]) == 2
+    assert merged["construct_relationships"] == [{"source_construct": "Sleep Quality",
+                                                  "target_construct": "Aerobic Capacity",
+                                                  "relationship_type": "influences"}]
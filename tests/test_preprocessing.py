@@ -0,0 +1,22 @@
+# tests/test_preprocessing.py
+"""
+Which parts of a Gemini export preprocessing keeps
+"""
+
+from src.preprocessing import preprocess_transcript
+
+
+def test_notes_sections_before_the_transcript_are_dropped():
+    text = ("Summary\nThey use DEXA.\nDetails\nWhoop for sleep.\n📖 Transcript\nSep 16, 2025\n"
+            "00:01:47\nA: um I use a Whoop [00:01:52] daily.\nB: ok\n")
+    assert preprocess_transcript(text) == "A: I use a Whoop daily.\nB: ok\n"
+
+
+def test_notes_only_export_is_kept():
+    text = "Summary\nThey use DEXA.\nDetails\nWhoop for sleep.\nSuggested next steps\nSend report.\n"
+    assert preprocess_transcript(text) == text
+
+
+def test_heading_words_inside_the_transcript_are_kept():
+    text = "Transcript\nA: Let me give a summary.\nSummary\nB: Details matter.\nDetails\n"
+    assert preprocess_transcript(text) == "A: Let me give a summary.\nSummary\nB: Details matter.\nDetails\n"
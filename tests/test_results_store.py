@@ -0,0 +1,124 @@
+# tests/test_results_store.py
+"""
+Results store recovery: torn JSON lines and write-ahead log replay after a crash
+"""
+
+import json
+
+import pytest
+
+from src.atomic_io import append_line_durable, read_json_lines
+from src.results_store import ResultsStore
+
+
+def result(file_name, **fields):
+    return dict({"file_name": file_name, "fingerprint": {"content_hash": file_name}}, **fields)
+
+
+class Crash(Exception):
+    pass
+
+
+def crash_before_manifest(store, monkeypatch):
+    """Make the next put die after its log entry and record are written, before the manifest line"""
+    def crash(entry):
+        raise Crash()
+    monkeypatch.setattr(store, "_append_manifest", crash)
+
+
+def test_torn_line_is_skipped_and_terminated_by_the_next_append(tmp_path):
+    path = tmp_path / "log.jsonl"
+    append_line_durable(path, json.dumps({"n": 1}))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"n": 2, "torn')
+    append_line_durable(path, json.dumps({"n": 3}))
+
+    assert list(read_json_lines(path)) == [{"n": 1}, {"n": 3}]
+
+
+def test_missing_file_reads_as_empty(tmp_path):
+    assert list(read_json_lines(tmp_path / "absent.jsonl")) == []
+
+
+def test_put_survives_reopening(tmp_path):
+    ResultsStore(str(tmp_path)).put(result("a.txt", value=1), api_calls=4, extraction_type="Fused (2-call)")
+
+    store = ResultsStore(str(tmp_path))
+    assert store.get("a.txt")["value"] == 1
+    assert store.summary() == {"total_files": 1, "successful": 1, "failed": 0,
+                               "extraction_type": "Fused (2-call)", "total_api_calls": 4}
+    assert not store.wal_path.exists()
+
+
+def test_crash_before_the_manifest_is_replayed_from_the_log(tmp_path, monkeypatch):
+    store = ResultsStore(str(tmp_path))
+    store.put(result("a.txt", value=1))
+    crash_before_manifest(store, monkeypatch)
+    with pytest.raises(Crash):
+        store.put(result("b.txt", value=2))
+    assert store.wal_path.exists()
+
+    reopened = ResultsStore(str(tmp_path))
+    assert list(reopened.manifest()) == ["a.txt", "b.txt"]
+    assert reopened.get("b.txt")["value"] == 2
+    assert not reopened.wal_path.exists()
+
+
+def test_replay_rewrites_a_record_torn_by_the_crash(tmp_path, monkeypatch):
+    store = ResultsStore(str(tmp_path))
+    crash_before_manifest(store, monkeypatch)
+    with pytest.raises(Crash):
+        store.put(result("a.txt", value=1))
+    store._record_path("a.txt").write_text('{"file_name": "a.t')
+
+    assert ResultsStore(str(tmp_path)).get("a.txt")["value"] == 1
+
+
+def test_torn_manifest_line_is_recovered_from_the_log(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.put(result("a.txt", value=1))
+    # A crash mid-append: the log entry is complete but the manifest line is cut short
+    entry = store.entry("a.txt")
+    store._append_wal({"file_name": "b.txt", "entry": dict(entry, file_name="b.txt",
+                                                            record=store._record_path("b.txt").name),
+                       "result": result("b.txt", value=2)})
+    with open(store.manifest_path, "a", encoding="utf-8") as f:
+        f.write('{"file_name": "b.txt", "rec')
+
+    reopened = ResultsStore(str(tmp_path))
+    assert reopened.get("b.txt")["value"] == 2
+    assert list(reopened.manifest()) == ["a.txt", "b.txt"]
+
+
+def test_logged_delete_is_replayed(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.put(result("a.txt"))
+    store.put(result("b.txt"))
+    store._append_wal({"file_name": "a.txt", "deleted": True})
+
+    reopened = ResultsStore(str(tmp_path))
+    assert list(reopened.manifest()) == ["b.txt"]
+    assert reopened.get("a.txt") is None
+
+
+def test_torn_log_tail_is_ignored(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.put(result("a.txt", value=1))
+    store.wal_path.write_text('{"file_name": "b.txt", "entry": {"file_na')
+
+    reopened = ResultsStore(str(tmp_path))
+    assert list(reopened.manifest()) == ["a.txt"]
+    assert not reopened.wal_path.exists()
+
+
+def test_compact_keeps_the_latest_entry_per_file(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    for value in range(3):
+        store.put(result("a.txt", value=value))
+    store.put(result("b.txt", error="failed"))
+    store.remove("b.txt")
+    store.compact(force=True)
+
+    lines = list(read_json_lines(store.manifest_path))
+    assert [line["file_name"] for line in lines] == ["a.txt"]
+    assert ResultsStore(str(tmp_path)).get("a.txt")["value"] == 2
@@ -0,0 +1,78 @@
+# tests/test_streaming.py
+"""
+Incremental JSON parsing of streamed replies, and what the stream monitor publishes
+"""
+
+import json
+
+from src.pass_graph import _partial_sink
+from src.streaming import IncrementalJSONParser, StreamMonitor
+
+REPLY = {
+    "constructs_mentioned": [{"construct_name": "VO2 Max", "notes": "says \"max\" {not} [json]"}],
+    "assessments": [{"assessment_name": "DEXA", "frequency": "yearly"}],
+    "count": 2,
+    "summary": "done, finally"
+}
+
+
+def feed_in_pieces(parser, text, size):
+    completed = []
+    for start in range(0, len(text), size):
+        completed += parser.feed(text[start:start + size])
+    return completed
+
+
+def test_fields_complete_in_order_whatever_the_chunking():
+    text = json.dumps(REPLY)
+    for size in (1, 3, 7, len(text)):
+        parser = IncrementalJSONParser()
+        assert feed_in_pieces(parser, text, size) == list(REPLY)
+        assert parser.fields == REPLY
+        assert parser.done
+
+
+def test_field_is_only_reported_once_its_value_is_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"assessments": [{"assessment_name": "DEXA"}') == []
+    assert parser.feed('], "count": 2') == ["assessments"]
+    assert parser.feed("}") == ["count"]
+
+
+def test_text_before_the_object_is_skipped():
+    parser = IncrementalJSONParser()
+    parser.feed('```json\n{"count": 3}\n```')
+    assert parser.fields == {"count": 3}
+
+
+def test_salvage_keeps_the_fields_that_completed():
+    truncated = json.dumps(REPLY)[:-5]
+    assert IncrementalJSONParser.salvage(truncated) == {key: REPLY[key] for key in ("constructs_mentioned", "assessments",
+                                                                                     "count")}
+
+
+def published_fields(prefill, chunks):
+    published = []
+    token = _partial_sink.set(published.append)
+    try:
+        monitor = StreamMonitor(max_tokens=1000, log=lambda message: None, prefill=prefill)
+        for chunk in chunks:
+            monitor.on_text(chunk)
+    finally:
+        _partial_sink.reset(token)
+    return published
+
+
+def test_stream_publishes_completed_fields():
+    text = json.dumps(REPLY)
+    published = published_fields("", [text[:60], text[60:]])
+    assert {key for fields in published for key in fields} == set(REPLY)
+
+
+def test_continuation_parses_on_from_its_prefill():
+    text = json.dumps(REPLY)
+    cut = text.index('"assessment_name"') + 5
+    published = published_fields(text[:cut], [text[cut:]])
+    # Fields from the prefill were published by the first stream; nested keys are never top-level fields
+    assert [key for fields in published for key in fields] == ["assessments", "count", "summary"]
+    assert published[0]["assessments"] == REPLY["assessments"]